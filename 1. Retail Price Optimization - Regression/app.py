@@ -1,19 +1,42 @@
+import sys
+import time
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
-import joblib
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.metrics import configure_from_env, track
+from common.profiling import timed_import
+from common.registry import load_artifact
+from retail_price_sweep import PriceOptimizer
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
 
 # Load the pre-trained model
-model = joblib.load('model/retail_price_model.pkl')
+model = load_artifact(APP_DIR / 'model/retail_price_model.pkl')
 
 # Load the encoder
-encoder = joblib.load('model/encoder.pkl')
+encoder = load_artifact(APP_DIR / 'model/encoder.pkl')
 
 # Load the scaler
-scaler = joblib.load('model/scaler.pkl')
+scaler = load_artifact(APP_DIR / 'model/scaler.pkl')
+
+# Kept across reruns so its cached base rows are reused by every sweep
+@st.cache_resource
+def price_optimizer():
+    return PriceOptimizer(model, encoder, scaler)
 
 st.title("Retail Price Optimization - Regression")
 st.write("Predict optimal retail prices based on various features.")
 
+mode = st.sidebar.radio("Mode", ["Predict total price", "Optimize price"])
+
 # Input features
 qty = st.number_input("Quantity", min_value=0, value=1)
 lag_price = st.number_input("Lag Price", min_value=0.0, format="%.2f")
@@ -28,21 +51,62 @@ product_category_name = st.selectbox(
     options=encoder.categories_[0].tolist()
 )
 
+order = {
+    'qty': qty,
+    'lag_price': lag_price,
+    'unit_price': unit_price,
+    'customers': customers,
+    'comp1_price_diff': comp1_price_diff,
+    'comp2_price_diff': comp2_price_diff,
+    'comp3_price_diff': comp3_price_diff,
+    's': s,
+    'product_category_name': product_category_name
+}
+
+# Revenue-maximizing unit price against the competitor prices above
+if mode == "Optimize price":
+    with timed_import("plotly", __file__):
+        import plotly.express as px
+
+    st.subheader("Price Optimization")
+    st.write("Competitor prices are taken as the unit price above minus each price difference and held fixed while our price moves.")
+    optimizer = price_optimizer()
+    fitted_low, fitted_high = optimizer.fitted_range("unit_price")
+    col1, col2 = st.columns(2)
+    with col1:
+        low, high = st.slider("Unit price range", min_value=fitted_low, max_value=fitted_high, value=(fitted_low, fitted_high))
+        n_prices = st.slider("Candidate prices", min_value=100, max_value=5000, value=2000, step=100)
+    with col2:
+        qty_low, qty_high = optimizer.fitted_range("qty")
+        quantities = st.slider("Quantities", min_value=int(qty_low), max_value=int(qty_high), value=(max(int(qty_low), qty), max(int(qty_low), qty)))
+
+    start = time.perf_counter()
+    with track("optimize", app="retail"):
+        result = optimizer.sweep(order, quantities=range(quantities[0], quantities[1] + 1), n_prices=n_prices, low=low, high=high)
+    elapsed = time.perf_counter() - start
+
+    best = result.best
+    st.success(f"Best unit price: **${best['unit_price']:.2f}** for {best['qty']:.0f} units, predicted total price ${best['predicted_total_price']:.2f}")
+    fig = px.line(
+        result.curve,
+        x="unit_price",
+        y="predicted_total_price",
+        color="qty" if quantities[0] != quantities[1] else None,
+        labels={"unit_price": "Unit price ($)", "predicted_total_price": "Predicted total price ($)"},
+        title="Predicted total price vs unit price",
+    )
+    fig.add_vline(x=best['unit_price'], line_dash="dot", annotation_text="best")
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{len(result.curve):,} candidates priced in one predict call, {elapsed * 1000:.0f} ms")
+    with st.expander("Best price per quantity"):
+        st.dataframe(result.best_per_qty())
+    st.stop()
+
 # Predict and display output
 if st.button("Predict Total Price", type="primary"):
     try:
         # Create a DataFrame for the input
-        input_data = pd.DataFrame({
-            'qty': [qty],
-            'lag_price': [lag_price],
-            'unit_price': [unit_price],
-            'customers': [customers],
-            'comp1_price_diff': [comp1_price_diff],
-            'comp2_price_diff': [comp2_price_diff],
-            'comp3_price_diff': [comp3_price_diff],
-            's': [s],
-            'product_category_name': [product_category_name]
-        })
+        input_data = pd.DataFrame([order])
 
         # One-hot encode the categorical variable
         input_encoded = pd.DataFrame(
@@ -56,7 +120,8 @@ if st.button("Predict Total Price", type="primary"):
         input_scaled = scaler.transform(input_data)
 
         # Predict using the pre-trained model
-        prediction = model.predict(input_scaled)
+        with track("predict", app="retail"):
+            prediction = model.predict(input_scaled)
 
         if prediction < 0:
             st.warning("Predicted price is negative, please check the input values.")
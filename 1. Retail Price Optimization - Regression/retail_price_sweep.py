@@ -0,0 +1,106 @@
+"""Price optimization: sweep candidate unit prices and quantities through the retail model.
+
+The order the user describes is encoded and scaled once (and cached), then
+the whole grid of candidate ``unit_price`` x ``qty`` values is built directly
+in the scaled space and priced with one ``model.predict`` call:
+
+    optimizer = PriceOptimizer(model, encoder, scaler)
+    result = optimizer.sweep(order, quantities=[5, 10, 20], n_prices=2000)
+    result.best, result.curve
+
+Competitor prices stay fixed while our price moves, so the three
+``comp*_price_diff`` columns are recomputed for every candidate price.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+NUMERIC = [
+    "qty", "lag_price", "unit_price", "customers",
+    "comp1_price_diff", "comp2_price_diff", "comp3_price_diff", "s",
+]
+DIFFS = ["comp1_price_diff", "comp2_price_diff", "comp3_price_diff"]
+# Overwritten for every candidate, so not part of the cached base row
+SWEPT = ["unit_price", "qty", *DIFFS]
+
+
+@dataclass
+class PriceSweep:
+    curve: pd.DataFrame  # unit_price, qty, predicted_total_price for every candidate
+    best: pd.Series  # the candidate with the highest predicted total price
+
+    def best_per_qty(self) -> pd.DataFrame:
+        """Revenue-maximizing price for each quantity."""
+        rows = self.curve.loc[self.curve.groupby("qty")["predicted_total_price"].idxmax()]
+        return rows.reset_index(drop=True)
+
+
+class PriceOptimizer:
+    """The retail model with its encoder and scaler, for whole price grids at once."""
+
+    def __init__(self, model, encoder, scaler):
+        self.model = model
+        self.encoder = encoder
+        self.scaler = scaler
+        self.columns = list(scaler.feature_names_in_)
+        self._index = {column: self.columns.index(column) for column in NUMERIC}
+        # One scaled base row per distinct set of fixed inputs, reused by every sweep of it
+        self._scaled_base = lru_cache(maxsize=256)(self._scale_base)
+
+    def _scale_base(self, fixed: tuple) -> np.ndarray:
+        frame = pd.DataFrame([{**dict.fromkeys(SWEPT, 0.0), **dict(fixed)}])
+        encoded = pd.DataFrame(
+            self.encoder.transform(frame[["product_category_name"]]),
+            columns=self.encoder.get_feature_names_out(["product_category_name"]),
+        )
+        features = pd.concat([frame[NUMERIC], encoded], axis=1)[self.columns]
+        scaled = self.scaler.transform(features)[0]
+        scaled.flags.writeable = False
+        return scaled
+
+    def fitted_range(self, column: str = "unit_price") -> tuple[float, float]:
+        """Smallest and largest value of ``column`` seen in training."""
+        i = self._index[column]
+        return float(self.scaler.data_min_[i]), float(self.scaler.data_max_[i])
+
+    def sweep(
+        self,
+        order: dict,
+        *,
+        quantities=None,
+        n_prices: int = 1000,
+        low: float | None = None,
+        high: float | None = None,
+    ) -> PriceSweep:
+        """Predicted total price of ``order`` at ``n_prices`` unit prices in ``[low, high]``, per quantity.
+
+        ``order`` has every model input (``NUMERIC`` and
+        ``product_category_name``); its ``unit_price`` and diffs define the
+        competitor prices. ``quantities`` defaults to the order's ``qty``.
+        """
+        fitted_low, fitted_high = self.fitted_range()
+        prices = np.linspace(fitted_low if low is None else low, fitted_high if high is None else high, n_prices)
+        quantities = np.asarray([order["qty"]] if quantities is None else quantities, dtype=np.float64)
+        competitors = np.array([order["unit_price"] - order[column] for column in DIFFS])
+
+        base = self._scaled_base(tuple(sorted((k, v) for k, v in order.items() if k not in SWEPT)))
+        grid = np.tile(base, (len(prices) * len(quantities), 1))
+        # Quantity-major: each quantity's curve is one contiguous block
+        grid_prices = np.tile(prices, len(quantities))
+        grid_qty = np.repeat(quantities, len(prices))
+        # MinMaxScaler is x * scale_ + min_ per column: set the swept columns in scaled space
+        scale, offset = self.scaler.scale_, self.scaler.min_
+        for column, values in [
+            ("unit_price", grid_prices),
+            ("qty", grid_qty),
+            *((column, grid_prices - competitor) for column, competitor in zip(DIFFS, competitors)),
+        ]:
+            i = self._index[column]
+            grid[:, i] = values * scale[i] + offset[i]
+
+        curve = pd.DataFrame(
+            {"unit_price": grid_prices, "qty": grid_qty, "predicted_total_price": self.model.predict(grid)}
+        )
+        return PriceSweep(curve, curve.loc[curve["predicted_total_price"].idxmax()])
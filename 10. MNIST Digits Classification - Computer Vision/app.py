@@ -1,16 +1,64 @@
-import joblib
+import sys
+from pathlib import Path
+
+import pandas as pd
 import streamlit as st
-from PIL import Image, ImageOps
+from PIL import Image, ImageDraw, ImageOps
 import numpy as np
 
-# Load the model
-model = joblib.load('mnist_svc_model.pkl')
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.metrics import configure_from_env, track
+from mnist_models import available_models, default_model, load_model
+from mnist_segment import load_pages, read_pages
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+# The fast kernel approximation (mnist_fast.py) when it has been built, else the exact SVC,
+# plus the models mnist_zoo.py exported; MNIST_MODEL picks the one selected at startup
+models = available_models()
+if not models:
+    st.error("❌ No model found: add mnist_svc_model.pkl, or build one with mnist_fast.py or mnist_zoo.py")
+    st.stop()
+model_name = st.sidebar.radio("Model", list(models), index=list(models).index(default_model(models)))
+# Arrays (support vectors, landmarks) are memory-mapped instead of copied into the heap
+model = load_model(models[model_name])
 
 # Streamlit app
 st.title("🔢 MNIST Digits Classification")
 st.write("Predict the digit of a handwritten digit.")
 st.image("https://opendatascience.com/wp-content/uploads/2017/05/handwritten.jpg", width='stretch')
 
+mode = st.sidebar.radio("Mode", ["Single digit", "Number"])
+
+# Whole numbers: every digit found, normalized like MNIST and classified in one batch
+if mode == "Number":
+    st.header("Read a Number")
+    st.write("Upload scans of whole numbers (several files or a multi-page TIFF). The digits are found by thresholding and connected components, centered like MNIST digits and classified together; pages are processed in parallel.")
+    uploads = st.file_uploader("Images", type=["jpg", "jpeg", "png", "tif", "tiff"], accept_multiple_files=True)
+    if uploads and st.button("Read", type="primary", use_container_width=True):
+        pages = [(f"{upload.name} p{i + 1}", page) for upload in uploads for i, page in enumerate(load_pages(upload))]
+        with track("read_number", app="mnist"):
+            readings = read_pages([page for _, page in pages], model)
+        for (name, page), reading in zip(pages, readings):
+            st.subheader(name)
+            if not reading.boxes:
+                st.warning("No digits found")
+                continue
+            st.success(f"Number: **{reading.text.replace(chr(10), ' / ')}**")
+            annotated = page.convert("RGB")
+            draw = ImageDraw.Draw(annotated)
+            for box in reading.boxes:
+                draw.rectangle((box.left, box.top, box.left + box.width, box.top + box.height), outline="red", width=2)
+                draw.text((box.left, max(box.top - 12, 0)), box.digit, fill="red")
+            st.image(annotated, width='stretch')
+            st.dataframe(pd.DataFrame([vars(box) for box in reading.boxes]), width='stretch')
+    st.stop()
+
 # Image input
 image = st.file_uploader("Upload an image of a handwritten digit", type=["jpg", "jpeg", "png"])
 if image:
@@ -21,7 +69,8 @@ if st.button("Predict", type="primary", use_container_width=True):
     if image:
         img = ImageOps.invert(Image.open(image).convert('L').resize((28, 28)))
         x = np.array(img, dtype=np.float32).reshape(1, -1) / 255.0
-        prediction = model.predict(x)
+        with track("predict", app="mnist"):
+            prediction = model.predict(x)
         st.success(f"Predicted digit: **{prediction[0]}**")
     else:
         st.error("Please upload an image of a handwritten digit")
\ No newline at end of file
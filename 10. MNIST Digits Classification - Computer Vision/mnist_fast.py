@@ -0,0 +1,119 @@
+"""Fit the fast approximate MNIST model and compare it with the exact SVC.
+
+    poetry run python "10. MNIST Digits Classification - Computer Vision/mnist_fast.py" --components 3000
+
+Approximates the RBF kernel of the shipped ``SVC`` (same ``gamma="scale"``)
+with ``Nystroem`` on ``--components`` landmark digits and fits a
+``RidgeClassifier`` on the mapped features of the notebook's training split,
+then folds both into a ``KernelApproxClassifier`` (see ``mnist_models``).
+Both models are scored on the notebook's test split for accuracy, artefact
+size, load time, single-image latency and batch throughput, written to
+``mnist_fast_model.json``. The shipped SVC was fitted on all 70,000 digits,
+test split included, so its accuracy there is optimistic; ``--fit-all``
+refits the fast model on every digit the same way before saving it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.profiling import format_bytes
+from mnist_models import FAST_PATH, SVC_PATH, KernelApproxClassifier, load_mnist, split
+
+DEFAULT_COMPONENTS = 3000
+
+
+def fit_fast(x: np.ndarray, y: np.ndarray, components: int = DEFAULT_COMPONENTS, alpha: float = 1.0, seed: int = 42):
+    """Nystroem + ridge head on ``x``, folded into a ``KernelApproxClassifier``."""
+    from sklearn.kernel_approximation import Nystroem
+    from sklearn.linear_model import RidgeClassifier
+
+    # SVC's gamma="scale"
+    gamma = 1.0 / (x.shape[1] * x.var())
+    nystroem = Nystroem(gamma=gamma, n_components=components, random_state=seed).fit(x)
+    linear = RidgeClassifier(alpha=alpha).fit(nystroem.transform(x), y)
+    return KernelApproxClassifier.from_fitted(nystroem, linear)
+
+
+def save(model, path: Path = FAST_PATH) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    # Uncompressed, so the app can memory-map the arrays
+    joblib.dump(model, tmp)
+    tmp.replace(path)
+
+
+def measure(path: Path, x_test: np.ndarray, y_test: np.ndarray, repeats: int = 200) -> dict:
+    """Accuracy, size, load time, single-image latency and batch throughput of the model at ``path``."""
+    start = time.perf_counter()
+    model = joblib.load(path, mmap_mode="r")
+    load_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = model.predict(x_test)
+    batch_seconds = time.perf_counter() - start
+
+    model.predict(x_test[:1])  # Warm-up, not timed
+    times = []
+    for i in range(repeats):
+        image = x_test[i % len(x_test)].reshape(1, -1)
+        start = time.perf_counter()
+        model.predict(image)
+        times.append((time.perf_counter() - start) * 1000)
+    return {
+        "accuracy": float((predictions == y_test).mean()),
+        "file_bytes": path.stat().st_size,
+        "load_seconds": load_seconds,
+        "single_image_latency_ms": {"p50": float(np.percentile(times, 50)), "p95": float(np.percentile(times, 95))},
+        "batch_images_per_sec": float(len(x_test) / batch_seconds),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--components", type=int, default=DEFAULT_COMPONENTS, help="Nystroem landmark digits")
+    parser.add_argument("--alpha", type=float, default=1.0, help="Ridge regularization of the linear head")
+    parser.add_argument("--fit-all", action="store_true", help="Refit on all 70,000 digits before saving")
+    parser.add_argument("--repeats", type=int, default=200, help="Single-image latency samples")
+    args = parser.parse_args()
+
+    x, y = load_mnist()
+    x_train, x_test, y_train, y_test = split(x, y)
+    start = time.perf_counter()
+    model = fit_fast(x_train, y_train, args.components, args.alpha)
+    fit_seconds = time.perf_counter() - start
+    save(model)
+
+    report = {"components": args.components, "alpha": args.alpha, "test_rows": len(x_test), "fit_seconds": fit_seconds}
+    report["fast"] = measure(FAST_PATH, x_test, y_test, args.repeats)
+    if SVC_PATH.exists():
+        report["exact_svc"] = measure(SVC_PATH, x_test, y_test, args.repeats)
+    if args.fit_all:
+        save(fit_fast(x, y, args.components, args.alpha))
+        report["saved_fit_on"] = "all"
+    FAST_PATH.with_suffix(".json").write_text(json.dumps(report, indent=2))
+
+    for name in ("exact_svc", "fast"):
+        if name in report:
+            r = report[name]
+            print(
+                f"{name:<9} accuracy {r['accuracy']:.4f}, {format_bytes(r['file_bytes'])}, load {r['load_seconds']:.2f}s, "
+                f"p50 {r['single_image_latency_ms']['p50']:.2f} ms/image, {r['batch_images_per_sec']:,.0f} images/s batched"
+            )
+    if "exact_svc" not in report:
+        print(f"{SVC_PATH.name} not found: only the fast model was measured")
+    print(f"wrote {FAST_PATH.name} and {FAST_PATH.with_suffix('.json').name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
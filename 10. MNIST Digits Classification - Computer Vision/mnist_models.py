@@ -0,0 +1,114 @@
+"""MNIST data and the digit models the app can serve.
+
+``MODELS`` lists the artefacts the app offers, fastest first; only the ones
+present on disk are selectable, followed by the Pareto-frontier models
+``mnist_zoo.py`` exported to ``zoo/``. ``MNIST_MODEL`` (a model name or
+artefact file name) chooses the one the app starts with.
+
+``KernelApproxClassifier`` is the fast alternative to the exact RBF ``SVC``:
+a Nystroem approximation of the same kernel on a few thousand landmark
+digits with a linear head on top, stored as plain float32 arrays. The
+Nystroem normalization is multiplied into the head's weights when the model
+is built, so a prediction is one kernel row against the landmarks and one
+``(landmarks, 10)`` matmul, instead of kernels against every support vector.
+"""
+import json
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.registry import load_artifact
+
+SVC_PATH = APP_DIR / "mnist_svc_model.pkl"
+FAST_PATH = APP_DIR / "mnist_fast_model.pkl"
+ZOO_DIR = APP_DIR / "zoo"
+MANIFEST_PATH = ZOO_DIR / "manifest.json"
+
+# Label shown in the app -> artefact, fastest first
+MODELS = {
+    "Fast (kernel approximation)": FAST_PATH,
+    "Exact SVC": SVC_PATH,
+}
+
+
+def load_mnist() -> tuple[np.ndarray, np.ndarray]:
+    """The 70,000 MNIST digits as float32 pixels in [0, 1] and string labels, like the notebook."""
+    from sklearn.datasets import fetch_openml
+
+    # Downloaded once, then read from scikit-learn's data cache
+    mnist = fetch_openml("mnist_784", as_frame=False, parser="auto")
+    return (mnist.data / 255.0).astype(np.float32), mnist.target.astype(str)
+
+
+def split(x: np.ndarray, y: np.ndarray):
+    """The notebook's 80/20 train/test split."""
+    from sklearn.model_selection import train_test_split
+
+    return train_test_split(x, y, test_size=0.2, random_state=42)
+
+
+class KernelApproxClassifier:
+    """RBF-kernel classifier over Nystroem landmarks with a folded linear head."""
+
+    def __init__(self, landmarks: np.ndarray, gamma: float, weights: np.ndarray, intercept: np.ndarray, classes: np.ndarray):
+        self.landmarks = np.ascontiguousarray(landmarks, dtype=np.float32)
+        self.gamma = float(gamma)
+        self.weights = np.ascontiguousarray(weights, dtype=np.float32)
+        self.intercept = np.asarray(intercept, dtype=np.float32)
+        self.classes_ = np.asarray(classes)
+        self.landmark_norms = (self.landmarks**2).sum(axis=1)
+
+    @classmethod
+    def from_fitted(cls, nystroem, linear) -> "KernelApproxClassifier":
+        """Fold a fitted ``Nystroem`` and linear classifier (``coef_``, ``intercept_``) into one model."""
+        # transform(x) @ coef_.T == kernel(x, components_) @ (normalization_.T @ coef_.T)
+        weights = nystroem.normalization_.T @ linear.coef_.T
+        return cls(nystroem.components_, nystroem.gamma, weights, linear.intercept_, linear.classes_)
+
+    def decision_function(self, x: np.ndarray) -> np.ndarray:
+        x = np.asarray(x, dtype=np.float32)
+        # ||x - l||^2 = ||x||^2 - 2 x.l + ||l||^2, the cross term as one BLAS matmul
+        distances = x @ self.landmarks.T
+        distances *= -2.0
+        distances += (x**2).sum(axis=1)[:, None]
+        distances += self.landmark_norms
+        np.maximum(distances, 0.0, out=distances)
+        distances *= -self.gamma
+        return np.exp(distances, out=distances) @ self.weights + self.intercept
+
+    def predict(self, x: np.ndarray) -> np.ndarray:
+        return self.classes_[self.decision_function(x).argmax(axis=1)]
+
+
+def available_models() -> dict[str, Path]:
+    """The entries of ``MODELS`` whose artefact exists, then the exported zoo models, fastest first."""
+    models = {label: path for label, path in MODELS.items() if path.exists()}
+    if MANIFEST_PATH.exists():
+        results = json.loads(MANIFEST_PATH.read_text())["results"]
+        for result in sorted((r for r in results if r["frontier"]), key=lambda r: r["latency_p50_ms"]):
+            path = ZOO_DIR / result["file"]
+            if path.exists():
+                label = f"{result['model']} (zoo: {result['accuracy']:.2%}, {result['latency_p50_ms']:.2f} ms)"
+                models[label] = path
+    return models
+
+
+def default_model(models: dict[str, Path]) -> str:
+    """The label ``MNIST_MODEL`` names (label prefix or artefact file name), else the first one."""
+    wanted = os.environ.get("MNIST_MODEL", "").strip().lower()
+    if wanted:
+        for label, path in models.items():
+            if label.lower().startswith(wanted) or wanted in (path.name.lower(), path.stem.lower()):
+                return label
+    return next(iter(models))
+
+
+def load_model(path: Path):
+    """A digit model, its arrays memory-mapped instead of copied into the heap."""
+    return load_artifact(path, mmap_mode="r")
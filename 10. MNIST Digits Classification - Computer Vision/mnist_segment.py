@@ -0,0 +1,185 @@
+"""Read whole numbers from scanned images, one MNIST digit at a time.
+
+``segment`` turns a page into digit crops the way MNIST was built: the page
+is converted to light ink on a dark background (pages with a light
+background are inverted), thresholded with Otsu's method, and split into
+8-connected components; specks much shorter than the tallest component are
+dropped once the pieces of broken digits (stacked above each other) are merged.
+Each digit is scaled so its longer side is 20 pixels, placed on a 28x28
+canvas and shifted so its center of mass is at the center. Digits are read
+line by line, left to right.
+
+``read_pages`` segments every page on a thread pool (the heavy parts are
+numpy, scipy and PIL calls that release the GIL), then classifies the digits
+of all pages with one batched ``model.predict``:
+
+    pages = read_pages(load_pages(upload), model)
+    pages[0].text, pages[0].boxes
+"""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import numpy as np
+from PIL import Image, ImageOps, ImageSequence
+from scipy import ndimage
+
+# Components shorter than this fraction of the tallest one are noise, and so
+# are, even before merging, ones both shorter and narrower than SPECK_RATIO of it
+MIN_HEIGHT_RATIO = 0.35
+SPECK_RATIO = 0.1
+# Boxes overlapping horizontally by this fraction of the narrower one, and at
+# most this fraction of the tallest component apart vertically, are one digit
+MERGE_OVERLAP = 0.5
+MERGE_GAP = 0.25
+
+
+@dataclass
+class DigitBox:
+    left: int
+    top: int
+    width: int
+    height: int
+    digit: str = ""
+
+
+@dataclass
+class PageReading:
+    text: str = ""  # Digits of each line, lines separated by "\n"
+    boxes: list[DigitBox] = field(default_factory=list)
+
+
+def load_pages(file) -> list[Image.Image]:
+    """Every frame of an image file (multi-page TIFFs have several) as grayscale, transparency on white."""
+    pages = []
+    with Image.open(file) as image:
+        for frame in ImageSequence.Iterator(image):
+            frame = ImageOps.exif_transpose(frame)
+            if frame.mode in ("RGBA", "LA", "PA") or "transparency" in frame.info:
+                frame = frame.convert("RGBA")
+                background = Image.new("RGBA", frame.size, "white")
+                frame = Image.alpha_composite(background, frame)
+            pages.append(frame.convert("L"))
+    return pages
+
+
+def otsu_threshold(gray: np.ndarray) -> int:
+    """Gray level that best separates ink from background (Otsu's method)."""
+    histogram = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    weight = np.cumsum(histogram)
+    mean = np.cumsum(histogram * np.arange(256))
+    total_weight, total_mean = weight[-1], mean[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        between = (total_mean * weight / total_weight - mean) ** 2 / (weight * (total_weight - weight))
+    return int(np.nanargmax(between))
+
+
+def _boxes(labels: np.ndarray, count: int) -> list[list[int]]:
+    # [top, bottom, left, right, label...] of every component
+    return [[s[0].start, s[0].stop, s[1].start, s[1].stop, i + 1] for i, s in enumerate(ndimage.find_objects(labels, count))]
+
+
+def _merge(boxes: list[list[int]], tallest: int) -> list[list[int]]:
+    """Pieces of one digit (overlapping horizontally, close vertically) merged into one box."""
+    boxes = [list(b) for b in boxes]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                overlap = min(a[3], b[3]) - max(a[2], b[2])
+                gap = max(a[0], b[0]) - min(a[1], b[1])
+                if overlap >= MERGE_OVERLAP * min(a[3] - a[2], b[3] - b[2]) and gap <= MERGE_GAP * tallest:
+                    boxes[i] = [min(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), max(a[3], b[3]), *a[4:], *b[4:]]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return boxes
+
+
+def _lines(boxes: list[list[int]]) -> list[list[list[int]]]:
+    """Boxes grouped into text lines (top to bottom), each sorted left to right."""
+    lines: list[list[list[int]]] = []
+    for box in sorted(boxes, key=lambda b: b[0]):
+        center = (box[0] + box[1]) / 2
+        for line in lines:
+            if line[0][0] <= center < max(b[1] for b in line):
+                line.append(box)
+                break
+        else:
+            lines.append([box])
+    return [sorted(line, key=lambda b: b[2]) for line in lines]
+
+
+def to_mnist(ink: np.ndarray) -> np.ndarray:
+    """A crop of one digit (ink > 0 on 0) as a centered 28x28 MNIST image in [0, 1]."""
+    height, width = ink.shape
+    scale = 20 / max(height, width)
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    small = np.asarray(Image.fromarray(np.uint8(ink * 255)).resize(size, Image.LANCZOS), dtype=np.float32)
+    canvas = np.zeros((28, 28), dtype=np.float32)
+    top, left = (28 - size[1]) // 2, (28 - size[0]) // 2
+    canvas[top : top + size[1], left : left + size[0]] = small / max(small.max(), 1.0)
+    # MNIST digits have their center of mass, not their box, in the middle
+    cy, cx = ndimage.center_of_mass(canvas)
+    return ndimage.shift(canvas, (round(13.5 - cy), round(13.5 - cx)), order=0, mode="constant")
+
+
+def segment(page: Image.Image) -> tuple[list[list[DigitBox]], np.ndarray]:
+    """Digit boxes of ``page`` per line and their ``(digits, 784)`` MNIST inputs, in reading order."""
+    gray = np.asarray(page.convert("L"))
+    if np.median(gray) > 127:
+        # Dark ink on light paper: MNIST is light ink on black
+        gray = 255 - gray
+    if gray.min() == gray.max():
+        return [], np.empty((0, 784), dtype=np.float32)
+    threshold = otsu_threshold(gray)
+    mask = gray > threshold
+    labels, count = ndimage.label(mask, structure=np.ones((3, 3), dtype=bool))
+    boxes = _boxes(labels, count)
+    if not boxes:
+        return [], np.empty((0, 784), dtype=np.float32)
+    tallest = max(b[1] - b[0] for b in boxes)
+    # Dust small in both directions can never be part of a digit: drop it before the pairwise merge
+    boxes = [b for b in boxes if max(b[1] - b[0], b[3] - b[2]) >= SPECK_RATIO * tallest]
+    boxes = [b for b in _merge(boxes, tallest) if b[1] - b[0] >= MIN_HEIGHT_RATIO * tallest]
+
+    # Ink strength above the threshold, so antialiased edges stay soft
+    strength = np.clip((gray.astype(np.float32) - threshold) / max(int(gray.max()) - threshold, 1), 0.0, 1.0)
+    lines, images = [], []
+    for line in _lines(boxes):
+        line_boxes = []
+        for top, bottom, left, right, *members in line:
+            crop = np.where(np.isin(labels[top:bottom, left:right], members), strength[top:bottom, left:right], 0.0)
+            images.append(to_mnist(crop).reshape(-1))
+            line_boxes.append(DigitBox(int(left), int(top), int(right - left), int(bottom - top)))
+        lines.append(line_boxes)
+    return lines, np.asarray(images, dtype=np.float32).reshape(-1, 784)
+
+
+def read_pages(pages: list[Image.Image], model, workers: int | None = None) -> list[PageReading]:
+    """The number on every page: pages segmented in parallel, all digits classified in one ``predict``."""
+    if not pages:
+        return []
+    workers = workers or min(len(pages), os.cpu_count() or 1) or 1
+    if workers > 1:
+        with ThreadPoolExecutor(workers) as pool:
+            segmented = list(pool.map(segment, pages))
+    else:
+        segmented = [segment(page) for page in pages]
+
+    inputs = np.concatenate([images for _, images in segmented])
+    digits = iter(model.predict(inputs) if len(inputs) else [])
+    readings = []
+    for lines, _ in segmented:
+        reading = PageReading()
+        for line in lines:
+            for box in line:
+                box.digit = str(next(digits))
+            reading.boxes.extend(line)
+        reading.text = "\n".join("".join(box.digit for box in line) for line in lines)
+        readings.append(reading)
+    return readings
@@ -0,0 +1,175 @@
+"""Benchmark the notebook's MNIST models on speed as well as accuracy.
+
+    poetry run python "10. MNIST Digits Classification - Computer Vision/mnist_zoo.py"
+    poetry run python "10. MNIST Digits Classification - Computer Vision/mnist_zoo.py" --models GaussianNB RandomForestClassifier --train-rows 20000
+
+Fits the models of the notebook's ``evaluate()`` (with fixed seeds) plus the
+fast kernel approximation of ``mnist_fast.py`` on the notebook's training
+split, and records for each: fit time, artefact size, load time,
+single-image latency (p50/p95), batch throughput and accuracy on the test
+split. The models on the Pareto frontier of accuracy against single-image
+latency (no other model is both at least as accurate and at least as fast)
+are exported to ``zoo/`` with a ``manifest.json`` holding every result; the
+app lists them next to its bundled models, and ``MNIST_MODEL=<name>`` picks
+the one it starts with.
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import joblib
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.profiling import format_bytes
+from mnist_fast import fit_fast, measure
+from mnist_models import MANIFEST_PATH, ZOO_DIR, load_mnist, split
+
+
+def _estimator(name: str, seed: int):
+    from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+    from sklearn.naive_bayes import BernoulliNB, GaussianNB, MultinomialNB
+    from sklearn.svm import SVC
+    from sklearn.tree import DecisionTreeClassifier
+
+    return {
+        "GaussianNB": GaussianNB,
+        "MultinomialNB": MultinomialNB,
+        "BernoulliNB": BernoulliNB,
+        "ExtraTreesClassifier": lambda: ExtraTreesClassifier(random_state=seed),
+        "DecisionTreeClassifier": lambda: DecisionTreeClassifier(random_state=seed),
+        "RandomForestClassifier": lambda: RandomForestClassifier(random_state=seed),
+        "SVC": SVC,
+    }[name]()
+
+
+MODEL_NAMES = [
+    "GaussianNB", "MultinomialNB", "BernoulliNB", "ExtraTreesClassifier",
+    "DecisionTreeClassifier", "RandomForestClassifier", "SVC", "KernelApprox",
+]
+
+
+def fit(name: str, x, y, seed: int = 42):
+    if name == "KernelApprox":
+        return fit_fast(x, y, seed=seed)
+    return _estimator(name, seed).fit(x, y)
+
+
+@dataclass
+class BenchmarkResult:
+    model: str
+    accuracy: float
+    fit_seconds: float
+    file_bytes: int
+    load_seconds: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    images_per_sec: float
+    frontier: bool = False
+    file: str | None = None
+
+
+def pareto_frontier(results: list[BenchmarkResult]) -> list[BenchmarkResult]:
+    """Results no other one beats on both accuracy and single-image latency, fastest first."""
+    frontier, best_accuracy = [], -1.0
+    for result in sorted(results, key=lambda r: (r.latency_p50_ms, -r.accuracy)):
+        if result.accuracy > best_accuracy:
+            frontier.append(result)
+            best_accuracy = result.accuracy
+    return frontier
+
+
+def benchmark(
+    names: list[str] = MODEL_NAMES,
+    *,
+    train_rows: int | None = None,
+    repeats: int = 200,
+    seed: int = 42,
+    on_result=None,
+) -> list[BenchmarkResult]:
+    """Fit and measure every model in ``names``; export the frontier to ``zoo/``."""
+    x, y = load_mnist()
+    x_train, x_test, y_train, y_test = split(x, y)
+    if train_rows:
+        x_train, y_train = x_train[:train_rows], y_train[:train_rows]
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            start = time.perf_counter()
+            model = fit(name, x_train, y_train, seed)
+            fit_seconds = time.perf_counter() - start
+            path = Path(tmp) / f"mnist_{name.lower()}.pkl"
+            # Uncompressed so the app can memory-map the arrays
+            joblib.dump(model, path)
+            del model
+            measured = measure(path, x_test, y_test, repeats)
+            result = BenchmarkResult(
+                model=name,
+                accuracy=measured["accuracy"],
+                fit_seconds=fit_seconds,
+                file_bytes=measured["file_bytes"],
+                load_seconds=measured["load_seconds"],
+                latency_p50_ms=measured["single_image_latency_ms"]["p50"],
+                latency_p95_ms=measured["single_image_latency_ms"]["p95"],
+                images_per_sec=measured["batch_images_per_sec"],
+            )
+            results.append(result)
+            if on_result is not None:
+                on_result(result)
+
+        ZOO_DIR.mkdir(exist_ok=True)
+        # Artefacts of an earlier run that left the frontier go
+        for old in ZOO_DIR.glob("mnist_*.pkl"):
+            old.unlink()
+        for result in pareto_frontier(results):
+            result.frontier = True
+            result.file = f"mnist_{result.model.lower()}.pkl"
+            shutil.move(Path(tmp) / result.file, ZOO_DIR / result.file)
+
+    manifest = {
+        "train_rows": len(x_train),
+        "test_rows": len(x_test),
+        "seed": seed,
+        "results": [asdict(result) for result in results],
+    }
+    tmp_manifest = MANIFEST_PATH.with_name(f"{MANIFEST_PATH.name}.{os.getpid()}.tmp")
+    tmp_manifest.write_text(json.dumps(manifest, indent=2))
+    tmp_manifest.replace(MANIFEST_PATH)
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--models", nargs="+", choices=MODEL_NAMES, default=MODEL_NAMES)
+    parser.add_argument("--train-rows", type=int, help="Fit on the first N training digits only (quick runs)")
+    parser.add_argument("--repeats", type=int, default=200, help="Single-image latency samples")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    def progress(result: BenchmarkResult) -> None:
+        print(f"{result.model:<23} accuracy {result.accuracy:.4f}, fit {result.fit_seconds:.1f}s", file=sys.stderr)
+
+    results = benchmark(args.models, train_rows=args.train_rows, repeats=args.repeats, seed=args.seed, on_result=progress)
+    table = pd.DataFrame([asdict(result) for result in results]).drop(columns="file")
+    table["file_bytes"] = table["file_bytes"].map(format_bytes)
+    table["frontier"] = table["frontier"].map({True: "*", False: ""})
+    print(table.sort_values("latency_p50_ms").to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+    frontier = " -> ".join(r.model for r in pareto_frontier(results))
+    print(f"\nPareto frontier (faster -> more accurate): {frontier}")
+    print(f"exported to {ZOO_DIR.name}/ with {MANIFEST_PATH.name}; start the app with MNIST_MODEL=<model> to serve one")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
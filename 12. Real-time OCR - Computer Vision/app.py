@@ -1,47 +1,23 @@
-import cv2
-import pytesseract
+import sys
+from pathlib import Path
+
 import streamlit as st
-import av
 import numpy as np
-from streamlit_webrtc import webrtc_streamer, VideoProcessorBase
-
-class OCRProcessor(VideoProcessorBase):
-    def __init__(self):
-        # Quick knobs we’ll tweak from the UI
-        self.conf_threshold = 25
-        self.box_color_bgr = (0, 255, 0)
-        self.text_color_bgr = (0, 255, 0)
-        self.box_thickness = 1
-        self.text_thickness = 1
-    def recv(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        
-        # Step 1: simplify colors → grayscale helps OCR focus on shapes
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        
-        # Step 2: separate text/background using Otsu threshold
-        thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
-        
-        try:
-            # Step 3: run OCR and get word boxes + confidences
-            data = pytesseract.image_to_data(thresh, output_type=pytesseract.Output.DICT)
-            
-            # Step 4: draw only what we trust
-            for i in range(len(data['text'])):
-                # Keep boxes with decent confidence and non-empty text
-                if int(data['conf'][i]) > self.conf_threshold and data['text'][i].strip():
-                    x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
-                    
-                    # Box shows where Tesseract thinks the word is
-                    cv2.rectangle(img, (x, y), (x + w, y + h), self.box_color_bgr, self.box_thickness)
-                    
-                    # Label it so we see what was read
-                    cv2.putText(img, data['text'][i], (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.text_color_bgr, self.text_thickness)
-            
-        except Exception as e:
-            st.error(f"OCR Error: {str(e)}")
-        
-        return av.VideoFrame.from_ndarray(img, format="bgr24")
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.metrics import configure_from_env, track
+from common.profiling import timed_import
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+with timed_import("opencv + pytesseract", __file__):
+    import cv2
+    import pytesseract
 
 def _hex_to_bgr(hex_color):
     # Streamlit gives hex; OpenCV expects BGR tuples
@@ -142,6 +118,10 @@ mode = st.radio("Mode", ("Real-time", "Take Photo", "Upload Photo"), horizontal=
 
 if mode == "Real-time":
     st.write("We’ll use your webcam and draw boxes live.")
+    # WebRTC and PyAV are only needed by the live camera mode
+    with timed_import("streamlit-webrtc", __file__):
+        from streamlit_webrtc import webrtc_streamer
+        from ocr_processor import OCRProcessor
     ctx = webrtc_streamer(
         key="ocr-camera",
         video_processor_factory=OCRProcessor,
@@ -162,7 +142,8 @@ elif mode == "Take Photo":
         image_bgr = decode_image_from_uploader(img_file)
         if image_bgr is not None:
             # One-click OCR on your snapshot
-            annotated, texts = run_ocr_on_bgr(image_bgr, conf_threshold, box_color_bgr, text_color_bgr, box_thickness, text_thickness)
+            with track("run_ocr", app="ocr"):
+                annotated, texts = run_ocr_on_bgr(image_bgr, conf_threshold, box_color_bgr, text_color_bgr, box_thickness, text_thickness)
             display_annotated_and_text(annotated, texts, caption="Annotated photo")
         else:
             st.error("Could not decode image.")
@@ -172,7 +153,8 @@ elif mode == "Upload Photo":
         image_bgr = decode_image_from_uploader(uploaded)
         if image_bgr is not None:
             # Run the same pipeline for your file
-            annotated, texts = run_ocr_on_bgr(image_bgr, conf_threshold, box_color_bgr, text_color_bgr, box_thickness, text_thickness)
+            with track("run_ocr", app="ocr"):
+                annotated, texts = run_ocr_on_bgr(image_bgr, conf_threshold, box_color_bgr, text_color_bgr, box_thickness, text_thickness)
             display_annotated_and_text(annotated, texts, caption="Annotated upload")
         else:
             st.error("Could not decode image.")
@@ -0,0 +1,49 @@
+import cv2
+import pytesseract
+import streamlit as st
+import av
+from streamlit_webrtc import VideoProcessorBase
+
+from common.metrics import ERRORS, track
+
+
+class OCRProcessor(VideoProcessorBase):
+    def __init__(self):
+        # Quick knobs we’ll tweak from the UI
+        self.conf_threshold = 25
+        self.box_color_bgr = (0, 255, 0)
+        self.text_color_bgr = (0, 255, 0)
+        self.box_thickness = 1
+        self.text_thickness = 1
+    def recv(self, frame):
+        # Every frame goes through here, so this is the OCR hot path
+        with track("recv", app="ocr"):
+            img = frame.to_ndarray(format="bgr24")
+        
+            # Step 1: simplify colors → grayscale helps OCR focus on shapes
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        
+            # Step 2: separate text/background using Otsu threshold
+            thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)[1]
+        
+            try:
+                # Step 3: run OCR and get word boxes + confidences
+                data = pytesseract.image_to_data(thresh, output_type=pytesseract.Output.DICT)
+            
+                # Step 4: draw only what we trust
+                for i in range(len(data['text'])):
+                    # Keep boxes with decent confidence and non-empty text
+                    if int(data['conf'][i]) > self.conf_threshold and data['text'][i].strip():
+                        x, y, w, h = data['left'][i], data['top'][i], data['width'][i], data['height'][i]
+                    
+                        # Box shows where Tesseract thinks the word is
+                        cv2.rectangle(img, (x, y), (x + w, y + h), self.box_color_bgr, self.box_thickness)
+                    
+                        # Label it so we see what was read
+                        cv2.putText(img, data['text'][i], (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.text_color_bgr, self.text_thickness)
+            
+            except Exception as e:
+                ERRORS.inc(app="ocr", operation="recv")
+                st.error(f"OCR Error: {str(e)}")
+        
+            return av.VideoFrame.from_ndarray(img, format="bgr24")
@@ -1,6 +1,26 @@
+import sys
+import tempfile
+import time
+from pathlib import Path
+
 import joblib
 import streamlit as st
-import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from car_price_batch import score_csv
+from car_price_sweep import SWEEP_FEATURES, fitted_range, sweep
+
+from common.compiled import compile_pipeline, sample_inputs
+from common.metrics import configure_from_env, track
+from common.profiling import timed_import
+from common.reload import watch_model
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
 
 # Function to extract categorical choices from the pipeline
 def extract_categorical_choices_from_pipeline(pipeline):
@@ -15,16 +35,73 @@ def extract_categorical_choices_from_pipeline(pipeline):
 
     return choices
 
-# Load the pipeline
-pipeline = joblib.load('car_price_prediction_pipeline.pkl')
+# Load the pipeline with its numpy-only single-row predictor
+def load_car_model(path):
+    pipeline = joblib.load(path)
+    return pipeline, compile_pipeline(pipeline)
+
+# A few predictions on both paths before a retrained model is swapped in
+def warm_up_car_model(model):
+    pipeline, predictor = model
+    samples = sample_inputs(pipeline, 8)
+    predictor.predict_frame(samples)
+    for row in samples.to_dict('records'):
+        predictor.predict_one(row)
+
+# Reloaded in the background whenever the pickle is replaced
+car_model = watch_model(
+    APP_DIR / 'car_price_prediction_pipeline.pkl',
+    name="car",
+    loader=load_car_model,
+    warm_up=warm_up_car_model,
+)
+
+# Price curves, cached per model version and base configuration
+@st.cache_data(max_entries=256, show_spinner=False)
+def cached_sweep(_pipeline, version, base_key, feature, n_points, low, high, across_brands):
+    return sweep(_pipeline, dict(base_key), feature, n_points=n_points, low=low, high=high, across_brands=across_brands)
 
 # Load the categorical choices
-categorical_choices = extract_categorical_choices_from_pipeline(pipeline)
+with car_model.acquire() as (pipeline, _):
+    categorical_choices = extract_categorical_choices_from_pipeline(pipeline)
 
 # Streamlit app
 st.title(":red_car: Car Price Prediction")
 st.write("Predict the price of a car based on its features.")
 st.image("https://media.istockphoto.com/id/867003336/photo/rising-car-costs.jpg?s=612x612&w=0&k=20&c=1hyDp76LXFrysMjEXsSUlgr3629rDKCSFW1rXA-eveI=", use_container_width=True)
+st.caption(f"Model version `{car_model.version}`, loaded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(car_model.loaded_at))}")
+
+mode = st.sidebar.radio("Mode", ["Single car", "What-if sweep", "Bulk CSV"])
+
+# Price a whole inventory file, chunk by chunk
+if mode == "Bulk CSV":
+    st.subheader("Bulk Pricing")
+    st.write("Upload an inventory CSV with the same columns as the form; every row gets a `predicted_price`, and rows that can't be priced get an `error` instead.")
+    uploaded = st.file_uploader("Inventory CSV", type=["csv"])
+    chunksize = st.number_input("Rows per chunk", min_value=1000, max_value=200000, value=10000, step=1000)
+    if uploaded is not None and st.button("Price Inventory", type="primary", use_container_width=True):
+        progress = st.empty()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / f"priced_{Path(uploaded.name).stem}.csv"
+            try:
+                # One model version for the whole file, even if a new one is swapped in meanwhile
+                with track("bulk_predict", app="car"), car_model.acquire() as (pipeline, _):
+                    report = score_csv(
+                        uploaded,
+                        output,
+                        pipeline=pipeline,
+                        chunksize=int(chunksize),
+                        on_chunk=lambda r: progress.caption(f"{r.rows:,} rows priced, {r.rows_per_sec:,.0f} rows/s"),
+                    )
+            except ValueError as e:
+                st.error(f":x: {e}")
+                st.stop()
+            progress.empty()
+            st.success(f":money_with_wings: Priced **{report.rows:,}** cars in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s)")
+            if report.invalid_rows:
+                st.warning(f"{report.invalid_rows:,} rows could not be priced; see the `error` column.")
+            st.download_button("Download Priced CSV", output.read_bytes(), file_name=output.name, mime="text/csv", on_click="ignore")
+    st.stop()
 
 
 col1, col2 = st.columns(2)
@@ -55,31 +132,72 @@ with col2:
     enginetype = st.selectbox("Engine Type", options=categorical_choices['enginetype'])
     fuelsystem = st.selectbox("Fuel System", options=categorical_choices['fuelsystem'])
 
+# Base configuration from the form
+input_data = {
+    'brand': brand,
+    'fueltype': fueltype,
+    'aspiration': aspiration,
+    'carbody': carbody,
+    'drivewheel': drivewheel,
+    'enginelocation': enginelocation,
+    'enginetype': enginetype,
+    'fuelsystem': fuelsystem,
+    'wheelbase': wheelbase,
+    'carlength': carlength,
+    'carwidth': carwidth,
+    'curbweight': curbweight,
+    'cylindernumber': cylindernumber,
+    'enginesize': enginesize,
+    'boreratio': boreratio,
+    'horsepower': horsepower,
+    'citympg': citympg,
+    'highwaympg': highwaympg
+}
+
+# Price curves over a range of one feature, for the configuration above
+if mode == "What-if sweep":
+    with timed_import("plotly", __file__):
+        import plotly.express as px
+
+    st.subheader("What-if Sweep")
+    sweep_col1, sweep_col2 = st.columns(2)
+    with sweep_col1:
+        feature = st.selectbox("Feature to sweep", options=SWEEP_FEATURES)
+        across_brands = st.checkbox("Compare every brand")
+    with car_model.acquire() as (pipeline, _):
+        fitted_low, fitted_high = fitted_range(pipeline, feature)
+        with sweep_col2:
+            low, high = st.slider("Range", min_value=fitted_low, max_value=fitted_high, value=(fitted_low, fitted_high))
+            n_points = st.slider("Points", min_value=10, max_value=200, value=60, step=10)
+
+        # The swept columns don't change the curves, so leave them out of the cache key
+        swept = {feature, "brand"} if across_brands else {feature}
+        base_key = tuple(sorted((k, v) for k, v in input_data.items() if k not in swept))
+        start = time.perf_counter()
+        with track("sweep", app="car"):
+            curves = cached_sweep(pipeline, car_model.version, base_key, feature, n_points, low, high, across_brands)
+        elapsed = time.perf_counter() - start
+
+    fig = px.line(
+        curves,
+        x=feature,
+        y="predicted_price",
+        color="brand" if across_brands else None,
+        labels={"predicted_price": "Predicted price ($)"},
+        title=f"Predicted price vs {feature}",
+    )
+    fig.add_vline(x=input_data[feature], line_dash="dot", annotation_text="current")
+    st.plotly_chart(fig, use_container_width=True)
+    st.caption(f"{len(curves):,} configurations priced in one predict call, {elapsed * 1000:.0f} ms (results are cached per configuration)")
+    with st.expander("Sweep data"):
+        st.dataframe(curves)
+    st.stop()
+
 # Predict button
 if st.button("Predict Price", type="primary", use_container_width=True):
     try:
-        input_data = pd.DataFrame({
-            'brand': [brand],
-            'fueltype': [fueltype],
-            'aspiration': [aspiration],
-            'carbody': [carbody],
-            'drivewheel': [drivewheel],
-            'enginelocation': [enginelocation],
-            'enginetype': [enginetype],
-            'fuelsystem': [fuelsystem],
-            'wheelbase': [wheelbase],
-            'carlength': [carlength],
-            'carwidth': [carwidth],
-            'curbweight': [curbweight],
-            'cylindernumber': [cylindernumber],
-            'enginesize': [enginesize],
-            'boreratio': [boreratio],
-            'horsepower': [horsepower],
-            'citympg': [citympg],
-            'highwaympg': [highwaympg]
-        })
-
-        prediction = pipeline.predict(input_data)
-        st.success(f":money_with_wings: Predicted Price: **${prediction[0]:.2f}**")
+        with track("predict", app="car"), car_model.acquire() as (_, predictor):
+            prediction = predictor.predict_one(input_data)
+        st.success(f":money_with_wings: Predicted Price: **${prediction:.2f}**")
     except Exception as e:
         st.error(f":x: Prediction failed: {e}")
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""Price a whole inventory file with the car price pipeline.
+
+    poetry run python "2. Car Price Prediction - Regression/car_price_batch.py" inventory.csv -o priced.csv
+
+The CSV is read in chunks of ``--chunksize`` rows and every chunk is priced
+with one vectorized predict call and appended to the output right away, so
+memory stays bounded whatever the size of the input. Each row is checked
+against the pipeline first: a missing, non-numeric or infinite number, or a category
+the OneHotEncoder has not seen, leaves ``predicted_price`` empty and
+explains why in the ``error`` column instead of failing the whole file.
+Use ``-`` for stdin/stdout.
+"""
+import sys
+from pathlib import Path
+from typing import Callable, TextIO
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common import scoring
+from common.registry import load_artifact
+from common.scoring import BatchReport
+
+PIPELINE_PATH = APP_DIR / "car_price_prediction_pipeline.pkl"
+DEFAULT_CHUNKSIZE = 10_000
+
+
+class CarSchema:
+    """Input columns of the pipeline and the categories its OneHotEncoder accepts."""
+
+    def __init__(self, pipeline):
+        self.columns = list(pipeline.feature_names_in_)
+        self.categories: dict[str, list] = {}
+        for _, transformer, columns in pipeline.named_steps["preprocessor"].transformers_:
+            if transformer.__class__.__name__ == "OneHotEncoder":
+                for column, cats in zip(columns, transformer.categories_):
+                    self.categories[column] = list(cats)
+        self.numeric = [c for c in self.columns if c not in self.categories]
+
+    def clean(self, chunk: pd.DataFrame) -> tuple[pd.DataFrame, pd.Series]:
+        """Model input for ``chunk`` and a per-row error message ('' when the row is valid)."""
+        features = pd.DataFrame(index=chunk.index)
+        errors = pd.Series("", index=chunk.index, dtype=object)
+        for column in self.numeric:
+            values = pd.to_numeric(chunk[column], errors="coerce")
+            # "inf" parses as a number but no model input can be infinite
+            bad = ~np.isfinite(values)
+            errors[bad] += f"{column} is not a finite number; "
+            features[column] = values
+        for column, cats in self.categories.items():
+            # Clean and look up each distinct value once, not every row
+            codes, uniques = pd.factorize(chunk[column])
+            stripped = pd.Index(uniques.astype(str)).str.strip()
+            values = pd.Series(stripped.take(codes), index=chunk.index)
+            bad = ~stripped.isin(cats).take(codes)
+            errors[bad] += f"unknown {column} " + chunk.loc[bad, column].map(repr) + "; "
+            features[column] = values
+        return features[self.columns], errors.str.rstrip("; ")
+
+
+def score_csv(
+    source: str | Path | TextIO,
+    sink: str | Path | TextIO,
+    *,
+    pipeline=None,
+    predict: Callable[[pd.DataFrame], np.ndarray] | None = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    on_chunk: Callable[[BatchReport], None] | None = None,
+) -> BatchReport:
+    """Stream ``source`` to ``sink`` with a price for every row, one chunk at a time."""
+    if pipeline is None:
+        pipeline = load_artifact(PIPELINE_PATH)
+    schema = CarSchema(pipeline)
+    return scoring.score_csv(
+        source,
+        sink,
+        schema.clean,
+        predict or pipeline.predict,
+        columns=schema.columns,
+        target="predicted_price",
+        chunksize=chunksize,
+        on_chunk=on_chunk,
+    )
+
+
+def main() -> int:
+    return scoring.main(
+        score_csv,
+        description=__doc__.split("\n")[0],
+        input_help="Inventory CSV",
+        output_help="Priced CSV",
+        chunksize=DEFAULT_CHUNKSIZE,
+        done="priced",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
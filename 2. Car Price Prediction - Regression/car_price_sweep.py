@@ -0,0 +1,58 @@
+"""What-if sweeps: how the predicted price moves as one feature varies.
+
+The whole grid (every swept value, times every brand when sweeping across
+brands) is built as one DataFrame and priced with a single
+``pipeline.predict`` call:
+
+    curves = sweep(pipeline, base_car, "horsepower", n_points=60, across_brands=True)
+"""
+import numpy as np
+import pandas as pd
+
+SWEEP_FEATURES = ("horsepower", "enginesize", "curbweight")
+
+
+def fitted_range(pipeline, feature: str) -> tuple[float, float]:
+    """Smallest and largest value of ``feature`` seen in training."""
+    scaler = pipeline.named_steps["preprocessor"].named_transformers_["scaler"]
+    index = list(scaler.feature_names_in_).index(feature)
+    return float(scaler.data_min_[index]), float(scaler.data_max_[index])
+
+
+def build_grid(base: dict, feature: str, values: np.ndarray, brands: list[str] | None = None) -> pd.DataFrame:
+    """``base`` repeated once per value (and per brand), with ``feature`` (and ``brand``) varied."""
+    brands = brands or [base.get("brand")]
+    grid = pd.DataFrame([base] * (len(values) * len(brands)))
+    # Brand-major order: each brand's curve is one contiguous block
+    grid[feature] = np.tile(values, len(brands))
+    grid["brand"] = np.repeat(brands, len(values))
+    return grid
+
+
+def sweep(
+    pipeline,
+    base: dict,
+    feature: str,
+    *,
+    n_points: int = 50,
+    low: float | None = None,
+    high: float | None = None,
+    across_brands: bool = False,
+) -> pd.DataFrame:
+    """Predicted price for ``n_points`` values of ``feature`` in ``[low, high]`` (the fitted range by default).
+
+    Returns one row per grid point with ``feature``, ``brand`` and
+    ``predicted_price``.
+    """
+    if feature not in SWEEP_FEATURES:
+        raise ValueError(f"Can only sweep {', '.join(SWEEP_FEATURES)}")
+    fitted_low, fitted_high = fitted_range(pipeline, feature)
+    values = np.linspace(fitted_low if low is None else low, fitted_high if high is None else high, n_points)
+    brands = None
+    if across_brands:
+        encoder = pipeline.named_steps["preprocessor"].named_transformers_["encoder"]
+        brands = list(encoder.categories_[list(encoder.feature_names_in_).index("brand")])
+    grid = build_grid(base, feature, values, brands)
+    grid = grid[list(pipeline.feature_names_in_)]
+    prices = pipeline.predict(grid)
+    return pd.DataFrame({feature: grid[feature].to_numpy(), "brand": grid["brand"].to_numpy(), "predicted_price": prices})
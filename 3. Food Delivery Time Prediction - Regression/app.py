@@ -1,10 +1,25 @@
-import joblib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
 import streamlit as st
 import numpy as np
 import pandas as pd
 
-# Load the model pipeline
-pipeline = joblib.load('food_delivery_time_prediction_model.pkl')
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from delivery_batch import score_csv
+from delivery_features import haversine_km
+from delivery_spatial import fastest_restaurants
+from common.metrics import configure_from_env, track
+from common.reload import watch_model
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
 
 # Function to extract categorical choices from the pipeline
 def extract_categorical_choices_from_pipeline(pipeline):
@@ -19,13 +34,105 @@ def extract_categorical_choices_from_pipeline(pipeline):
 
     return choices
 
+# One prediction per order/vehicle pair before a retrained model is swapped in
+def warm_up_delivery_model(pipeline):
+    choices = extract_categorical_choices_from_pipeline(pipeline)
+    pairs = [(o, v) for o in choices['Type_of_order'] for v in choices['Type_of_vehicle']]
+    samples = pd.DataFrame({
+        'Delivery_person_Age': 30,
+        'Delivery_person_Ratings': 4.6,
+        'Type_of_order': [o for o, _ in pairs],
+        'Type_of_vehicle': [v for _, v in pairs],
+        'Distance': np.linspace(1, 20, len(pairs))
+    })
+    if not np.isfinite(pipeline.predict(samples)).all():
+        raise ValueError("model predicts non-finite delivery times")
+
+# Load the model pipeline; reloaded in the background whenever the pickle is replaced
+delivery_model = watch_model(
+    APP_DIR / 'food_delivery_time_prediction_model.pkl',
+    name="delivery",
+    warm_up=warm_up_delivery_model,
+)
+
 # Load the categorical choices
-categorical_choices = extract_categorical_choices_from_pipeline(pipeline)
+with delivery_model.acquire() as pipeline:
+    categorical_choices = extract_categorical_choices_from_pipeline(pipeline)
 
 # Streamlit app
 st.title(":motor_scooter: Food Delivery Time Prediction")
 st.write("Predict the time taken to deliver food based on various features.")
 st.image("https://t4.ftcdn.net/jpg/03/94/73/73/360_F_394737308_A5IJf7vijvkGWCsiCcNI1kAGWoa5g54h.jpg", use_container_width=True)
+st.caption(f"Model version `{delivery_model.version}`, loaded {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(delivery_model.loaded_at))}")
+
+mode = st.sidebar.radio("Mode", ["Single order", "Batch file", "Nearby restaurants"])
+
+# ETAs for a whole file of orders, chunk by chunk
+if mode == "Batch file":
+    st.header("📦 Batch Scoring")
+    st.write("Upload orders in the `deliverytime.txt` format (restaurant and delivery coordinates, courier age and ratings, order and vehicle type); every order gets a `Distance` and a `predicted_time_min`, and orders that can't be scored get an `error` instead.")
+    uploaded = st.file_uploader("Orders file", type=["csv", "txt"])
+    chunksize = st.number_input("Rows per chunk", min_value=1000, max_value=1000000, value=100000, step=10000)
+    if uploaded is not None and st.button("🚀 Predict Delivery Times", type="primary", use_container_width=True):
+        progress = st.empty()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / f"eta_{Path(uploaded.name).stem}.csv"
+            try:
+                # One model version for the whole file, even if a new one is swapped in meanwhile
+                with track("batch_predict", app="delivery"), delivery_model.acquire() as pipeline:
+                    report = score_csv(
+                        uploaded,
+                        output,
+                        pipeline=pipeline,
+                        chunksize=int(chunksize),
+                        on_chunk=lambda r: progress.caption(f"{r.rows:,} orders scored, {r.rows_per_sec:,.0f} rows/s"),
+                    )
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            progress.empty()
+            st.success(f"⏱️ Scored **{report.rows:,}** orders in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s)")
+            if report.invalid_rows:
+                st.warning(f"{report.invalid_rows:,} orders could not be scored; see the `error` column.")
+            st.download_button("Download ETAs", output.read_bytes(), file_name=output.name, mime="text/csv", on_click="ignore")
+    st.stop()
+
+# Restaurants near a customer, ranked by predicted delivery time
+if mode == "Nearby restaurants":
+    st.header("🗺️ Nearby Restaurants")
+    st.write("Restaurants of `deliverytime.txt` closest to the customer, found with a spatial index and ranked by predicted delivery time.")
+    col1, col2 = st.columns(2)
+    with col1:
+        customer_lat = st.number_input("Customer Latitude", min_value=-90.0, max_value=90.0, value=12.970000, format="%.6f")
+        customer_lon = st.number_input("Customer Longitude", min_value=-180.0, max_value=180.0, value=77.590000, format="%.6f")
+        type_of_order = st.selectbox("Type of Order", options=categorical_choices['Type_of_order'])
+    with col2:
+        delivery_person_age = st.number_input("Delivery Person Age", min_value=15, max_value=70, value=30)
+        delivery_person_ratings = st.slider("Delivery Person Ratings", min_value=1.0, max_value=6.0, value=4.6, step=0.1)
+        type_of_vehicle = st.selectbox("Type of Vehicle", options=categorical_choices['Type_of_vehicle'])
+    search = st.radio("Search", ["Nearest restaurants", "Within a radius"], horizontal=True)
+    if search == "Nearest restaurants":
+        k, radius_km = st.slider("Restaurants", min_value=1, max_value=50, value=10), None
+    else:
+        k, radius_km = None, st.slider("Radius (km)", min_value=1.0, max_value=50.0, value=10.0, step=0.5)
+
+    courier = {
+        'Delivery_person_Age': delivery_person_age,
+        'Delivery_person_Ratings': delivery_person_ratings,
+        'Type_of_vehicle': type_of_vehicle,
+    }
+    with track("nearby_restaurants", app="delivery"), delivery_model.acquire() as pipeline:
+        ranked = fastest_restaurants(
+            customer_lat, customer_lon, courier=courier, order_type=type_of_order, k=k, radius_km=radius_km, pipeline=pipeline
+        )
+    if ranked.empty:
+        st.info("No restaurant within this radius.")
+        st.stop()
+    best = ranked.iloc[0]
+    st.success(f"⏱️ Fastest: **{best['predicted_time_min']:.1f} minutes** from the restaurant {best['distance_km']:.2f} km away")
+    st.dataframe(ranked, use_container_width=True)
+    st.map(pd.concat([ranked[['latitude', 'longitude']], pd.DataFrame({'latitude': [customer_lat], 'longitude': [customer_lon]})]))
+    st.stop()
 
 # Create input form
 st.header("📝 Delivery Information")
@@ -133,18 +240,8 @@ else:
             help="Longitude of the delivery location"
         )
 
-
-    # Calculate distance using Haversine formula
-    def calculate_distance(lat1, lon1, lat2, lon2):
-        R = 6371  # Earth's radius in kilometers
-        d_lat = np.radians(lat2 - lat1)
-        d_lon = np.radians(lon2 - lon1)
-        a = np.sin(d_lat/2)**2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(d_lon/2)**2
-        c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1-a))
-        return R * c
-
-    # Calculate and display distance
-    distance = calculate_distance(restaurant_lat, restaurant_lon, delivery_lat, delivery_lon)
+    # Calculate and display distance (Haversine formula)
+    distance = float(haversine_km(restaurant_lat, restaurant_lon, delivery_lat, delivery_lon))
     st.metric("Calculated Distance", f"{distance:.2f} km")
 
 # Prediction button
@@ -159,7 +256,8 @@ if st.button("🚀 Predict Delivery Time", type="primary", use_container_width=T
     })
     
     # Make prediction
-    prediction = pipeline.predict(input_data)[0]
+    with track("predict", app="delivery"), delivery_model.acquire() as pipeline:
+        prediction = pipeline.predict(input_data)[0]
     
     # Display results
     st.success(f"⏱️ **Predicted Delivery Time: {prediction:.1f} minutes**")
@@ -0,0 +1,96 @@
+"""Predict delivery times for a whole file of orders.
+
+    poetry run python "3. Food Delivery Time Prediction - Regression/delivery_batch.py" orders.csv -o etas.csv
+
+The input has the ``deliverytime.txt`` columns (restaurant and delivery
+coordinates, courier age and ratings, order and vehicle type; other columns
+are passed through). It is read in chunks of ``--chunksize`` rows: for each
+chunk the distances are computed in one vectorized pass, the categories are
+matched to the fitted ones whatever their spacing or case, and all valid
+rows are scored with a single ``pipeline.predict`` before the chunk is
+appended to the output, so memory stays bounded for files of any size. Rows
+that cannot be scored get an empty ``predicted_time_min`` and the reason in
+``error``. Use ``-`` for stdin/stdout.
+"""
+import sys
+from pathlib import Path
+from typing import Callable, TextIO
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common import scoring
+from common.registry import load_artifact
+from common.scoring import BatchReport
+from delivery_features import CATEGORICAL, COORDINATES, FEATURES, NUMERIC, fitted_categories, haversine_km, match_categories
+
+PIPELINE_PATH = APP_DIR / "food_delivery_time_prediction_model.pkl"
+DEFAULT_CHUNKSIZE = 100_000
+REQUIRED_COLUMNS = NUMERIC + COORDINATES + CATEGORICAL
+
+
+def prepare_chunk(chunk: pd.DataFrame, categories: dict[str, list]) -> tuple[pd.DataFrame, pd.Series]:
+    """Model input for ``chunk`` (with ``Distance``) and a per-row error message ('' when valid)."""
+    errors = pd.Series("", index=chunk.index, dtype=object)
+    numbers = {}
+    for column in NUMERIC + COORDINATES:
+        values = pd.to_numeric(chunk[column], errors="coerce").to_numpy(dtype=np.float64)
+        # "inf" parses as a number but no model input can be infinite
+        errors[~np.isfinite(values)] += f"{column} is not a finite number; "
+        numbers[column] = values
+
+    features = pd.DataFrame({column: numbers[column] for column in NUMERIC}, index=chunk.index)
+    for column in CATEGORICAL:
+        features[column], unknown = match_categories(chunk[column], categories[column])
+        errors[unknown] += f"unknown {column} " + chunk.loc[unknown, column].map(repr) + "; "
+    with np.errstate(invalid="ignore"):
+        # Infinite coordinates are already flagged above; their distance is NaN
+        features["Distance"] = haversine_km(*(numbers[column] for column in COORDINATES))
+    errors[~np.isfinite(features["Distance"].to_numpy())] += "Distance could not be computed; "
+    return features[FEATURES], errors.str.rstrip("; ")
+
+
+def score_csv(
+    source: str | Path | TextIO,
+    sink: str | Path | TextIO,
+    *,
+    pipeline=None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    on_chunk: Callable[[BatchReport], None] | None = None,
+) -> BatchReport:
+    """Stream ``source`` to ``sink`` with a predicted delivery time for every order, one chunk at a time."""
+    if pipeline is None:
+        pipeline = load_artifact(PIPELINE_PATH)
+    categories = fitted_categories(pipeline)
+    return scoring.score_csv(
+        source,
+        sink,
+        lambda chunk: prepare_chunk(chunk, categories),
+        pipeline.predict,
+        columns=REQUIRED_COLUMNS,
+        target="predicted_time_min",
+        decimals=1,
+        copy={"Distance": 3},
+        chunksize=chunksize,
+        on_chunk=on_chunk,
+    )
+
+
+def main() -> int:
+    return scoring.main(
+        score_csv,
+        description=__doc__.split("\n")[0],
+        input_help="Orders CSV in the deliverytime.txt schema",
+        output_help="Output CSV",
+        chunksize=DEFAULT_CHUNKSIZE,
+        unit="orders",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,49 @@
+"""Features of the food delivery model, shared by the app, batch scoring, spatial queries and training."""
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_KM = 6371
+
+COORDINATES = [
+    "Restaurant_latitude",
+    "Restaurant_longitude",
+    "Delivery_location_latitude",
+    "Delivery_location_longitude",
+]
+NUMERIC = ["Delivery_person_Age", "Delivery_person_Ratings"]
+CATEGORICAL = ["Type_of_order", "Type_of_vehicle"]
+# Order of the pipeline's input columns
+FEATURES = ["Delivery_person_Age", "Delivery_person_Ratings", "Type_of_order", "Type_of_vehicle", "Distance"]
+TARGET = "Time_taken(min)"
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance in km; works on scalars and on whole arrays at once."""
+    lat1, lon1, lat2, lon2 = (np.asarray(v, dtype=np.float64) for v in (lat1, lon1, lat2, lon2))
+    # Same arithmetic as the app always used, so existing distances are reproduced exactly
+    d_lat = np.radians(lat2 - lat1)
+    d_lon = np.radians(lon2 - lon1)
+    a = np.sin(d_lat / 2) ** 2 + np.cos(np.radians(lat1)) * np.cos(np.radians(lat2)) * np.sin(d_lon / 2) ** 2
+    return EARTH_RADIUS_KM * 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+
+def fitted_categories(pipeline) -> dict[str, list]:
+    """Categories the pipeline's OneHotEncoder was fitted on, per column (with their trailing spaces)."""
+    encoder = pipeline.named_steps["preprocessor"].named_transformers_["encoder"]
+    return {column: list(cats) for column, cats in zip(encoder.feature_names_in_, encoder.categories_)}
+
+
+def match_categories(values: pd.Series, fitted: list) -> tuple[pd.Series, np.ndarray]:
+    """Map raw values ("Snack", " snack ", "Snack ") onto the fitted categories.
+
+    The model was fitted on the raw strings of ``deliverytime.txt``, which
+    carry a trailing space; inputs are compared stripped and case-folded.
+    Returns the mapped values and a mask of the values that matched nothing.
+    """
+    by_clean = {str(c).strip().lower(): c for c in fitted}
+    # Look up each distinct value once, not every row
+    codes, uniques = pd.factorize(values)
+    mapped = pd.Index(uniques.astype(str)).str.strip().str.lower().map(lambda v: by_clean.get(v))
+    matched = pd.Series(np.asarray(mapped, dtype=object).take(codes), index=values.index)
+    unknown = (codes == -1) | matched.isna().to_numpy()
+    return matched, unknown
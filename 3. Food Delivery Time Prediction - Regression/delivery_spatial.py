@@ -0,0 +1,249 @@
+"""Spatial queries over restaurants and couriers, with ETAs from the delivery model.
+
+A ``GeoIndex`` is a ball tree on the haversine metric, so k-nearest and
+radius queries cost O(log N) per query point instead of a distance to every
+point. On top of it:
+
+- ``fastest_restaurants``: restaurants near a customer, ranked by predicted
+  delivery time,
+- ``eta_matrix``: courier x order ETAs for assignment, where only couriers
+  within ``radius_km`` of an order's restaurant are candidates and all
+  candidate pairs are scored with one ``pipeline.predict``.
+
+    poetry run python "3. Food Delivery Time Prediction - Regression/delivery_spatial.py" nearest 12.97 77.59 -k 5
+    poetry run python "3. Food Delivery Time Prediction - Regression/delivery_spatial.py" matrix couriers.csv orders.csv -o eta.csv
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from sklearn.neighbors import BallTree
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.datasets import read_dataset
+from common.registry import load_artifact
+from delivery_features import EARTH_RADIUS_KM, FEATURES, fitted_categories, haversine_km, match_categories
+
+DATASET_PATH = APP_DIR / "deliverytime.txt"
+PIPELINE_PATH = APP_DIR / "food_delivery_time_prediction_model.pkl"
+
+COURIER_COLUMNS = ["latitude", "longitude", "Delivery_person_Age", "Delivery_person_Ratings", "Type_of_vehicle"]
+ORDER_COLUMNS = [
+    "Restaurant_latitude",
+    "Restaurant_longitude",
+    "Delivery_location_latitude",
+    "Delivery_location_longitude",
+    "Type_of_order",
+]
+
+
+class GeoIndex:
+    """Ball tree over (latitude, longitude) points in degrees; distances in km."""
+
+    def __init__(self, latitudes, longitudes):
+        self.points = np.column_stack([latitudes, longitudes]).astype(np.float64)
+        self._tree = BallTree(np.radians(self.points), metric="haversine")
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _query_points(self, latitudes, longitudes) -> np.ndarray:
+        return np.radians(np.column_stack([np.atleast_1d(latitudes), np.atleast_1d(longitudes)]).astype(np.float64))
+
+    def nearest(self, latitudes, longitudes, k: int = 5) -> tuple[np.ndarray, np.ndarray]:
+        """Indices and distances (km) of the ``k`` nearest points to each query point, closest first."""
+        distances, indices = self._tree.query(self._query_points(latitudes, longitudes), k=min(k, len(self)))
+        return indices, distances * EARTH_RADIUS_KM
+
+    def within(self, latitudes, longitudes, radius_km: float) -> tuple[np.ndarray, np.ndarray]:
+        """Per query point, indices and distances (km) of the points within ``radius_km``, closest first."""
+        indices, distances = self._tree.query_radius(
+            self._query_points(latitudes, longitudes),
+            r=radius_km / EARTH_RADIUS_KM,
+            return_distance=True,
+            sort_results=True,
+        )
+        return indices, np.array([d * EARTH_RADIUS_KM for d in distances], dtype=object)
+
+
+@lru_cache(maxsize=1)
+def restaurants() -> pd.DataFrame:
+    """Distinct restaurant locations of ``deliverytime.txt``."""
+    df = read_dataset(DATASET_PATH, columns=["Restaurant_latitude", "Restaurant_longitude"])
+    df.columns = ["latitude", "longitude"]
+    # The file has placeholder zeros and sign-flipped copies of (Indian, so
+    # north/east) coordinates
+    df = df[(df["latitude"].abs() > 1) & (df["longitude"].abs() > 1)].abs()
+    return df.drop_duplicates().reset_index(drop=True)
+
+
+@lru_cache(maxsize=1)
+def restaurant_index() -> GeoIndex:
+    df = restaurants()
+    return GeoIndex(df["latitude"], df["longitude"])
+
+
+def _features(frame: pd.DataFrame, distance: np.ndarray, categories: dict[str, list]) -> pd.DataFrame:
+    frame = frame.assign(Distance=distance)
+    for column in ("Type_of_order", "Type_of_vehicle"):
+        frame[column], unknown = match_categories(frame[column], categories[column])
+        if unknown.any():
+            raise ValueError(f"Unknown {column}: {sorted(set(frame.loc[unknown, column].astype(str)))}")
+    return frame[FEATURES]
+
+
+def fastest_restaurants(
+    latitude: float,
+    longitude: float,
+    *,
+    courier: dict,
+    order_type: str,
+    k: int | None = 10,
+    radius_km: float | None = None,
+    pipeline=None,
+) -> pd.DataFrame:
+    """Restaurants near the customer, sorted by predicted delivery time.
+
+    Candidates are the ``k`` nearest restaurants, or every restaurant within
+    ``radius_km`` when given; ``courier`` holds ``Delivery_person_Age``,
+    ``Delivery_person_Ratings`` and ``Type_of_vehicle``.
+    """
+    pipeline = pipeline if pipeline is not None else load_artifact(PIPELINE_PATH)
+    index = restaurant_index()
+    if radius_km is not None:
+        indices, _ = index.within(latitude, longitude, radius_km)
+        indices = indices[0]
+    else:
+        indices = index.nearest(latitude, longitude, k)[0][0]
+    candidates = restaurants().iloc[indices].reset_index(drop=True)
+    if candidates.empty:
+        return candidates.assign(distance_km=[], predicted_time_min=[])
+
+    distance = haversine_km(candidates["latitude"], candidates["longitude"], latitude, longitude)
+    frame = pd.DataFrame({**courier, "Type_of_order": order_type}, index=candidates.index)
+    minutes = pipeline.predict(_features(frame, distance, fitted_categories(pipeline)))
+    return (
+        candidates.assign(distance_km=distance.round(3), predicted_time_min=minutes.round(1))
+        .sort_values("predicted_time_min", kind="stable")
+        .reset_index(drop=True)
+    )
+
+
+@dataclass
+class EtaMatrix:
+    """Courier x order matrices; NaN where the courier is not a candidate for the order."""
+
+    eta_min: np.ndarray
+    pickup_km: np.ndarray
+    candidate_pairs: int
+
+    def best_courier(self) -> np.ndarray:
+        """Per order, the courier with the lowest ETA (-1 when the order has no candidate)."""
+        has_candidate = ~np.isnan(self.eta_min).all(axis=0)
+        best = np.full(self.eta_min.shape[1], -1)
+        best[has_candidate] = np.nanargmin(self.eta_min[:, has_candidate], axis=0)
+        return best
+
+
+def eta_matrix(couriers: pd.DataFrame, orders: pd.DataFrame, *, radius_km: float = 10.0, pipeline=None) -> EtaMatrix:
+    """ETA of every courier within ``radius_km`` of an order's restaurant, for every order.
+
+    ``couriers`` has ``COURIER_COLUMNS`` (the courier's current position as
+    ``latitude``/``longitude``), ``orders`` has ``ORDER_COLUMNS``. The model's
+    distance is restaurant -> delivery location; the pickup distance is
+    returned separately so the assignment can weigh both.
+    """
+    pipeline = pipeline if pipeline is not None else load_artifact(PIPELINE_PATH)
+    missing = [c for c in COURIER_COLUMNS if c not in couriers] + [c for c in ORDER_COLUMNS if c not in orders]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    # Couriers near each restaurant: only these pairs are scored
+    index = GeoIndex(couriers["latitude"], couriers["longitude"])
+    per_order, per_order_km = index.within(orders["Restaurant_latitude"], orders["Restaurant_longitude"], radius_km)
+    courier_idx = np.concatenate(per_order).astype(np.intp) if len(per_order) else np.empty(0, np.intp)
+    order_idx = np.repeat(np.arange(len(orders)), [len(i) for i in per_order])
+    pickup = np.concatenate(per_order_km).astype(np.float64) if len(per_order) else np.empty(0)
+
+    eta = np.full((len(couriers), len(orders)), np.nan)
+    pickup_km = np.full((len(couriers), len(orders)), np.nan)
+    if courier_idx.size:
+        order_rows = orders.iloc[order_idx].reset_index(drop=True)
+        distance = haversine_km(
+            order_rows["Restaurant_latitude"],
+            order_rows["Restaurant_longitude"],
+            order_rows["Delivery_location_latitude"],
+            order_rows["Delivery_location_longitude"],
+        )
+        pairs = couriers.iloc[courier_idx][COURIER_COLUMNS[2:]].reset_index(drop=True)
+        pairs["Type_of_order"] = order_rows["Type_of_order"]
+        # One predict call for every candidate pair
+        eta[courier_idx, order_idx] = pipeline.predict(_features(pairs, distance, fitted_categories(pipeline)))
+        pickup_km[courier_idx, order_idx] = pickup
+    return EtaMatrix(eta, pickup_km, int(courier_idx.size))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    nearest = commands.add_parser("nearest", help="Restaurants that can reach a customer fastest")
+    nearest.add_argument("latitude", type=float)
+    nearest.add_argument("longitude", type=float)
+    nearest.add_argument("-k", type=int, default=10, help="Number of nearest restaurants to rank")
+    nearest.add_argument("--radius-km", type=float, help="Rank every restaurant within this radius instead")
+    nearest.add_argument("--order-type", default="Meal")
+    nearest.add_argument("--vehicle", default="motorcycle")
+    nearest.add_argument("--age", type=float, default=30)
+    nearest.add_argument("--ratings", type=float, default=4.6)
+
+    matrix = commands.add_parser("matrix", help="Courier x order ETA matrix")
+    matrix.add_argument("couriers", help=f"CSV with {', '.join(COURIER_COLUMNS)}")
+    matrix.add_argument("orders", help=f"CSV with {', '.join(ORDER_COLUMNS)}")
+    matrix.add_argument("-o", "--output", default="-", help="Candidate pairs as CSV ('-' for stdout)")
+    matrix.add_argument("--radius-km", type=float, default=10.0, help="Max courier to restaurant distance")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "nearest":
+            courier = {
+                "Delivery_person_Age": args.age,
+                "Delivery_person_Ratings": args.ratings,
+                "Type_of_vehicle": args.vehicle,
+            }
+            result = fastest_restaurants(
+                args.latitude, args.longitude, courier=courier, order_type=args.order_type, k=args.k,
+                radius_km=args.radius_km,
+            )
+            print(result.to_string(index=False))
+        else:
+            result = eta_matrix(pd.read_csv(args.couriers), pd.read_csv(args.orders), radius_km=args.radius_km)
+            couriers, orders = np.nonzero(~np.isnan(result.eta_min))
+            pd.DataFrame(
+                {
+                    "courier": couriers,
+                    "order": orders,
+                    "pickup_km": result.pickup_km[couriers, orders].round(3),
+                    "predicted_time_min": result.eta_min[couriers, orders].round(1),
+                }
+            ).to_csv(sys.stdout if args.output == "-" else args.output, index=False)
+            print(
+                f"{result.candidate_pairs:,} candidate pairs scored out of {result.eta_min.size:,}",
+                file=sys.stderr,
+            )
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,302 @@
+"""Retrain the food delivery model with a parallel hyperparameter search.
+
+    poetry run python "3. Food Delivery Time Prediction - Regression/delivery_train.py" --trials 32 --budget-seconds 300
+
+The cleaned feature frame of ``deliverytime.txt`` (placeholder coordinates
+dropped, sign-flipped ones folded back, ``Distance`` computed) is cached as an
+Arrow file next to the dataset cache, so later runs skip parsing and
+feature engineering. The preprocessor is fitted once on the training split;
+every trial then fits a LightGBM or XGBoost histogram learner on the encoded
+arrays with early stopping on the validation split, and the trials run in
+parallel across all cores (one thread each). Trials that would start after
+``--budget-seconds`` are skipped.
+
+The winner is written as the same ``preprocessor`` + ``model`` pipeline the
+app loads, swapped in atomically so a running app hot-reloads it, with a
+``.json`` report of the stage and per-trial timings and the test metrics.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+import warnings
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+from joblib import Parallel, delayed
+from sklearn.compose import ColumnTransformer
+from sklearn.metrics import mean_absolute_error, r2_score, root_mean_squared_error
+from sklearn.model_selection import train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import MinMaxScaler, OneHotEncoder
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.datasets import CACHE_DIR, cache_path, read_dataset
+from delivery_features import CATEGORICAL, COORDINATES, FEATURES, NUMERIC, TARGET, haversine_km
+
+DATASET_PATH = APP_DIR / "deliverytime.txt"
+PIPELINE_PATH = APP_DIR / "food_delivery_time_prediction_model.pkl"
+
+# Bump when the cleaning below changes so old feature caches are not reused
+FEATURES_VERSION = 1
+
+MAX_ESTIMATORS = 2000
+EARLY_STOPPING_ROUNDS = 50
+
+
+def feature_frame(path: Path = DATASET_PATH) -> pd.DataFrame:
+    """Cleaned model inputs and target of ``path``, from cache when possible."""
+    key = hashlib.sha256(f"{FEATURES_VERSION}|{cache_path(path).name}".encode()).hexdigest()[:16]
+    target = CACHE_DIR / f"{path.stem}-features-{key}.arrow"
+    if target.exists():
+        return feather.read_table(target, memory_map=True).to_pandas()
+
+    df = read_dataset(path, columns=NUMERIC + COORDINATES + CATEGORICAL + [TARGET]).dropna()
+    # Placeholder zeros put a restaurant in the Gulf of Guinea, and some
+    # coordinates are sign-flipped copies of (Indian, so north/east) ones
+    coordinates = df[COORDINATES].abs()
+    df = df[(coordinates > 1).all(axis=1)]
+    coordinates = coordinates[(coordinates > 1).all(axis=1)]
+    frame = df[NUMERIC + CATEGORICAL + [TARGET]].astype({c: str for c in CATEGORICAL})
+    frame["Distance"] = haversine_km(*(coordinates[c].to_numpy() for c in COORDINATES))
+    frame = frame[FEATURES + [TARGET]].reset_index(drop=True)
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    feather.write_feather(pa.Table.from_pandas(frame, preserve_index=False), tmp, compression="uncompressed")
+    tmp.replace(target)
+    return frame
+
+
+def make_preprocessor() -> ColumnTransformer:
+    # Same transformer names as the shipped pipeline: the app and batch
+    # scoring look up the fitted categories under "encoder"
+    return ColumnTransformer(
+        [
+            ("scaler", MinMaxScaler(), NUMERIC + ["Distance"]),
+            ("encoder", OneHotEncoder(), CATEGORICAL),
+        ]
+    )
+
+
+def sample_params(rng: np.random.Generator) -> tuple[str, dict]:
+    """A random configuration of LightGBM or XGBoost."""
+    if rng.random() < 0.5:
+        return "lightgbm", {
+            "num_leaves": int(rng.integers(15, 256)),
+            "learning_rate": float(10 ** rng.uniform(-2, -0.7)),
+            "min_child_samples": int(rng.integers(5, 100)),
+            "subsample": float(rng.uniform(0.6, 1.0)),
+            "subsample_freq": 1,
+            "colsample_bytree": float(rng.uniform(0.6, 1.0)),
+            "reg_lambda": float(10 ** rng.uniform(-3, 1)),
+        }
+    return "xgboost", {
+        "max_depth": int(rng.integers(3, 11)),
+        "learning_rate": float(10 ** rng.uniform(-2, -0.7)),
+        "min_child_weight": float(10 ** rng.uniform(-1, 1.5)),
+        "subsample": float(rng.uniform(0.6, 1.0)),
+        "colsample_bytree": float(rng.uniform(0.6, 1.0)),
+        "reg_lambda": float(10 ** rng.uniform(-3, 1)),
+    }
+
+
+def make_model(learner: str, params: dict, seed: int):
+    if learner == "lightgbm":
+        from lightgbm import LGBMRegressor
+
+        return LGBMRegressor(n_estimators=MAX_ESTIMATORS, n_jobs=1, random_state=seed, verbose=-1, **params)
+    from xgboost import XGBRegressor
+
+    return XGBRegressor(
+        n_estimators=MAX_ESTIMATORS,
+        tree_method="hist",
+        early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+        eval_metric="rmse",
+        n_jobs=1,
+        random_state=seed,
+        **params,
+    )
+
+
+@dataclass
+class Trial:
+    trial: int
+    learner: str
+    params: dict
+    status: str = "skipped"
+    valid_rmse: float = float("nan")
+    best_iteration: int = 0
+    started_at: float = 0.0
+    seconds: float = 0.0
+
+
+def run_trial(trial: Trial, data: dict[str, np.ndarray], seed: int, start: float, deadline: float | None):
+    """Fit one configuration with early stopping; returns the trial and its model (None when skipped)."""
+    trial.started_at = time.time() - start
+    if deadline is not None and time.time() > deadline:
+        return trial, None
+    began = time.perf_counter()
+    model = make_model(trial.learner, trial.params, seed)
+    if trial.learner == "lightgbm":
+        from lightgbm import early_stopping
+
+        with warnings.catch_warnings():
+            # lightgbm >= 4.7 prefers eval_X/eval_y, which 4.6 does not have
+            warnings.filterwarnings("ignore", message=".*'eval_set' is deprecated")
+            model.fit(
+                data["X_train"], data["y_train"],
+                eval_set=[(data["X_valid"], data["y_valid"])],
+                callbacks=[early_stopping(EARLY_STOPPING_ROUNDS, verbose=False)],
+            )
+        trial.best_iteration = int(model.best_iteration_)
+    else:
+        model.fit(data["X_train"], data["y_train"], eval_set=[(data["X_valid"], data["y_valid"])], verbose=False)
+        trial.best_iteration = int(model.best_iteration) + 1
+    trial.seconds = time.perf_counter() - began
+    trial.valid_rmse = float(root_mean_squared_error(data["y_valid"], model.predict(data["X_valid"])))
+    trial.status = "done"
+    return trial, model
+
+
+@dataclass
+class TrainingReport:
+    dataset_rows: int = 0
+    stages: dict[str, float] = field(default_factory=dict)
+    trials: list[Trial] = field(default_factory=list)
+    best_trial: int | None = None
+    test_metrics: dict[str, float] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2)
+
+
+def train(
+    *,
+    trials: int = 32,
+    n_jobs: int = -1,
+    budget_seconds: float | None = None,
+    seed: int = 42,
+    output: Path = PIPELINE_PATH,
+    on_trial=None,
+) -> TrainingReport:
+    """Run the search and write the winning pipeline to ``output`` and its report next to it."""
+    output = Path(output)
+    # Created up front so a bad path fails before the search, not after it
+    output.parent.mkdir(parents=True, exist_ok=True)
+    report = TrainingReport()
+    start = time.time()
+    deadline = start + budget_seconds if budget_seconds else None
+
+    def stage(name: str, since: float) -> float:
+        now = time.perf_counter()
+        report.stages[name] = round(now - since, 4)
+        return now
+
+    t = time.perf_counter()
+    frame = feature_frame()
+    report.dataset_rows = len(frame)
+    t = stage("load_features", t)
+
+    X, y = frame[FEATURES], frame[TARGET].to_numpy(np.float64)
+    X_train, X_rest, y_train, y_rest = train_test_split(X, y, test_size=0.3, random_state=seed)
+    X_valid, X_test, y_valid, y_test = train_test_split(X_rest, y_rest, test_size=0.5, random_state=seed)
+    # Encoded once for every trial instead of once per trial
+    preprocessor = make_preprocessor().fit(X_train)
+    data = {
+        "X_train": preprocessor.transform(X_train),
+        "y_train": y_train,
+        "X_valid": preprocessor.transform(X_valid),
+        "y_valid": y_valid,
+    }
+    t = stage("preprocess", t)
+
+    rng = np.random.default_rng(seed)
+    candidates = [Trial(i, *sample_params(rng)) for i in range(trials)]
+    best_model, best_rmse = None, float("inf")
+    # Unordered so progress is reported as soon as any trial finishes
+    results = Parallel(n_jobs=n_jobs, return_as="generator_unordered")(
+        delayed(run_trial)(trial, data, seed, start, deadline) for trial in candidates
+    )
+    for trial, model in results:
+        report.trials.append(trial)
+        # Only the best model so far is kept
+        if model is not None and trial.valid_rmse < best_rmse:
+            best_model, best_rmse, report.best_trial = model, trial.valid_rmse, trial.trial
+        if on_trial is not None:
+            on_trial(trial)
+    report.trials.sort(key=lambda trial: trial.trial)
+    if best_model is None:
+        raise RuntimeError("No trial finished within the budget")
+    t = stage("search", t)
+
+    pipeline = Pipeline([("preprocessor", preprocessor), ("model", best_model)])
+    predictions = pipeline.predict(X_test)
+    report.test_metrics = {
+        "rmse": float(root_mean_squared_error(y_test, predictions)),
+        "mae": float(mean_absolute_error(y_test, predictions)),
+        "r2": float(r2_score(y_test, predictions)),
+    }
+    t = stage("evaluate", t)
+
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    joblib.dump(pipeline, tmp)
+    # Atomic swap: a running app never sees a half-written pickle
+    tmp.replace(output)
+    stage("save", t)
+    report.wall_seconds = round(time.time() - start, 4)
+    output.with_suffix(".json").write_text(report.to_json())
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--trials", type=int, default=32, help="Number of configurations to try")
+    parser.add_argument("--jobs", type=int, default=-1, help="Parallel trials (-1 for every core)")
+    parser.add_argument("--budget-seconds", type=float, help="Skip trials that would start after this")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", type=Path, default=PIPELINE_PATH, help="Where to write the pipeline")
+    args = parser.parse_args()
+
+    def progress(trial: Trial) -> None:
+        if trial.status == "done":
+            print(
+                f"trial {trial.trial:>3} {trial.learner:<8} rmse {trial.valid_rmse:.3f} "
+                f"({trial.best_iteration} trees, {trial.seconds:.1f}s)",
+                file=sys.stderr,
+            )
+
+    try:
+        report = train(
+            trials=args.trials, n_jobs=args.jobs, budget_seconds=args.budget_seconds, seed=args.seed,
+            output=args.output, on_trial=progress,
+        )
+    except RuntimeError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    best = report.trials[report.best_trial]
+    skipped = sum(trial.status == "skipped" for trial in report.trials)
+    print(
+        f"best: trial {best.trial} ({best.learner}), test rmse {report.test_metrics['rmse']:.3f}, "
+        f"r2 {report.test_metrics['r2']:.3f}; {len(report.trials) - skipped} trials in {report.wall_seconds:.1f}s"
+        + (f", {skipped} skipped over budget" if skipped else ""),
+        file=sys.stderr,
+    )
+    print(f"wrote {args.output} and {args.output.with_suffix('.json').name}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,29 @@
-import joblib
+import sys
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
 
-# Load the pipeline
-pipeline = joblib.load('iris_flower_classification.pkl')
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.compiled import load_compiled_pipeline
+from common.metrics import configure_from_env, track
+from iris_lookup import SLIDERS, LookupTable
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+# Load the pipeline, compiled to a numpy-only single-row predictor
+predictor = load_compiled_pipeline(APP_DIR / 'iris_flower_classification.pkl')
+
+# Species of every slider position, if built with `iris_lookup.py build` for this model
+@st.cache_resource
+def lookup_table():
+    return LookupTable.load()
+
+lookup = lookup_table()
 
 # Streamlit app
 st.title(":cherry_blossom: Iris Flower Classification")
@@ -14,23 +34,26 @@ st.image("https://content.codecademy.com/programs/machine-learning/k-means/iris.
 col1, col2 = st.columns(2)
 
 with col1:
-    sepal_length = st.slider("Sepal Length (cm)", min_value=4.0, max_value=8.0, value=5.8, step=0.1)
-    sepal_width = st.slider("Sepal Width (cm)", min_value=1.0, max_value=5.0, value=3.0, step=0.1)
+    sepal_length = st.slider("Sepal Length (cm)", *SLIDERS['sepal length (cm)'][:2], value=5.8, step=SLIDERS['sepal length (cm)'][2])
+    sepal_width = st.slider("Sepal Width (cm)", *SLIDERS['sepal width (cm)'][:2], value=3.0, step=SLIDERS['sepal width (cm)'][2])
 
 with col2:
-    petal_length = st.slider("Petal Length (cm)", min_value=0.5, max_value=7.5, value=4.3, step=0.1)
-    petal_width = st.slider("Petal Width (cm)", min_value=0.1, max_value=3.0, value=1.3, step=0.1)
+    petal_length = st.slider("Petal Length (cm)", *SLIDERS['petal length (cm)'][:2], value=4.3, step=SLIDERS['petal length (cm)'][2])
+    petal_width = st.slider("Petal Width (cm)", *SLIDERS['petal width (cm)'][:2], value=1.3, step=SLIDERS['petal width (cm)'][2])
 
 # Predict button
 if st.button("Predict Species", type="primary", use_container_width=True):
-    input_data = pd.DataFrame({
-        'sepal length (cm)': [sepal_length],
-        'sepal width (cm)': [sepal_width],
-        'petal length (cm)': [petal_length],
-        'petal width (cm)': [petal_width]
-    })
-    prediction = pipeline.predict(input_data)
-    species = prediction[0]
+    input_data = {
+        'sepal length (cm)': sepal_length,
+        'sepal width (cm)': sepal_width,
+        'petal length (cm)': petal_length,
+        'petal width (cm)': petal_width
+    }
+    with track("predict", app="iris"):
+        # O(1) table read when the table is there and the input is on the slider grid
+        species = lookup.predict_one(input_data) if lookup is not None else None
+        if species is None:
+            species = predictor.predict_one(input_data)
     
     # Display prediction success
     st.success(f"🎯 Predicted Species: **{species.title()}**")
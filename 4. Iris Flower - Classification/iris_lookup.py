@@ -0,0 +1,158 @@
+"""Precomputed species for every position of the Iris app's sliders.
+
+The four sliders move in 0.1 steps over fixed ranges, so there are only
+41 x 41 x 71 x 30 (about 3.6 million) possible inputs. ``build`` predicts all of
+them once, in batches, and stores the class index of every cell in a uint8
+array (one byte per cell, memory-mapped when loaded), so an interactive
+prediction is an index computation and one array read:
+
+    poetry run python "4. Iris Flower - Classification/iris_lookup.py" build
+    poetry run python "4. Iris Flower - Classification/iris_lookup.py" verify
+
+The table records the version of ``iris_flower_classification.pkl`` it was
+built from; ``LookupTable.load`` refuses a table built from another model, and
+``verify`` re-predicts every cell and checks it matches exactly.
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.profiling import format_bytes
+from common.registry import load_artifact
+from common.reload import file_version
+
+PIPELINE_PATH = APP_DIR / "iris_flower_classification.pkl"
+TABLE_PATH = APP_DIR / "iris_lookup_table.npy"
+BATCH_ROWS = 250_000
+
+# (min, max, step) of each slider, in the pipeline's column order
+SLIDERS = {
+    "sepal length (cm)": (4.0, 8.0, 0.1),
+    "sepal width (cm)": (1.0, 5.0, 0.1),
+    "petal length (cm)": (0.5, 7.5, 0.1),
+    "petal width (cm)": (0.1, 3.0, 0.1),
+}
+
+
+def axes() -> list[np.ndarray]:
+    """Every value each slider can take, rounded like the slider shows it."""
+    return [np.round(np.arange(round((hi - lo) / step) + 1) * step + lo, 10) for lo, hi, step in SLIDERS.values()]
+
+
+def grid_rows(start: int, stop: int) -> pd.DataFrame:
+    """Inputs for the flat (C-order) cells ``start:stop`` of the table."""
+    values = axes()
+    indices = np.unravel_index(np.arange(start, stop), [len(v) for v in values])
+    return pd.DataFrame({name: v[i] for name, v, i in zip(SLIDERS, values, indices)})
+
+
+def predict_grid(pipeline, on_batch=None) -> np.ndarray:
+    """Class index of every cell, predicted in batches of ``BATCH_ROWS``."""
+    classes = list(pipeline.classes_)
+    shape = tuple(len(v) for v in axes())
+    table = np.empty(int(np.prod(shape)), dtype=np.uint8)
+    for start in range(0, table.size, BATCH_ROWS):
+        stop = min(start + BATCH_ROWS, table.size)
+        labels = pipeline.predict(grid_rows(start, stop)[list(pipeline.feature_names_in_)])
+        table[start:stop] = np.searchsorted(classes, labels)
+        if on_batch is not None:
+            on_batch(stop, table.size)
+    return table.reshape(shape)
+
+
+class LookupTable:
+    """Species per slider cell, read from a memory-mapped uint8 array."""
+
+    def __init__(self, table: np.ndarray, classes: list[str]):
+        self.table = table
+        self.classes = classes
+        self._sliders = [(name, lo, step, size) for (name, (lo, _, step)), size in zip(SLIDERS.items(), table.shape)]
+
+    @classmethod
+    def load(cls, path: Path = TABLE_PATH, pipeline_path: Path = PIPELINE_PATH) -> "LookupTable | None":
+        """The table at ``path``, or None when it is missing or was built from another model."""
+        meta_path = path.with_suffix(".json")
+        if not path.exists() or not meta_path.exists():
+            return None
+        meta = json.loads(meta_path.read_text())
+        if meta["model_version"] != file_version(pipeline_path) or meta["sliders"] != {k: list(v) for k, v in SLIDERS.items()}:
+            return None
+        return cls(np.load(path, mmap_mode="r"), meta["classes"])
+
+    def cell(self, row: dict) -> tuple[int, ...] | None:
+        """Table index of ``row``, or None when it is off the slider grid."""
+        # Plain floats: for four values numpy's per-call overhead dominates
+        cell = []
+        for name, lo, step, size in self._sliders:
+            position = (row[name] - lo) / step
+            index = round(position)
+            if abs(position - index) > 1e-6 or not 0 <= index < size:
+                return None
+            cell.append(index)
+        return tuple(cell)
+
+    def predict_one(self, row: dict) -> str | None:
+        """Species of ``row``, or None when it is off the slider grid."""
+        cell = self.cell(row)
+        return None if cell is None else self.classes[self.table[cell]]
+
+
+def build(path: Path = TABLE_PATH, pipeline_path: Path = PIPELINE_PATH, on_batch=None) -> float:
+    """Predict every cell and write the table with its metadata; returns the seconds taken."""
+    start = time.perf_counter()
+    pipeline = load_artifact(pipeline_path)
+    table = predict_grid(pipeline, on_batch)
+    tmp = path.with_name(f"{path.stem}.tmp.npy")
+    np.save(tmp, table)
+    tmp.replace(path)
+    meta = {
+        "model_version": file_version(pipeline_path),
+        "classes": [str(c) for c in pipeline.classes_],
+        "sliders": {k: list(v) for k, v in SLIDERS.items()},
+        "shape": list(table.shape),
+    }
+    path.with_suffix(".json").write_text(json.dumps(meta, indent=2))
+    return time.perf_counter() - start
+
+
+def verify(path: Path = TABLE_PATH, pipeline_path: Path = PIPELINE_PATH, on_batch=None) -> int:
+    """Number of cells whose stored species differs from ``pipeline.predict``; raises if the table is stale."""
+    lookup = LookupTable.load(path, pipeline_path)
+    if lookup is None:
+        raise ValueError(f"{path.name} is missing or was built from another model; run `build` first")
+    expected = predict_grid(load_artifact(pipeline_path), on_batch)
+    return int(np.count_nonzero(expected != lookup.table))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("command", choices=["build", "verify"])
+    args = parser.parse_args()
+
+    def progress(done: int, total: int) -> None:
+        print(f"\r{done:,}/{total:,} cells", end="", file=sys.stderr, flush=True)
+
+    if args.command == "build":
+        seconds = build(on_batch=progress)
+        print(f"\rwrote {TABLE_PATH.name} ({format_bytes(TABLE_PATH.stat().st_size)}) in {seconds:.1f}s", file=sys.stderr)
+        return 0
+    try:
+        mismatches = verify(on_batch=progress)
+    except ValueError as e:
+        print(f"\rerror: {e}", file=sys.stderr)
+        return 1
+    print(f"\r{'ok' if mismatches == 0 else f'{mismatches:,} MISMATCHES'}: table vs {PIPELINE_PATH.name}", file=sys.stderr)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,18 +1,27 @@
-import joblib
+import io
+import sys
+import tempfile
+from pathlib import Path
+
 import pandas as pd
 import streamlit as st
 import altair as alt
-from tensorflow.keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
 
-# Load the model
-model = load_model('model/text_emotions_model.keras')
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.metrics import configure_from_env, track
+from emotions_batch import score_corpus
+from emotions_document import score_documents
+from emotions_model import emotion_model
 
-# Load the tokenizer
-tokenizer = joblib.load('model/tokenizer.pkl')
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
 
-# Load the encoder
-encoder = joblib.load('model/encoder.pkl')
+# TensorFlow and the model load (and warm up) on a background thread while the page renders
+emotions = emotion_model()
 
 # Streamlit app
 st.title("Text Emotions Classification")
@@ -39,16 +48,92 @@ EMOTION_COLORS = {
     "surprise": "#2ecc71",
 }
 
+mode = st.sidebar.radio("Mode", ["Single text", "Document", "Text file"])
+
+# Long texts: every sentence scored, all of them in one batch
+if mode == "Document":
+    st.header("Document Emotions")
+    st.write("Paste an email, a review or any long text. Each sentence is scored on its own (the model only reads 66 tokens at a time), all in one batch, and the document's emotions are the mean of its sentences weighted by their length.")
+    document = st.text_area("Document", height=200)
+    if document.strip():
+        with st.spinner("Loading the model..."):
+            try:
+                emotions.wait()
+            except RuntimeError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+        with track("predict_document", app="text-emotions"):
+            [scored] = score_documents(emotions, [document])
+        top_class, top_prob = scored.top
+        st.markdown(f"### {EMOJI_BY_CLASS.get(top_class, '🔹')} Overall emotion: **{top_class}** — {top_prob * 100:.2f}%")
+        overall = pd.DataFrame({"Class": scored.classes, "Probability (%)": (scored.distribution * 100).round(2)})
+        st.altair_chart(
+            alt.Chart(overall)
+            .mark_bar()
+            .encode(
+                x=alt.X("Probability (%)", type="quantitative"),
+                y=alt.Y("Class", type="nominal", sort="-x"),
+                color=alt.Color("Class", scale=alt.Scale(domain=list(EMOTION_COLORS), range=list(EMOTION_COLORS.values())), legend=None),
+                tooltip=["Class", "Probability (%)"],
+            ),
+            use_container_width=True,
+        )
+        st.subheader(f"Sentences ({len(scored.sentences)})")
+        breakdown = scored.breakdown()
+        breakdown["emotion"] = [f"{EMOJI_BY_CLASS.get(name, '🔹')} {name}" for name in breakdown["emotion"]]
+        breakdown["confidence"] = (breakdown["confidence"] * 100).round(2)
+        st.dataframe(
+            breakdown[["sentence", "emotion", "confidence", "words"]].rename(columns={"confidence": "confidence (%)"}),
+            width='stretch',
+        )
+    st.stop()
+
+# Every line of a file, tokenized and scored in large batches
+if mode == "Text file":
+    st.header("Bulk Scoring")
+    st.write("Upload a text file with one text per line (optionally `;label`, like the training data); every text gets its top `emotion`, its `confidence` and the probability of each emotion. For large corpora, run `emotions_batch.py` from the command line.")
+    uploaded = st.file_uploader("Text file", type=["txt", "csv"])
+    if uploaded is not None and st.button("Score Texts", type="primary", use_container_width=True):
+        progress = st.empty()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / f"{Path(uploaded.name).stem}_emotions.csv"
+            try:
+                with st.spinner("Loading the model..."):
+                    emotions.wait()
+                with track("batch_predict", app="text-emotions"):
+                    report = score_corpus(
+                        io.TextIOWrapper(uploaded, encoding="utf-8"),
+                        output,
+                        model=emotions,
+                        on_chunk=lambda r: progress.caption(f"{r.docs:,} texts scored, {r.docs_per_sec:,.0f} docs/s"),
+                    )
+            except RuntimeError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            progress.empty()
+            st.success(f"Scored **{report.docs:,}** texts in {report.seconds:.2f}s ({report.docs_per_sec:,.0f} docs/s, batch size {report.batch_size})")
+            if report.accuracy is not None:
+                st.metric("Accuracy on the labelled lines", f"{report.accuracy:.2%}")
+            st.download_button("Download emotions", output.read_bytes(), file_name=output.name, mime="text/csv", on_click="ignore")
+    st.stop()
+
 # Input text
 text = st.text_input("Enter a text")
 
 # Predict emotion probabilities
 if text:
-    sequences = tokenizer.texts_to_sequences([text])
-    padded_sequences = pad_sequences(sequences, maxlen=66)
-    prediction = model.predict(padded_sequences, verbose=0)
-    probabilities = prediction[0]
-    class_names = list(encoder.classes_)
+    if not emotions.ready:
+        with st.spinner("Loading the model..."):
+            try:
+                emotions.wait()
+            except RuntimeError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+
+    # Texts seen before are answered from the prediction cache
+    with track("predict", app="text-emotions"):
+        probabilities = emotions.predict(text)
+    class_names = emotions.classes
 
     # Sort emotions by probability descending
     sorted_pairs = sorted(zip(class_names, probabilities), key=lambda x: x[1], reverse=True)
@@ -82,4 +167,10 @@ if text:
         )
         .properties(height=400)
     )
-    st.altair_chart(chart, use_container_width=True)
\ No newline at end of file
+    st.altair_chart(chart, use_container_width=True)
+
+    cache = emotions.cache
+    st.caption(
+        f"{emotions.backend.capitalize()} model. Prediction cache: {len(cache):,}/{cache.maxsize:,} texts, hit rate {cache.hit_rate:.0%} "
+        f"({cache.hits:,} hits, {cache.misses:,} misses)"
+    )
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""Emotions of whole documents, scored sentence by sentence in one batch.
+
+The model only sees ``max_sequence_length`` (66) tokens, so a long email or
+review would lose everything past them. ``score_documents`` splits every
+document into sentences (and sentences longer than the model's window into
+consecutive windows of words), then scores the segments of all documents
+with a single ``EmotionModel.predict_many`` call: one padded batch, and
+segments already in the prediction cache are not scored again. Each
+sentence's distribution is the word-weighted mean of its windows, and each
+document's the word-weighted mean of its sentences:
+
+    [doc] = score_documents(emotion_model(), ["I loved the food. The waiter was rude!"])
+    doc.top, doc.distribution, doc.breakdown()
+"""
+import re
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from emotions_model import EmotionModel, normalize
+
+# A sentence ends at . ! ? or … (possibly followed by a closing quote or
+# bracket) before whitespace, or at a line break; "3.5" and "a.m" stay whole
+SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|(?<=[.!?…][\"')\]])\s+|\s*\n\s*")
+
+
+def split_sentences(text: str) -> list[str]:
+    """Non-empty sentences of ``text``, in order."""
+    return [sentence.strip() for sentence in SENTENCE_END.split(text) if sentence.strip()]
+
+
+@dataclass
+class DocumentScore:
+    sentences: list[str]
+    probabilities: np.ndarray  # (sentences, classes)
+    words: np.ndarray  # words the tokenizer sees in each sentence: its weight
+    distribution: np.ndarray  # (classes,) word-weighted mean over the sentences
+    classes: list[str]
+
+    @property
+    def top(self) -> tuple[str, float]:
+        best = int(self.distribution.argmax())
+        return self.classes[best], float(self.distribution[best])
+
+    def breakdown(self) -> pd.DataFrame:
+        """One row per sentence: its text, top emotion, confidence, weight and class probabilities."""
+        best = self.probabilities.argmax(axis=1)
+        frame = pd.DataFrame({
+            "sentence": self.sentences,
+            "emotion": np.asarray(self.classes)[best],
+            "confidence": self.probabilities[np.arange(len(best)), best],
+            "words": self.words,
+        })
+        for k, label in enumerate(self.classes):
+            frame[f"proba_{label}"] = self.probabilities[:, k]
+        return frame
+
+
+def _weighted_mean(probabilities: np.ndarray, weights: np.ndarray, owners: np.ndarray, groups: int) -> np.ndarray:
+    # Segments without a known word still count, just less than any real one
+    weights = np.maximum(weights, 1e-3)
+    totals = np.zeros((groups, probabilities.shape[1]))
+    np.add.at(totals, owners, probabilities * weights[:, None])
+    return totals / np.bincount(owners, weights=weights, minlength=groups)[:, None]
+
+
+def score_documents(model: EmotionModel, documents: list[str]) -> list[DocumentScore]:
+    """Emotion distribution and per-sentence breakdown of every document, from one batched prediction."""
+    if not documents:
+        return []
+    model.wait()
+    tokenizer = model.tokenizer
+    sentences, sentence_doc = [], []
+    for d, document in enumerate(documents):
+        # A document without sentence punctuation is one sentence (possibly empty)
+        for sentence in split_sentences(document) or [document]:
+            sentences.append(sentence)
+            sentence_doc.append(d)
+
+    segments, segment_words, segment_sentence = [], [], []
+    for s, sentence in enumerate(sentences):
+        words = normalize(sentence, tokenizer.filters, tokenizer.lower, tokenizer.split).split()
+        # One word is at most one token: windows of max_length words are never truncated
+        for start in range(0, max(len(words), 1), model.max_length):
+            window = words[start : start + model.max_length]
+            segments.append(" ".join(window))
+            segment_words.append(len(window))
+            segment_sentence.append(s)
+
+    probabilities = model.predict_many(segments)
+    segment_words = np.asarray(segment_words, dtype=np.float64)
+    segment_sentence = np.asarray(segment_sentence)
+    sentence_probabilities = _weighted_mean(probabilities, segment_words, segment_sentence, len(sentences))
+    sentence_words = np.bincount(segment_sentence, weights=segment_words, minlength=len(sentences))
+    sentence_doc = np.asarray(sentence_doc)
+    distributions = _weighted_mean(sentence_probabilities, sentence_words, sentence_doc, len(documents))
+
+    scores = []
+    for d in range(len(documents)):
+        mask = sentence_doc == d
+        scores.append(
+            DocumentScore(
+                sentences=[sentence for sentence, doc in zip(sentences, sentence_doc) if doc == d],
+                probabilities=sentence_probabilities[mask],
+                words=sentence_words[mask].astype(int),
+                distribution=distributions[d],
+                classes=list(model.classes),
+            )
+        )
+    return scores
@@ -0,0 +1,274 @@
+"""The Text Emotions model, loaded in the background and fronted by an LRU prediction cache.
+
+Importing TensorFlow and loading the Keras model take seconds, and the first
+``model.predict`` builds the graph on top of that. ``emotion_model()`` starts
+all of it on a daemon thread the first time it is called, then runs one
+warm-up prediction, so the page renders right away and the first real text
+does not pay for graph tracing:
+
+    model = emotion_model()       # returns immediately
+    model.wait()                  # blocks until loaded and warmed up
+    probabilities = model.predict("i feel great today")
+
+Predictions are cached in a bounded LRU keyed on the text normalized exactly
+like the tokenizer splits it (case, punctuation and spacing folded), so texts
+the model cannot tell apart share an entry and Streamlit reruns for a text
+already seen skip tokenization and the model. ``EMOTIONS_CACHE_SIZE``
+sets the number of entries (default 4096).
+
+``EMOTIONS_BACKEND=tflite`` serves the quantized export of
+``emotions_tflite.py`` through a TFLite interpreter instead of Keras, and
+tokenizes with the ``tokenizer.json`` exported next to it, so that backend
+needs neither TensorFlow nor Keras.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.metrics import counter
+from common.profiling import timed_import
+from common.registry import load_artifact, load_keras_model
+
+MODEL_DIR = APP_DIR / "model"
+TFLITE_PATH = MODEL_DIR / "text_emotions_model.tflite"
+TOKENIZER_JSON_PATH = MODEL_DIR / "tokenizer.json"
+CACHE_SIZE = int(os.environ.get("EMOTIONS_CACHE_SIZE", 4096))
+BACKEND = os.environ.get("EMOTIONS_BACKEND", "keras")
+
+CACHE_LOOKUPS = counter("prediction_cache_lookups_total", "Prediction cache lookups per app and result", ("app", "result"))
+
+
+def text_to_word_sequence(text: str, filters: str, lower: bool = True, split: str = " ") -> list[str]:
+    """The words the Keras tokenizer sees in ``text``, like ``keras.preprocessing.text.text_to_word_sequence``."""
+    text = str(text).lower() if lower else str(text)
+    text = text.translate(str.maketrans(filters, split * len(filters)))
+    return [word for word in text.split(split) if word]
+
+
+def normalize(text: str, filters: str, lower: bool = True, split: str = " ") -> str:
+    """Cache key of ``text``: the words the Keras tokenizer sees, joined by single spaces."""
+    return " ".join(text_to_word_sequence(text, filters, lower, split))
+
+
+def pad_sequences(sequences: list[list[int]], maxlen: int, out: np.ndarray | None = None) -> np.ndarray:
+    """Keras ``pad_sequences(sequences, maxlen=maxlen)`` in numpy: zeros in front, longer sequences keep their last ``maxlen`` tokens.
+
+    ``out`` is a preallocated ``(rows, maxlen)`` int32 array to fill instead
+    of allocating one; the returned array is a view of its first rows.
+    """
+    padded = np.zeros((len(sequences), maxlen), dtype=np.int32) if out is None else out[: len(sequences)]
+    if out is not None:
+        padded[:] = 0
+    for i, sequence in enumerate(sequences):
+        if sequence:
+            tail = sequence[-maxlen:]
+            padded[i, maxlen - len(tail):] = tail
+    return padded
+
+
+class WordIndexTokenizer:
+    """The part of a fitted Keras ``Tokenizer`` that ``texts_to_sequences`` needs, stored as JSON."""
+
+    def __init__(self, word_index: dict[str, int], filters: str, lower: bool = True, split: str = " ", num_words: int | None = None, oov_token: str | None = None):
+        self.word_index = word_index
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.num_words = num_words
+        self.oov_token = oov_token
+
+    @classmethod
+    def from_keras(cls, tokenizer) -> "WordIndexTokenizer":
+        if tokenizer.char_level:
+            raise ValueError("Character-level tokenizers are not supported")
+        return cls(dict(tokenizer.word_index), tokenizer.filters, tokenizer.lower, tokenizer.split, tokenizer.num_words, tokenizer.oov_token)
+
+    @classmethod
+    def load(cls, path: Path) -> "WordIndexTokenizer":
+        return cls(**json.loads(Path(path).read_text()))
+
+    def save(self, path: Path) -> None:
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(vars(self)))
+        tmp.replace(path)
+
+    def texts_to_sequences(self, texts: list[str]) -> list[list[int]]:
+        """Token ids of every text, exactly like ``Tokenizer.texts_to_sequences``."""
+        oov = self.word_index.get(self.oov_token) if self.oov_token is not None else None
+        sequences = []
+        for text in texts:
+            sequence = []
+            for word in text_to_word_sequence(text, self.filters, self.lower, self.split):
+                i = self.word_index.get(word)
+                # Words outside the vocabulary (or past num_words) become the OOV token, or are dropped
+                if i is None or (self.num_words and i >= self.num_words):
+                    i = oov
+                if i is not None:
+                    sequence.append(i)
+            sequences.append(sequence)
+        return sequences
+
+
+class PredictionCache:
+    """Thread-safe LRU of prediction arrays with hit-rate statistics."""
+
+    def __init__(self, maxsize: int = CACHE_SIZE, app: str = "text-emotions"):
+        self.maxsize = maxsize
+        self.app = app
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: str) -> np.ndarray | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        CACHE_LOOKUPS.inc(app=self.app, result="miss" if value is None else "hit")
+        return value
+
+    def put(self, key: str, value: np.ndarray) -> None:
+        # Shared between sessions: nobody may modify a cached array in place
+        value.flags.writeable = False
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+class EmotionModel:
+    """Classifier (Keras or TFLite), tokenizer and label encoder, loaded on a background thread."""
+
+    def __init__(self, model_dir: Path = MODEL_DIR, cache_size: int = CACHE_SIZE, backend: str = BACKEND):
+        if backend not in ("keras", "tflite"):
+            raise ValueError(f"Unknown backend {backend!r}")
+        self.model_dir = Path(model_dir)
+        self.backend = backend
+        self.cache = PredictionCache(cache_size)
+        metadata = json.loads((self.model_dir / "metadata.json").read_text())
+        self.max_length = metadata["max_sequence_length"]
+        self.classes: list[str] = list(metadata["classes"])
+        self.load_seconds = 0.0
+        self.warm_up_seconds = 0.0
+        self._ready = threading.Event()
+        self._error: BaseException | None = None
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+
+    def start(self) -> "EmotionModel":
+        """Start loading in the background (once)."""
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._load, name="emotions-model-loader", daemon=True)
+                self._thread.start()
+        return self
+
+    def _load(self) -> None:
+        try:
+            start = time.perf_counter()
+            if self.backend == "tflite":
+                from emotions_tflite import TFLiteClassifier
+
+                self._classify = TFLiteClassifier(self.model_dir / TFLITE_PATH.name)
+                # tokenizer.pkl would need Keras to unpickle
+                self.tokenizer = WordIndexTokenizer.load(self.model_dir / TOKENIZER_JSON_PATH.name)
+            else:
+                with timed_import("tensorflow", __file__):
+                    model = load_keras_model(self.model_dir / "text_emotions_model.keras")
+                self._classify = lambda padded, batch_size: model.predict(padded, batch_size=batch_size, verbose=0)
+                self.tokenizer = load_artifact(self.model_dir / "tokenizer.pkl")
+            self.classes = list(load_artifact(self.model_dir / "encoder.pkl").classes_)
+            self.load_seconds = time.perf_counter() - start
+
+            # The first predict traces the graph: pay for it here, not on the first text
+            start = time.perf_counter()
+            self._predict_batch(["warm up"])
+            self.warm_up_seconds = time.perf_counter() - start
+        except BaseException as e:  # Surfaced to callers by wait()
+            self._error = e
+        finally:
+            self._ready.set()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set() and self._error is None
+
+    def wait(self, timeout: float | None = None) -> None:
+        """Block until the model is loaded and warmed up; re-raise a loading failure."""
+        self.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("The emotions model is still loading")
+        if self._error is not None:
+            raise RuntimeError(f"Could not load the emotions model: {self._error}") from self._error
+
+    def _predict_batch(self, texts: list[str]) -> np.ndarray:
+        return self._classify(pad_sequences(self.tokenizer.texts_to_sequences(texts), self.max_length), len(texts))
+
+    def classify(self, padded: np.ndarray, batch_size: int | None = None) -> np.ndarray:
+        """Class probabilities of already padded sequences, ``batch_size`` per forward pass; bypasses the cache."""
+        self.wait()
+        return self._classify(padded, batch_size or len(padded))
+
+    def predict_many(self, texts: list[str]) -> np.ndarray:
+        """Class probabilities of every text; only the cache misses go through the model, in one batch."""
+        self.wait()
+        tokenizer = self.tokenizer
+        keys = [normalize(text, tokenizer.filters, tokenizer.lower, tokenizer.split) for text in texts]
+        results: list[np.ndarray | None] = [self.cache.get(key) for key in keys]
+        # Distinct misses only: the same text twice in a batch is predicted once
+        missing: dict[str, list[int]] = {}
+        for i, (key, result) in enumerate(zip(keys, results)):
+            if result is None:
+                missing.setdefault(key, []).append(i)
+        if missing:
+            probabilities = self._predict_batch([texts[indices[0]] for indices in missing.values()])
+            for (key, indices), p in zip(missing.items(), probabilities):
+                self.cache.put(key, p)
+                for i in indices:
+                    results[i] = p
+        return np.stack(results)
+
+    def predict(self, text: str) -> np.ndarray:
+        """Class probabilities of ``text``, in the order of ``classes``."""
+        return self.predict_many([text])[0]
+
+
+_model: EmotionModel | None = None
+_model_lock = threading.Lock()
+
+
+def emotion_model() -> EmotionModel:
+    """The process-wide model, loading in the background from the first call."""
+    global _model
+    with _model_lock:
+        if _model is None:
+            _model = EmotionModel()
+        return _model.start()
@@ -0,0 +1,200 @@
+"""Quantized TFLite export and runtime for the Text Emotions model.
+
+    poetry run python "5. Text Emotions - Classification/emotions_tflite.py" --quantization dynamic
+
+converts ``model/text_emotions_model.keras`` to ``model/text_emotions_model.tflite``
+(``dynamic``: int8 weights, float activations; ``int8``: int8 weights and
+activations, calibrated on ``data/train.txt``; ``float16``; or ``none``) with
+builtin ops only, so the standalone runtimes can run it, and writes the
+tokenizer's vocabulary and settings to ``model/tokenizer.json`` for the
+TFLite backend, which does not load Keras. It then scores ``data/test.txt``
+with both models and writes ``model/text_emotions_model.tflite.json`` with
+their accuracy next to the ``test_metrics`` of ``metadata.json``, single-text
+and batch latency, and the size of both files. The app switches to the
+TFLite model with ``EMOTIONS_BACKEND=tflite``.
+
+``TFLiteClassifier`` runs the exported file with the standalone LiteRT /
+``tflite_runtime`` interpreter when installed, else ``tf.lite.Interpreter``; one
+``invoke`` costs a fraction of a Keras ``model.predict`` call.
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.profiling import format_bytes
+from common.registry import load_artifact, load_keras_model
+from emotions_model import MODEL_DIR, TFLITE_PATH, TOKENIZER_JSON_PATH, WordIndexTokenizer, pad_sequences
+
+KERAS_PATH = MODEL_DIR / "text_emotions_model.keras"
+DATA_DIR = APP_DIR / "data"
+QUANTIZATIONS = ("dynamic", "int8", "float16", "none")
+
+
+def _interpreter_class():
+    # The standalone runtimes are a few MB instead of all of TensorFlow
+    try:
+        from ai_edge_litert.interpreter import Interpreter
+    except ImportError:
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+    return Interpreter
+
+
+class TFLiteClassifier:
+    """``model.predict`` replacement backed by a TFLite interpreter."""
+
+    def __init__(self, path: Path = TFLITE_PATH, num_threads: int | None = None):
+        self.path = Path(path)
+        self._interpreter = _interpreter_class()(model_path=str(self.path), num_threads=num_threads)
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._batch_size = None
+        # An interpreter holds its tensors: one invocation at a time
+        self._lock = threading.Lock()
+
+    def __call__(self, padded: np.ndarray, batch_size: int | None = None) -> np.ndarray:
+        """Class probabilities for padded sequences, ``batch_size`` per invocation (default: all)."""
+        if batch_size and len(padded) > batch_size:
+            return np.concatenate([self(padded[i : i + batch_size]) for i in range(0, len(padded), batch_size)])
+        with self._lock:
+            if padded.shape[0] != self._batch_size:
+                self._interpreter.resize_tensor_input(self._input["index"], list(padded.shape))
+                self._interpreter.allocate_tensors()
+                self._batch_size = padded.shape[0]
+            self._interpreter.set_tensor(self._input["index"], padded.astype(self._input["dtype"]))
+            self._interpreter.invoke()
+            output = self._interpreter.get_tensor(self._output["index"]).copy()
+        scale, zero_point = self._output["quantization"]
+        if scale:
+            output = (output.astype(np.float32) - zero_point) * scale
+        return output
+
+
+def read_texts(path: Path) -> tuple[list[str], list[str]]:
+    """Texts and labels of a ``text;label`` file."""
+    texts, labels = [], []
+    for line in path.read_text().splitlines():
+        if line:
+            text, label = line.rsplit(";", 1)
+            texts.append(text)
+            labels.append(label)
+    return texts, labels
+
+
+def export(quantization: str = "dynamic", output: Path = TFLITE_PATH) -> Path:
+    """Convert the Keras model to TFLite with ``quantization`` and write it to ``output``, ``tokenizer.json`` next to it."""
+    import tensorflow as tf
+
+    model = load_keras_model(KERAS_PATH)
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    if quantization != "none":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    if quantization == "int8":
+        tokenizer = load_artifact(MODEL_DIR / "tokenizer.pkl")
+        max_length = model.input_shape[1]
+        texts, _ = read_texts(DATA_DIR / "train.txt")
+        calibration = pad_sequences(tokenizer.texts_to_sequences(texts[:500]), max_length)
+        input_dtype = tf.as_dtype(model.inputs[0].dtype).as_numpy_dtype
+
+        def representative_dataset():
+            for row in calibration:
+                yield [row[None, :].astype(input_dtype)]
+
+        converter.representative_dataset = representative_dataset
+    flatbuffer = converter.convert()
+    tmp = output.with_name(f"{output.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(flatbuffer)
+    # Atomic swap: a running app never sees a half-written model
+    tmp.replace(output)
+    WordIndexTokenizer.from_keras(load_artifact(MODEL_DIR / "tokenizer.pkl")).save(output.with_name(TOKENIZER_JSON_PATH.name))
+    return output
+
+
+def _latency_ms(predict, padded: np.ndarray, repeats: int) -> dict[str, float]:
+    predict(padded)  # Warm-up, not timed
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        predict(padded)
+        times.append((time.perf_counter() - start) * 1000)
+    return {"p50": float(np.percentile(times, 50)), "p95": float(np.percentile(times, 95))}
+
+
+def evaluate(tflite_path: Path = TFLITE_PATH, repeats: int = 200) -> dict:
+    """Accuracy on ``data/test.txt``, latency and size of the Keras and TFLite models."""
+    metadata = json.loads((MODEL_DIR / "metadata.json").read_text())
+    tokenizer = load_artifact(MODEL_DIR / "tokenizer.pkl")
+    classes = list(load_artifact(MODEL_DIR / "encoder.pkl").classes_)
+    texts, labels = read_texts(DATA_DIR / "test.txt")
+    padded = pad_sequences(tokenizer.texts_to_sequences(texts), metadata["max_sequence_length"])
+    expected = np.array([classes.index(label) for label in labels])
+
+    model = load_keras_model(KERAS_PATH)
+    backends = {
+        "keras": (lambda x: model.predict(x, batch_size=len(x), verbose=0), KERAS_PATH),
+        "tflite": (TFLiteClassifier(tflite_path), tflite_path),
+    }
+    report = {
+        # Measured by the notebook on its own split of train.txt
+        "metadata_test_metrics": metadata["test_metrics"],
+        "test_file": str(Path(DATA_DIR.name) / "test.txt"),
+        "test_rows": len(texts),
+    }
+    predictions = {}
+    for name, (predict, path) in backends.items():
+        start = time.perf_counter()
+        probabilities = predict(padded)
+        batch_seconds = time.perf_counter() - start
+        predictions[name] = probabilities.argmax(axis=1)
+        report[name] = {
+            "accuracy": float((predictions[name] == expected).mean()),
+            "single_text_latency_ms": _latency_ms(predict, padded[:1], repeats),
+            "batch_texts_per_sec": float(len(texts) / batch_seconds),
+            "file_bytes": path.stat().st_size,
+        }
+    report["agreement"] = float((predictions["keras"] == predictions["tflite"]).mean())
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--quantization", choices=QUANTIZATIONS, default="dynamic")
+    parser.add_argument("--repeats", type=int, default=200, help="Single-text latency samples")
+    args = parser.parse_args()
+
+    path = export(args.quantization)
+    report = {"quantization": args.quantization, **evaluate(path, args.repeats)}
+    report_path = path.with_name(f"{path.name}.json")
+    report_path.write_text(json.dumps(report, indent=2))
+
+    print(f"notebook test accuracy {report['metadata_test_metrics']['accuracy']:.4f} (metadata.json)")
+    for name in ("keras", "tflite"):
+        r = report[name]
+        print(
+            f"{name:<7} accuracy {r['accuracy']:.4f} on {report['test_file']}, "
+            f"p50 {r['single_text_latency_ms']['p50']:.2f} ms/text, {r['batch_texts_per_sec']:,.0f} texts/s batched, "
+            f"{format_bytes(r['file_bytes'])}"
+        )
+    print(f"predictions agree on {report['agreement']:.2%} of texts; wrote {path.name} and {report_path.name}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
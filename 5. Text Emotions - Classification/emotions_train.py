@@ -0,0 +1,308 @@
+"""Retrain the Text Emotions model from cached, memory-mapped token sequences.
+
+    poetry run python "5. Text Emotions - Classification/emotions_train.py" --epochs 10
+
+The tokenizer, label encoder and ``max_sequence_length`` are fitted once on
+``data/train.txt`` (streamed in chunks) and cached, keyed by the SHA-256 of
+the file. Each split (``train``, ``val``, ``test``) is then tokenized once
+into a memory-mapped ``(rows, max_sequence_length)`` int32 ``.npy`` array
+with an int8 label array next to it under the dataset cache, keyed by a hash
+of the tokenizer and of the split file, so later runs and later epochs never
+tokenize again. Training reads them through ``tf.data``: a reshuffled stream
+of row indices, batched, gathered from the memory maps in one fancy-index
+per batch and prefetched, so the GPU/CPU running the model is not kept
+waiting on Python preprocessing. The report records how long one pass of the
+input pipeline takes on its own next to every epoch.
+
+The model has the notebook's architecture (``val.txt`` replaces its random
+validation split). ``text_emotions_model.keras``, ``tokenizer.pkl``,
+``encoder.pkl`` and ``metadata.json`` are written exactly as the app loads
+them (``test_metrics`` now measured on ``data/test.txt``), each swapped in
+atomically, with ``training_report.json`` next to them. Re-run
+``emotions_tflite.py`` afterwards to refresh a TFLite export.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.preprocessing import LabelEncoder
+
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.datasets import CACHE_DIR
+from common.profiling import timed_import
+from common.reload import file_version
+from emotions_batch import read_chunks
+from emotions_model import MODEL_DIR, normalize, pad_sequences
+
+DATA_DIR = APP_DIR / "data"
+SPLITS = ("train", "val", "test")
+CHUNK_LINES = 10_000
+
+# Bump when tokenization below changes so old caches are not reused
+SEQUENCES_VERSION = 1
+
+
+def _count_lines(path: Path) -> int:
+    # Same lines as read_chunks: every non-empty one
+    with open(path, encoding="utf-8") as f:
+        return sum(1 for line in f if line.rstrip("\r\n"))
+
+
+def _labelled_chunks(path: Path, classes: list[str]):
+    with open(path, encoding="utf-8") as f:
+        for texts, labels in read_chunks(f, CHUNK_LINES, classes):
+            if "" in labels:
+                raise ValueError(f"{path.name}: no known label on {texts[labels.index('')]!r}")
+            yield texts, labels
+
+
+def _atomic_dump(value, target: Path) -> None:
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    joblib.dump(value, tmp)
+    tmp.replace(target)
+
+
+def fit_vocabulary(path: Path = DATA_DIR / "train.txt"):
+    """Tokenizer, label encoder and longest sequence of ``path``, from cache when possible."""
+    key = hashlib.sha256(f"{SEQUENCES_VERSION}|{file_version(path)}".encode()).hexdigest()[:16]
+    target = CACHE_DIR / f"emotions-vocabulary-{key}.pkl"
+    if target.exists():
+        return joblib.load(target)
+
+    with timed_import("tensorflow", __file__):
+        from tensorflow.keras.preprocessing.text import Tokenizer
+
+    labels = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.rstrip("\r\n"):
+                labels.append(line.rstrip("\r\n").rpartition(";")[2])
+    encoder = LabelEncoder().fit(labels)
+    classes = [str(c) for c in encoder.classes_]
+
+    tokenizer, max_length = Tokenizer(), 0
+    for texts, _ in _labelled_chunks(path, classes):
+        tokenizer.fit_on_texts(texts)
+        # Every training word is in the vocabulary: one word is one token
+        max_length = max(max_length, *(len(normalize(t, tokenizer.filters, tokenizer.lower, tokenizer.split).split()) for t in texts))
+
+    vocabulary = (tokenizer, encoder, max_length)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    _atomic_dump(vocabulary, target)
+    return vocabulary
+
+
+def encode_split(path: Path, tokenizer, encoder, max_length: int) -> tuple[np.ndarray, np.ndarray, bool]:
+    """Memory-mapped padded sequences and label indices of ``path``, and whether they came from cache."""
+    fingerprint = hashlib.sha256(tokenizer.to_json().encode()).hexdigest()
+    key = hashlib.sha256(f"{SEQUENCES_VERSION}|{fingerprint}|{max_length}|{file_version(path)}".encode()).hexdigest()[:16]
+    sequences_path = CACHE_DIR / f"emotions-{path.stem}-sequences-{key}.npy"
+    labels_path = CACHE_DIR / f"emotions-{path.stem}-labels-{key}.npy"
+    if sequences_path.exists() and labels_path.exists():
+        return np.load(sequences_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r"), True
+
+    rows = _count_lines(path)
+    classes = list(encoder.classes_)
+    sequences_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_sequences = sequences_path.with_name(f"{sequences_path.stem}.{os.getpid()}.tmp.npy")
+    tmp_labels = labels_path.with_name(f"{labels_path.stem}.{os.getpid()}.tmp.npy")
+    sequences = np.lib.format.open_memmap(tmp_sequences, mode="w+", dtype=np.int32, shape=(rows, max_length))
+    labels = np.lib.format.open_memmap(tmp_labels, mode="w+", dtype=np.int8, shape=(rows,))
+    start = 0
+    # One chunk of text in memory at a time; padded straight into the memory map
+    for texts, chunk_labels in _labelled_chunks(path, classes):
+        stop = start + len(texts)
+        pad_sequences(tokenizer.texts_to_sequences(texts), max_length, out=sequences[start:stop])
+        labels[start:stop] = encoder.transform(chunk_labels)
+        start = stop
+    sequences.flush()
+    labels.flush()
+    del sequences, labels
+    tmp_sequences.replace(sequences_path)
+    tmp_labels.replace(labels_path)
+    return np.load(sequences_path, mmap_mode="r"), np.load(labels_path, mmap_mode="r"), False
+
+
+def make_dataset(sequences: np.ndarray, labels: np.ndarray, batch_size: int, *, shuffle: bool, seed: int = 42):
+    """``tf.data`` pipeline of ``(sequences, labels)`` batches gathered from the memory maps."""
+    import tensorflow as tf
+
+    max_length = sequences.shape[1]
+
+    def gather(rows: np.ndarray):
+        # Sorted rows read the memory map front to back; order within a batch is irrelevant
+        rows = np.sort(rows)
+        return sequences[rows], labels[rows]
+
+    def load(rows):
+        x, y = tf.numpy_function(gather, [rows], (tf.int32, tf.int8))
+        x.set_shape((None, max_length))
+        y.set_shape((None,))
+        return x, y
+
+    indices = tf.data.Dataset.range(len(sequences))
+    if shuffle:
+        indices = indices.shuffle(len(sequences), seed=seed, reshuffle_each_iteration=True)
+    return indices.batch(batch_size).map(load, num_parallel_calls=tf.data.AUTOTUNE).prefetch(tf.data.AUTOTUNE)
+
+
+def build_model(vocabulary_size: int, max_length: int, n_classes: int):
+    """The notebook's Embedding -> LSTM -> Dense network."""
+    from tensorflow.keras.layers import LSTM, Dense, Dropout, Embedding, Input
+    from tensorflow.keras.models import Sequential
+
+    model = Sequential([
+        Input(shape=(max_length,), dtype="int32"),
+        Embedding(input_dim=vocabulary_size, output_dim=128),
+        LSTM(64, dropout=0.2, recurrent_dropout=0.2),
+        Dense(64, activation="relu"),
+        Dropout(0.4),
+        Dense(n_classes, activation="softmax"),
+    ])
+    # Integer labels straight from the cache instead of one-hot copies
+    model.compile(optimizer="adam", loss="sparse_categorical_crossentropy", metrics=["accuracy"])
+    return model
+
+
+@dataclass
+class TrainingReport:
+    rows: dict[str, int] = field(default_factory=dict)
+    cached: dict[str, bool] = field(default_factory=dict)
+    stages: dict[str, float] = field(default_factory=dict)
+    input_pipeline_seconds: float = 0.0  # One pass over the training batches without the model
+    epochs: list[dict[str, float]] = field(default_factory=list)
+    train_metrics: dict[str, float] = field(default_factory=dict)
+    test_metrics: dict[str, float] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), indent=2)
+
+
+def train(
+    *,
+    epochs: int = 10,
+    batch_size: int = 128,
+    seed: int = 42,
+    output_dir: Path = MODEL_DIR,
+    on_epoch=None,
+) -> TrainingReport:
+    """Train on the cached sequences and write the app's four artefacts and a report to ``output_dir``."""
+    report = TrainingReport()
+    start = time.perf_counter()
+
+    def stage(name: str, since: float) -> float:
+        now = time.perf_counter()
+        report.stages[name] = round(now - since, 4)
+        return now
+
+    t = time.perf_counter()
+    tokenizer, encoder, max_length = fit_vocabulary()
+    t = stage("vocabulary", t)
+    data = {}
+    for split in SPLITS:
+        sequences, labels, report.cached[split] = encode_split(DATA_DIR / f"{split}.txt", tokenizer, encoder, max_length)
+        data[split] = (sequences, labels)
+        report.rows[split] = len(sequences)
+    t = stage("encode", t)
+
+    with timed_import("tensorflow", __file__):
+        import tensorflow as tf
+
+    tf.random.set_seed(seed)
+    train_data = make_dataset(*data["train"], batch_size, shuffle=True, seed=seed)
+    val_data = make_dataset(*data["val"], batch_size, shuffle=False)
+    began = time.perf_counter()
+    for _ in train_data:
+        pass
+    report.input_pipeline_seconds = round(time.perf_counter() - began, 4)
+
+    class EpochLog(tf.keras.callbacks.Callback):
+        def on_epoch_begin(self, epoch, logs=None):
+            self.began = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            entry = {"epoch": epoch + 1, "seconds": round(time.perf_counter() - self.began, 4)}
+            entry.update({name: float(value) for name, value in (logs or {}).items()})
+            report.epochs.append(entry)
+            if on_epoch is not None:
+                on_epoch(entry)
+
+    vocabulary_size = len(tokenizer.word_index) + 1
+    model = build_model(vocabulary_size, max_length, len(encoder.classes_))
+    t = stage("prepare", t)
+    model.fit(train_data, validation_data=val_data, epochs=epochs, callbacks=[EpochLog()], verbose=0)
+    t = stage("fit", t)
+
+    for split, metrics in (("train", report.train_metrics), ("test", report.test_metrics)):
+        loss, accuracy = model.evaluate(make_dataset(*data[split], 1024, shuffle=False), verbose=0)
+        metrics.update(loss=float(loss), accuracy=float(accuracy))
+    t = stage("evaluate", t)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    # Keras picks the format from the suffix, so the temporary file keeps it
+    tmp = output_dir / f"text_emotions_model.{os.getpid()}.tmp.keras"
+    model.save(tmp)
+    tmp.replace(output_dir / "text_emotions_model.keras")
+    _atomic_dump(tokenizer, output_dir / "tokenizer.pkl")
+    _atomic_dump(encoder, output_dir / "encoder.pkl")
+    metadata = {
+        "max_sequence_length": int(max_length),
+        "vocabulary_size": int(vocabulary_size),
+        "classes": [str(c) for c in encoder.classes_],
+        "train_metrics": report.train_metrics,
+        "test_metrics": report.test_metrics,
+    }
+    tmp = output_dir / f"metadata.json.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(metadata, indent=2))
+    tmp.replace(output_dir / "metadata.json")
+    stage("save", t)
+    report.wall_seconds = round(time.perf_counter() - start, 4)
+    (output_dir / "training_report.json").write_text(report.to_json())
+    return report
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output-dir", type=Path, default=MODEL_DIR, help="Where to write the artefacts")
+    args = parser.parse_args()
+
+    def progress(entry: dict) -> None:
+        print(
+            f"epoch {entry['epoch']:>2}: {entry['seconds']:.1f}s, loss {entry['loss']:.4f}, "
+            f"accuracy {entry['accuracy']:.4f}, val accuracy {entry.get('val_accuracy', float('nan')):.4f}",
+            file=sys.stderr,
+        )
+
+    try:
+        report = train(epochs=args.epochs, batch_size=args.batch_size, seed=args.seed, output_dir=args.output_dir, on_epoch=progress)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    cached = ", ".join(f"{split} {'cached' if hit else 'tokenized'}" for split, hit in report.cached.items())
+    print(
+        f"sequences: {cached} in {report.stages['encode']:.2f}s; input pipeline {report.input_pipeline_seconds:.2f}s per epoch; "
+        f"test accuracy {report.test_metrics['accuracy']:.4f}; {report.wall_seconds:.1f}s total",
+        file=sys.stderr,
+    )
+    print(f"wrote the model, tokenizer, encoder, metadata and training_report.json to {args.output_dir}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,9 +1,23 @@
-import joblib
+import sys
+import tempfile
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
 
-# Load the pipeline
-pipeline = joblib.load('mobile_price_classification.pkl')
+APP_DIR = Path(__file__).resolve().parent
+for _path in (APP_DIR, APP_DIR.parent):
+    if str(_path) not in sys.path:
+        sys.path.insert(0, str(_path))
+
+from common.compiled import load_compiled_pipeline
+from common.metrics import configure_from_env, track
+from mobile_catalog import classify_catalog
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+# Load the pipeline, compiled to a numpy-only single-row predictor
+predictor = load_compiled_pipeline(APP_DIR / 'mobile_price_classification.pkl')
 
 # Streamlit app
 st.title(":iphone: Mobile Price Classification")
@@ -18,6 +32,35 @@ CLASS_LABELS = {
     3: "3 (very high cost)",
 }
 
+mode = st.sidebar.radio("Mode", ["Single phone", "Catalog file"])
+
+# Price ranges for a whole catalog, written to Parquet block by block
+if mode == "Catalog file":
+    st.header("Catalog Classification")
+    st.write("Upload a CSV with the phone specs below (other columns are kept); every phone gets a `price_range`, its `confidence` and the probability of each range. For catalogs of millions of phones, run `mobile_catalog.py` from the command line to use every core.")
+    uploaded = st.file_uploader("Catalog file", type=["csv"])
+    if uploaded is not None and st.button("Classify Catalog", type="primary", use_container_width=True):
+        progress = st.empty()
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / f"{Path(uploaded.name).stem}_price_ranges.parquet"
+            try:
+                with track("batch_predict", app="mobile"):
+                    report = classify_catalog(
+                        uploaded,
+                        output,
+                        workers=1,
+                        on_block=lambda r: progress.caption(f"{r.rows:,} phones classified, {r.rows_per_sec:,.0f} rows/s"),
+                    )
+            except ValueError as e:
+                st.error(f"❌ {e}")
+                st.stop()
+            progress.empty()
+            st.success(f"Classified **{report.rows:,}** phones in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s)")
+            if report.invalid_rows:
+                st.warning(f"{report.invalid_rows:,} phones could not be classified; see the `error` column.")
+            st.download_button("Download price ranges", output.read_bytes(), file_name=output.name, mime="application/vnd.apache.parquet", on_click="ignore")
+    st.stop()
+
 # Create input form
 col1, col2 = st.columns(2)
 
@@ -51,21 +94,21 @@ with col2:
 
 # Create a button to predict the price range
 if st.button("Predict Price Range", type="primary", use_container_width=True):
-    # Create a DataFrame with the input features
-    input_data = pd.DataFrame({
-        'battery_power': [battery_power],
-        'int_memory': [int_memory],
-        'mobile_wt': [mobile_wt],
-        'px_height': [px_height],
-        'px_width': [px_width],
-        'ram': [ram],
-        'talk_time': [talk_time],
-        'touch_screen': [touch_screen]
-    })
+    # Collect the input features
+    input_data = {
+        'battery_power': battery_power,
+        'int_memory': int_memory,
+        'mobile_wt': mobile_wt,
+        'px_height': px_height,
+        'px_width': px_width,
+        'ram': ram,
+        'talk_time': talk_time,
+        'touch_screen': touch_screen
+    }
 
     # Predict the price range
-    prediction = pipeline.predict(input_data)
-    predicted_label = int(prediction[0])
+    with track("predict", app="mobile"):
+        predicted_label = int(predictor.predict_one(input_data))
     predicted_text = CLASS_LABELS.get(predicted_label, str(predicted_label))
 
     st.subheader("Prediction")
@@ -0,0 +1,215 @@
+"""Classify a whole phone catalog into price ranges on every core.
+
+    poetry run python "6. Mobile Price - Classification/mobile_catalog.py" catalog.csv -o priced.parquet --workers 8
+
+The CSV (the training columns; other columns are passed through) is cut into
+blocks of about ``--block-mb`` of whole lines. Each block is sent as raw bytes
+to a process pool whose workers load the compiled pipeline once, then parse,
+validate and score their block with one vectorized ``predict_proba``, so
+parsing scales with the cores as well as the model. Results come back in
+input order and are appended to a Parquet file as one row group per block,
+keeping memory bounded by the blocks in flight. Every row gets
+``price_range``, its ``confidence`` and one ``proba_<class>`` column per class;
+rows that cannot be scored get nulls and the reason in ``error``. Use ``-``
+for stdin. Fields must not contain quoted line breaks.
+"""
+import argparse
+import csv
+import io
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterator
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.compiled import load_compiled_pipeline
+
+PIPELINE_PATH = APP_DIR / "mobile_price_classification.pkl"
+DEFAULT_BLOCK_MB = 8
+
+
+@dataclass
+class CatalogReport:
+    rows: int = 0
+    invalid_rows: int = 0
+    seconds: float = 0.0
+    workers: int = 1
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def check_header(header: list[str], predictor) -> None:
+    missing = [c for c in predictor.numeric_features if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+def read_blocks(stream: BinaryIO, block_bytes: int) -> Iterator[bytes]:
+    """Blocks of about ``block_bytes`` that always end on a line break."""
+    while True:
+        block = stream.read(block_bytes)
+        if not block:
+            return
+        yield block + stream.readline()
+
+
+def score_block(header: bytes, block: bytes, predictor=None) -> pa.Table:
+    """Parse, validate and score one block of CSV lines."""
+    predictor = predictor if predictor is not None else load_compiled_pipeline(PIPELINE_PATH)
+    features = predictor.numeric_features
+    names = next(csv.reader([header.decode().strip()]), [])
+    check_header(names, predictor)
+    # Features parse natively (only an empty field is missing); everything
+    # else stays text so every block has the same schema
+    chunk = pd.read_csv(
+        io.BytesIO(header + block),
+        dtype={c: str for c in names if c not in features},
+        keep_default_na=False,
+        na_values={c: [""] for c in features},
+        # The block is already bounded: parse it in one piece, no mixed-type guessing
+        low_memory=False,
+    )
+
+    errors = pd.Series("", index=chunk.index, dtype=object)
+    numeric = np.empty((len(chunk), len(features)), dtype=np.float64)
+    for j, column in enumerate(features):
+        values = chunk[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            # Only columns with a non-number in this block take the slow path
+            values = pd.to_numeric(values, errors="coerce")
+        # "inf" parses as a number but no model input can be infinite
+        errors[~np.isfinite(values)] += f"{column} is not a finite number; "
+        numeric[:, j] = values
+        chunk[column] = values.astype(np.float64)
+    valid = (errors == "").to_numpy()
+
+    classes = predictor.classes_
+    probabilities = np.full((len(chunk), len(classes)), np.nan, dtype=np.float32)
+    if valid.any():
+        # One vectorized predict_proba for every valid row of the block
+        probabilities[valid] = predictor.predict_proba_arrays(numeric[valid])
+    best = np.argmax(np.nan_to_num(probabilities, nan=-1.0), axis=1)
+    columns = {column: pa.array(chunk[column]) for column in chunk.columns}
+    columns["price_range"] = pa.array(classes.take(best), mask=~valid).cast(pa.int8())
+    columns["confidence"] = pa.array(probabilities.max(axis=1, initial=-1.0), mask=~valid)
+    for k, label in enumerate(classes):
+        columns[f"proba_{label}"] = pa.array(probabilities[:, k], mask=~valid)
+    columns["error"] = pa.array(errors.str.rstrip("; "), type=pa.string())
+    return pa.table(columns)
+
+
+_predictor = None
+
+
+def _init_worker() -> None:
+    # Once per worker process, not once per block
+    global _predictor
+    _predictor = load_compiled_pipeline(PIPELINE_PATH)
+
+
+def _score_in_worker(header: bytes, block: bytes) -> pa.Table:
+    return score_block(header, block, _predictor)
+
+
+def classify_catalog(
+    source: str | Path | BinaryIO,
+    sink: str | Path,
+    *,
+    workers: int | None = None,
+    block_bytes: int = DEFAULT_BLOCK_MB << 20,
+    on_block: Callable[[CatalogReport], None] | None = None,
+) -> CatalogReport:
+    """Stream the CSV ``source`` to the Parquet file ``sink`` with a price range for every phone.
+
+    ``workers=1`` scores in this process; more fan the blocks out to a pool.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = CatalogReport(workers=workers)
+    start = time.perf_counter()
+    predictor = load_compiled_pipeline(PIPELINE_PATH)
+    stream = open(source, "rb") if isinstance(source, (str, Path)) else source
+    writer = None
+    try:
+        header = stream.readline()
+        # Fail before starting any worker
+        check_header(next(csv.reader([header.decode().strip()]), []), predictor)
+        blocks = read_blocks(stream, block_bytes)
+        if workers == 1:
+            results = (score_block(header, block, predictor) for block in blocks)
+        else:
+            results = _ordered_results(header, blocks, workers)
+
+        for table in results:
+            if writer is None:
+                writer = pq.ParquetWriter(sink, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            report.rows += table.num_rows
+            report.invalid_rows += table["price_range"].null_count
+            report.seconds = time.perf_counter() - start
+            if on_block is not None:
+                on_block(report)
+    finally:
+        if writer is not None:
+            writer.close()
+        if stream is not source:
+            stream.close()
+    return report
+
+
+def _ordered_results(header: bytes, blocks: Iterator[bytes], workers: int) -> Iterator[pa.Table]:
+    with ProcessPoolExecutor(workers, initializer=_init_worker) as pool:
+        # At most two blocks per worker in flight keeps memory flat; results
+        # are yielded in input order
+        pending = deque()
+        for block in blocks:
+            pending.append(pool.submit(_score_in_worker, header, block))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("input", help="Catalog CSV ('-' for stdin)")
+    parser.add_argument("-o", "--output", required=True, help="Parquet file to write")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: every core)")
+    parser.add_argument("--block-mb", type=float, default=DEFAULT_BLOCK_MB, help="CSV megabytes per block")
+    args = parser.parse_args()
+
+    source = sys.stdin.buffer if args.input == "-" else args.input
+
+    def progress(report: CatalogReport) -> None:
+        print(f"\r{report.rows:,} phones, {report.rows_per_sec:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = classify_catalog(
+            source, args.output, workers=args.workers, block_bytes=int(args.block_mb * (1 << 20)), on_block=progress
+        )
+    except ValueError as e:
+        print(f"\rerror: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"\r{report.rows:,} phones classified in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s) "
+        f"on {report.workers} worker(s), {report.invalid_rows:,} invalid",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
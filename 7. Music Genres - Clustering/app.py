@@ -1,12 +1,25 @@
-import joblib
+import sys
+from pathlib import Path
+
 import streamlit as st
 import pandas as pd
 
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.datasets import read_dataset
+from common.metrics import configure_from_env, track
+from common.registry import load_artifact
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
 # Load the pipeline
-pipeline = joblib.load('music_genres_pipeline.pkl')
+pipeline = load_artifact(APP_DIR / 'music_genres_pipeline.pkl')
 
 # Load the cluster dataframe
-cluster_df = pd.read_csv('cluster_df.csv')
+cluster_df = read_dataset(APP_DIR / 'cluster_df.csv')
 
 # Function to extract categorical choices from the pipeline
 def extract_categorical_choices_from_pipeline(pipeline):
@@ -72,7 +85,8 @@ if st.button("Predict Cluster", type="primary", use_container_width=True):
     })
     
     # Make prediction
-    cluster = pipeline.predict(input_data)[0]
+    with track("predict", app="music"):
+        cluster = pipeline.predict(input_data)[0]
     
     # Display result
     st.success(f":notes: Predicted Cluster: {cluster}")
@@ -1,9 +1,20 @@
-import joblib
+import sys
+from pathlib import Path
+
 import streamlit as st
-import pandas as pd
 
-# Load the pipeline
-pipeline = joblib.load('credit_card_clustering_pipeline.pkl')
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.compiled import load_compiled_pipeline
+from common.metrics import configure_from_env, track
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+# Load the pipeline, compiled to a numpy-only single-row predictor
+predictor = load_compiled_pipeline(APP_DIR / 'credit_card_clustering_pipeline.pkl')
 
 # Streamlit app
 st.title(":credit_card: Credit Card Clustering")
@@ -17,10 +28,11 @@ credit_limit = st.number_input("Credit Limit", min_value=0, max_value=100000, va
 
 # Predict button
 if st.button("Predict Cluster", type="primary", use_container_width=True):
-    input_df = pd.DataFrame({
-        'BALANCE': [balance],
-        'PURCHASES': [purchases],
-        'CREDIT_LIMIT': [credit_limit]
-    })
-    cluster = pipeline.predict(input_df)[0]
+    input_data = {
+        'BALANCE': balance,
+        'PURCHASES': purchases,
+        'CREDIT_LIMIT': credit_limit
+    }
+    with track("predict", app="credit-card"):
+        cluster = predictor.predict_one(input_data)
     st.success(f"Cluster: **{cluster}**")
\ No newline at end of file
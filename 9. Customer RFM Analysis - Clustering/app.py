@@ -1,14 +1,29 @@
 import io
+import sys
 from datetime import datetime, timedelta
+from pathlib import Path
 
 import pandas as pd
-import plotly.express as px
 import streamlit as st
 
+APP_DIR = Path(__file__).resolve().parent
+if str(APP_DIR.parent) not in sys.path:
+    sys.path.insert(0, str(APP_DIR.parent))
+
+from common.datasets import read_dataset
+from common.metrics import configure_from_env, track
+from common.profiling import timed_import
+
+# Export hot path metrics if METRICS_PORT / METRICS_FILE are set
+configure_from_env()
+
+with timed_import("plotly", __file__):
+    import plotly.express as px
+
 
 def load_data(file_buffer: io.BytesIO | None) -> pd.DataFrame:
     if file_buffer is None:
-        df = pd.read_csv("rfm_data.csv")
+        df = read_dataset(APP_DIR / "rfm_data.csv", parse_dates=["PurchaseDate"])
     else:
         df = pd.read_csv(file_buffer)
     return df
@@ -159,7 +174,8 @@ def main() -> None:
     st.write(df.head())
 
     # Compute RFM
-    rfm = compute_rfm(df, analysis_date)
+    with track("compute_rfm", app="customer-rfm"):
+        rfm = compute_rfm(df, analysis_date)
 
     st.subheader("RFM Summary")
     st.write(
@@ -0,0 +1,228 @@
+"""Benchmark every bundled model against its own dataset.
+
+    poetry run python bench.py --output bench_results.json
+    poetry run python bench.py --baseline bench_results.json --output bench_new.json --threshold 0.2
+
+For each model, in a fresh process so numbers don't leak between models:
+
+- ``load_seconds``: time to load its artefacts (cold, including the imports
+  triggered by unpickling),
+- ``p50_ms`` / ``p99_ms``: single-row latency of the served predict path,
+- ``rows_per_sec``: throughput at several batch sizes,
+- ``peak_rss_bytes``: peak resident memory of the benchmark process.
+
+With ``--baseline`` the run is compared metric by metric against a previous
+results file and the exit code is 1 if anything got worse by more than
+``--threshold`` (a fraction, 0.2 = 20%).
+"""
+import argparse
+import json
+import math
+import multiprocessing
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+from common.datasets import read_dataset
+from common.models import MODELS, ROOT, Rows
+from common.profiling import format_bytes, peak_rss_bytes
+from common.registry import artifact_stats, load_artifact, load_keras_model
+
+DEFAULT_BATCH_SIZES = (1, 16, 128, 1024)
+
+# Direction of each metric: +1 when higher is better, -1 when lower is better
+METRICS = {
+    "load_seconds": -1,
+    "p50_ms": -1,
+    "p99_ms": -1,
+    "peak_rss_bytes": -1,
+}
+
+
+def benchmark_rows(name: str) -> Rows:
+    """Input rows for ``name`` taken from the project's own dataset."""
+    if name == "retail":
+        df = read_dataset(ROOT / "1. Retail Price Optimization - Regression/retail_price.csv")
+        for i in (1, 2, 3):
+            df[f"comp{i}_price_diff"] = df["unit_price"] - df[f"comp_{i}"]
+        return df.to_dict("records")
+    if name == "delivery":
+        app_dir = ROOT / "3. Food Delivery Time Prediction - Regression"
+        if str(app_dir) not in sys.path:
+            sys.path.insert(0, str(app_dir))
+        # The app's own distance, so the benchmark inputs match what it serves
+        from delivery_features import COORDINATES, haversine_km
+
+        df = read_dataset(app_dir / "deliverytime.txt")
+        df["Distance"] = haversine_km(*(df[column] for column in COORDINATES))
+        return df.to_dict("records")
+    if name == "iris":
+        from sklearn.datasets import load_iris
+
+        return load_iris(as_frame=True).data.to_dict("records")
+    if name == "text-emotions":
+        lines = (ROOT / "5. Text Emotions - Classification/data/test.txt").read_text().splitlines()
+        return [{"text": line.rsplit(";", 1)[0]} for line in lines if line]
+    if name == "music":
+        df = read_dataset(ROOT / "7. Music Genres - Clustering/Spotify-2000.csv", thousands=",")
+        return df.to_dict("records")
+    if name == "credit-card":
+        return read_dataset(ROOT / "8. Credit Card - Clustering/CC GENERAL.csv").dropna().to_dict("records")
+    if name in ("car", "mobile"):
+        # Not bundled (the notebooks download them): sample the fitted ranges
+        from common.compiled import sample_inputs
+
+        pipeline = load_artifact(MODELS[name].artifacts[0])
+        return sample_inputs(pipeline, 2000).to_dict("records")
+    if name == "mnist":
+        # MNIST itself is fetched from OpenML by the notebook; latency doesn't
+        # depend on the pixel values, so random digits are good enough
+        rng = np.random.default_rng(0)
+        return [{"pixels": rng.random(784).tolist()} for _ in range(1000)]
+    raise KeyError(name)
+
+
+def _rows_per_sec(predict, rows: Rows, batch_size: int, min_seconds: float) -> float:
+    batch = (rows * math.ceil(batch_size / len(rows)))[:batch_size]
+    done, start = 0, time.perf_counter()
+    while True:
+        predict(batch)
+        done += len(batch)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_seconds and done >= 3 * batch_size:
+            return done / elapsed
+
+
+def bench_model(name: str, latency_samples: int, batch_sizes: tuple[int, ...], min_seconds: float) -> dict:
+    spec = MODELS[name]
+    missing = [p.name for p in spec.artifacts if not p.exists()]
+    if missing:
+        return {"skipped": f"missing {', '.join(missing)}"}
+    rows = benchmark_rows(name)
+
+    for path in spec.artifacts:
+        if path.suffix == ".keras":
+            load_keras_model(path)
+        else:
+            load_artifact(path, mmap_mode="r" if name == "mnist" else None)
+    load_seconds = sum(s.load_seconds for s in artifact_stats())
+
+    # First call pays one-off costs (compiling, graph tracing): keep it out
+    spec.predict(rows[:1])
+    latencies = []
+    for i in range(latency_samples):
+        row = rows[i % len(rows)]
+        start = time.perf_counter()
+        spec.predict([row])
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "rows": len(rows),
+        "load_seconds": load_seconds,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+        "rows_per_sec": {
+            str(size): _rows_per_sec(spec.predict, rows, size, min_seconds) for size in batch_sizes
+        },
+        "peak_rss_bytes": peak_rss_bytes(),
+    }
+
+
+def run(names: list[str], latency_samples: int, batch_sizes: tuple[int, ...], min_seconds: float) -> dict:
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        # One fresh process per model: cold load times and per-model peak memory
+        with context.Pool(1) as pool:
+            try:
+                results[name] = pool.apply(bench_model, (name, latency_samples, batch_sizes, min_seconds))
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+        print(_format_result(name, results[name]), flush=True)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "batch_sizes": list(batch_sizes),
+        "results": results,
+    }
+
+
+def _format_result(name: str, result: dict) -> str:
+    if "skipped" in result or "error" in result:
+        return f"{name:<14} {result.get('skipped') or result['error']}"
+    throughput = "  ".join(f"{size}:{rate:,.0f}/s" for size, rate in result["rows_per_sec"].items())
+    return (
+        f"{name:<14} load {result['load_seconds']:.3f}s  "
+        f"p50 {result['p50_ms']:.2f}ms  p99 {result['p99_ms']:.2f}ms  "
+        f"peak {format_bytes(result['peak_rss_bytes'])}  {throughput}"
+    )
+
+
+def _metric_values(result: dict) -> dict[str, tuple[float, int]]:
+    values = {metric: (result[metric], direction) for metric, direction in METRICS.items() if metric in result}
+    for size, rate in result.get("rows_per_sec", {}).items():
+        values[f"rows_per_sec[{size}]"] = (rate, +1)
+    return values
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Describe every metric that regressed by more than ``threshold``."""
+    regressions = []
+    for name, result in current["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if not before or "skipped" in result or "error" in result:
+            continue
+        old_values = _metric_values(before)
+        for metric, (value, direction) in _metric_values(result).items():
+            if metric not in old_values or old_values[metric][0] == 0:
+                continue
+            old = old_values[metric][0]
+            # Positive change means worse, whatever the metric's direction
+            change = (old - value) / old if direction > 0 else (value - old) / old
+            if change > threshold:
+                regressions.append(f"{name} {metric}: {old:.4g} -> {value:.4g} ({change:+.0%} worse)")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("models", nargs="*", help=f"Models to run (default: all of {', '.join(MODELS)})")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--baseline", type=Path, help="Previous results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression")
+    parser.add_argument("--latency-samples", type=int, default=200)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--min-seconds", type=float, default=0.5, help="Minimum run time per batch size")
+    args = parser.parse_args()
+    unknown = sorted(set(args.models) - set(MODELS))
+    if unknown:
+        parser.error(f"unknown models: {', '.join(unknown)}")
+
+    baseline = None
+    if args.baseline:
+        if args.output.resolve() == args.baseline.resolve():
+            parser.error("--output would overwrite the --baseline it is compared against; pass another --output")
+        # Read before the run, so a missing or broken baseline fails fast
+        baseline = json.loads(args.baseline.read_text())
+
+    results = run(args.models or list(MODELS), args.latency_samples, tuple(args.batch_sizes), args.min_seconds)
+    args.output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {args.output}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regression above {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
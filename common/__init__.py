@@ -0,0 +1 @@
+"""Shared helpers used by the project apps (model loading, profiling, ...)."""
@@ -0,0 +1,149 @@
+"""Dynamic micro-batching for asyncio front ends.
+
+Requests that arrive within ``max_wait`` seconds of each other are coalesced
+into one call of ``predict_batch`` (up to ``max_batch_size`` rows), which runs
+in an executor so the event loop keeps accepting requests meanwhile. Under
+light load a row waits at most ``max_wait``; under heavy load batches fill up
+and the per-row overhead of ``predict`` is paid once per batch.
+"""
+import asyncio
+import logging
+from concurrent.futures import Executor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from common.metrics import histogram, track
+
+logger = logging.getLogger(__name__)
+
+
+BATCH_SIZE = histogram(
+    "batch_size_rows", "Rows per micro-batch", ("app",), buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+)
+
+
+@dataclass
+class BatchStats:
+    batches: int = 0
+    rows: int = 0
+    failed_batches: int = 0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.rows / self.batches if self.batches else 0.0
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        predict_batch: Callable[[list], list],
+        *,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        executor: Executor | None = None,
+        max_concurrency: int = 1,
+        name: str = "",
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor
+        self.name = name
+        self.stats = BatchStats()
+        self._queue: asyncio.Queue[tuple[Any, asyncio.Future]] = asyncio.Queue()
+        # Batches in flight at once; while all slots are busy the collector
+        # waits, which lets the next batch grow instead of queuing tiny ones
+        self._slots = asyncio.Semaphore(max_concurrency)
+        self._collector: asyncio.Task | None = None
+
+    def start(self) -> None:
+        if self._collector is None:
+            self._collector = asyncio.get_running_loop().create_task(self._collect())
+
+    async def stop(self) -> None:
+        if self._collector is not None:
+            self._collector.cancel()
+            try:
+                await self._collector
+            except asyncio.CancelledError:
+                pass
+            self._collector = None
+
+    async def submit(self, item: Any) -> Any:
+        """Queue one row and wait for its prediction."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def submit_many(self, items: list) -> list:
+        return list(await asyncio.gather(*(self.submit(item) for item in items)))
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                # Take whatever is already queued before waiting for more
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            await self._slots.acquire()
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        items = [item for item, _ in batch]
+        try:
+            try:
+                with track("batch_predict", app=self.name):
+                    results = await loop.run_in_executor(self.executor, self.predict_batch, items)
+                BATCH_SIZE.observe(len(items), app=self.name)
+                if len(results) != len(items):
+                    raise RuntimeError(f"predict returned {len(results)} results for {len(items)} rows")
+            except Exception:
+                self.stats.failed_batches += 1
+                if len(items) == 1:
+                    raise
+                # Don't let one bad row fail everybody else's request
+                logger.warning("Batch of %d failed for %s, retrying rows one by one", len(items), self.name)
+                await self._dispatch_one_by_one(batch)
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.stats.batches += 1
+            self.stats.rows += len(items)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._slots.release()
+
+    async def _dispatch_one_by_one(self, batch: list[tuple[Any, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        for item, future in batch:
+            try:
+                result = (await loop.run_in_executor(self.executor, self.predict_batch, [item]))[0]
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            self.stats.batches += 1
+            self.stats.rows += 1
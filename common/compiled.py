@@ -0,0 +1,423 @@
+"""Compile fitted scikit-learn pipelines into numpy-only predictors.
+
+For a single row, ``pipeline.predict(pd.DataFrame(...))`` spends most of its
+time building the DataFrame, validating it and dispatching through the
+``ColumnTransformer``; the model math itself is tiny. ``compile_pipeline``
+reads the fitted parameters once and produces a ``CompiledPipeline`` that:
+
+- encodes categories with precomputed category -> output column lookup
+  tables (``OneHotEncoder``) or category -> code tables (``OrdinalEncoder``),
+- applies every ``MinMaxScaler`` as one fused affine step, folded directly
+  into the weights for linear models,
+- evaluates random forests by walking all trees at once over flat node
+  arrays, and logistic regression / k-means with a couple of array ops.
+
+Outputs are identical to ``pipeline.predict``; ``python -m common.compiled``
+checks this on the bundled datasets.
+
+    predictor = load_compiled_pipeline(APP_DIR / "iris_flower_classification.pkl")
+    predictor.predict_one({"sepal length (cm)": 5.8, ...})
+    predictor.predict_arrays(numeric, categories)
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from common.registry import load_artifact
+
+
+@dataclass
+class _Encoding:
+    """Where each raw input column lands in the model input matrix."""
+
+    width: int
+    numeric_features: list[str]
+    numeric_columns: np.ndarray
+    scale: np.ndarray
+    offset: np.ndarray
+    categorical_features: list[str]
+    # OneHotEncoder: output column of every category; OrdinalEncoder: the code
+    categories: list[np.ndarray]
+    category_sorters: list[np.ndarray]
+    category_targets: list[np.ndarray]
+    ordinal_columns: list[int | None]
+    lookups: list[dict[Any, int]]
+
+
+def _scaler_constants(scaler, n_features: int) -> tuple[np.ndarray, np.ndarray]:
+    if scaler is None or scaler == "passthrough":
+        return np.ones(n_features), np.zeros(n_features)
+    if type(scaler).__name__ != "MinMaxScaler" or scaler.clip:
+        raise TypeError(f"Cannot compile scaler {scaler!r}")
+    return np.asarray(scaler.scale_, dtype=np.float64), np.asarray(scaler.min_, dtype=np.float64)
+
+
+def _compile_encoding(preprocessor, feature_names: list[str]) -> _Encoding:
+    """Flatten a ColumnTransformer (or a bare MinMaxScaler) into lookup tables."""
+    if type(preprocessor).__name__ != "ColumnTransformer":
+        scale, offset = _scaler_constants(preprocessor, len(feature_names))
+        return _Encoding(
+            width=len(feature_names),
+            numeric_features=list(feature_names),
+            numeric_columns=np.arange(len(feature_names)),
+            scale=scale,
+            offset=offset,
+            categorical_features=[],
+            categories=[],
+            category_sorters=[],
+            category_targets=[],
+            ordinal_columns=[],
+            lookups=[],
+        )
+
+    numeric_features, numeric_columns, scales, offsets = [], [], [], []
+    categorical_features, categories, targets, ordinal_columns = [], [], [], []
+    width = 0
+    for name, transformer, columns in preprocessor.transformers_:
+        if name == "remainder" and transformer == "drop":
+            continue
+        columns = [feature_names[c] if isinstance(c, (int, np.integer)) else c for c in columns]
+        kind = type(transformer).__name__
+        if kind == "OneHotEncoder":
+            if transformer.drop is not None or transformer.handle_unknown != "error":
+                raise TypeError(f"Cannot compile encoder {transformer!r}")
+            for column, cats in zip(columns, transformer.categories_):
+                categorical_features.append(column)
+                categories.append(np.asarray(cats))
+                targets.append(np.arange(width, width + len(cats)))
+                ordinal_columns.append(None)
+                width += len(cats)
+        elif kind == "OrdinalEncoder":
+            if transformer.handle_unknown != "error":
+                raise TypeError(f"Cannot compile encoder {transformer!r}")
+            for column, cats in zip(columns, transformer.categories_):
+                categorical_features.append(column)
+                categories.append(np.asarray(cats))
+                targets.append(np.arange(len(cats), dtype=np.float64))
+                ordinal_columns.append(width)
+                width += 1
+        else:
+            scale, offset = _scaler_constants(transformer, len(columns))
+            numeric_features.extend(columns)
+            numeric_columns.extend(range(width, width + len(columns)))
+            scales.append(scale)
+            offsets.append(offset)
+            width += len(columns)
+
+    return _Encoding(
+        width=width,
+        numeric_features=numeric_features,
+        numeric_columns=np.asarray(numeric_columns, dtype=np.intp),
+        scale=np.concatenate(scales) if scales else np.empty(0),
+        offset=np.concatenate(offsets) if offsets else np.empty(0),
+        categorical_features=categorical_features,
+        categories=categories,
+        category_sorters=[np.argsort(cats, kind="stable") for cats in categories],
+        category_targets=targets,
+        ordinal_columns=ordinal_columns,
+        lookups=[
+            {cat: target for cat, target in zip(cats.tolist(), target_list.tolist())}
+            for cats, target_list in zip(categories, targets)
+        ],
+    )
+
+
+class _ForestKernel:
+    """All trees of a random forest flattened into one set of node arrays."""
+
+    def __init__(self, model):
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        self.is_classifier = hasattr(model, "classes_")
+        self.classes = getattr(model, "classes_", None)
+        self.n_trees = len(trees)
+        self.max_depth = max(tree.max_depth for tree in trees)
+
+        roots, features, thresholds, lefts, rights, values = [], [], [], [], [], []
+        base = 0
+        for tree in trees:
+            leaf = tree.children_left == -1
+            node_ids = np.arange(tree.node_count) + base
+            # Leaves point to themselves, so walking max_depth steps is safe
+            lefts.append(np.where(leaf, node_ids, tree.children_left + base))
+            rights.append(np.where(leaf, node_ids, tree.children_right + base))
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(np.where(leaf, np.inf, tree.threshold))
+            value = tree.value[:, 0, :]
+            if self.is_classifier:
+                normalizer = value.sum(axis=1, keepdims=True)
+                normalizer[normalizer == 0.0] = 1.0
+                values.append(value / normalizer)
+            else:
+                values.append(value[:, 0])
+            roots.append(base)
+            base += tree.node_count
+
+        self.roots = np.asarray(roots, dtype=np.intp)
+        self.feature = np.concatenate(features).astype(np.intp)
+        self.threshold = np.concatenate(thresholds)
+        self.left = np.concatenate(lefts).astype(np.intp)
+        self.right = np.concatenate(rights).astype(np.intp)
+        self.value = np.concatenate(values)
+
+    def _leaves(self, X: np.ndarray) -> np.ndarray:
+        # Trees compare float32 features against float64 thresholds
+        X = X.astype(np.float32)
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(go_left, self.left[node], self.right[node])
+        return node
+
+    def _average(self, X: np.ndarray) -> np.ndarray:
+        per_tree = np.moveaxis(self.value[self._leaves(X)], 1, 0)
+        # scikit-learn adds the trees one after another; cumsum keeps that
+        # order (sum() would switch to pairwise summation and differ in the
+        # last bits)
+        average = np.cumsum(per_tree, axis=0)[-1]
+        average /= self.n_trees
+        return average
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        return self._average(X)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        if self.is_classifier:
+            return self.classes.take(np.argmax(self._average(X), axis=1))
+        return self._average(X)
+
+
+class _LinearKernel:
+    """Logistic regression with the MinMaxScaler folded into its weights."""
+
+    def __init__(self, model, encoding: _Encoding):
+        coef = np.array(model.coef_, dtype=np.float64)
+        intercept = np.array(model.intercept_, dtype=np.float64)
+        # w . (x * scale + offset) + b == (w * scale) . x + (w . offset + b)
+        cols = encoding.numeric_columns
+        intercept = intercept + coef[:, cols] @ encoding.offset
+        coef[:, cols] *= encoding.scale
+        self.coef = coef.T
+        self.intercept = intercept
+        self.classes = model.classes_
+
+    def decision_function(self, X: np.ndarray) -> np.ndarray:
+        return X @ self.coef + self.intercept
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            positive = 1.0 / (1.0 + np.exp(-scores[:, 0]))
+            return np.column_stack([1.0 - positive, positive])
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        scores = self.decision_function(X)
+        if scores.shape[1] == 1:
+            return self.classes.take((scores[:, 0] > 0).astype(np.intp))
+        return self.classes.take(np.argmax(scores, axis=1))
+
+
+class _KMeansKernel:
+    def __init__(self, model):
+        self.centers = np.asarray(model.cluster_centers_, dtype=np.float64)
+        self.center_norms = np.einsum("ij,ij->i", self.centers, self.centers)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        # ||x - c||^2 up to the ||x||^2 term, which doesn't change the argmin
+        distances = self.center_norms - 2.0 * (X @ self.centers.T)
+        return np.argmin(distances, axis=1).astype(np.int32)
+
+
+class CompiledPipeline:
+    """Numpy-only replacement for ``pipeline.predict`` on a fitted pipeline."""
+
+    def __init__(self, encoding: _Encoding, kernel, fold_scaling: bool):
+        self._encoding = encoding
+        self._kernel = kernel
+        self._fold_scaling = fold_scaling
+        self.numeric_features = list(encoding.numeric_features)
+        self.categorical_features = list(encoding.categorical_features)
+        self.feature_names = self.numeric_features + self.categorical_features
+        self.classes_ = getattr(kernel, "classes", None)
+
+    def encode(self, numeric: np.ndarray, categories: np.ndarray | None = None) -> np.ndarray:
+        """Build the model input matrix from raw numeric and categorical arrays.
+
+        ``numeric`` is ``(n_rows, len(numeric_features))`` and ``categories``
+        is ``(n_rows, len(categorical_features))``, both in attribute order.
+        """
+        enc = self._encoding
+        numeric = np.asarray(numeric, dtype=np.float64).reshape(-1, len(enc.numeric_columns))
+        X = np.zeros((numeric.shape[0], enc.width), dtype=np.float64)
+        if self._fold_scaling:
+            X[:, enc.numeric_columns] = numeric
+        else:
+            X[:, enc.numeric_columns] = numeric * enc.scale + enc.offset
+
+        if enc.categorical_features:
+            categories = np.asarray(categories, dtype=object).reshape(numeric.shape[0], -1)
+            rows = np.arange(numeric.shape[0])
+            for j, (cats, sorter, targets, ordinal_column) in enumerate(
+                zip(enc.categories, enc.category_sorters, enc.category_targets, enc.ordinal_columns)
+            ):
+                values = categories[:, j]
+                position = np.searchsorted(cats, values, sorter=sorter).clip(max=len(cats) - 1)
+                position = sorter[position]
+                unknown = cats[position] != values
+                if np.any(unknown):
+                    raise ValueError(
+                        f"Found unknown categories {sorted(set(values[unknown].tolist()))} "
+                        f"in column {enc.categorical_features[j]!r}"
+                    )
+                if ordinal_column is None:
+                    X[rows, targets[position]] = 1.0
+                else:
+                    X[:, ordinal_column] = targets[position]
+        return X
+
+    def _encode_one(self, row: Mapping[str, Any]) -> np.ndarray:
+        enc = self._encoding
+        X = np.zeros((1, enc.width), dtype=np.float64)
+        numeric = np.fromiter((row[name] for name in enc.numeric_features), dtype=np.float64)
+        if self._fold_scaling:
+            X[0, enc.numeric_columns] = numeric
+        else:
+            X[0, enc.numeric_columns] = numeric * enc.scale + enc.offset
+        for name, lookup, ordinal_column in zip(enc.categorical_features, enc.lookups, enc.ordinal_columns):
+            try:
+                target = lookup[row[name]]
+            except KeyError:
+                raise ValueError(f"Found unknown categories [{row[name]!r}] in column {name!r}") from None
+            if ordinal_column is None:
+                X[0, target] = 1.0
+            else:
+                X[0, ordinal_column] = target
+        return X
+
+    def predict_arrays(self, numeric: np.ndarray, categories: np.ndarray | None = None) -> np.ndarray:
+        return self._kernel.predict(self.encode(numeric, categories))
+
+    def predict_frame(self, frame: pd.DataFrame) -> np.ndarray:
+        categories = frame[self.categorical_features].to_numpy(dtype=object) if self.categorical_features else None
+        return self.predict_arrays(frame[self.numeric_features].to_numpy(dtype=np.float64), categories)
+
+    def predict_one(self, row: Mapping[str, Any]) -> Any:
+        """Predict a single row given as ``{column: value}``."""
+        return self._kernel.predict(self._encode_one(row))[0]
+
+    def predict_proba_arrays(self, numeric: np.ndarray, categories: np.ndarray | None = None) -> np.ndarray:
+        if not hasattr(self._kernel, "predict_proba"):
+            raise AttributeError("This model has no predict_proba")
+        return self._kernel.predict_proba(self.encode(numeric, categories))
+
+    def predict_proba_one(self, row: Mapping[str, Any]) -> np.ndarray:
+        if not hasattr(self._kernel, "predict_proba"):
+            raise AttributeError("This model has no predict_proba")
+        return self._kernel.predict_proba(self._encode_one(row))[0]
+
+
+def compile_pipeline(pipeline) -> CompiledPipeline:
+    """Compile a fitted ``Pipeline([preprocessor, model])``.
+
+    Supported preprocessors are a ``ColumnTransformer`` of ``MinMaxScaler``,
+    ``OneHotEncoder`` and ``OrdinalEncoder`` or a bare ``MinMaxScaler``;
+    supported models are random forests, ``LogisticRegression`` and
+    ``KMeans``. Anything else raises ``TypeError``.
+    """
+    if len(pipeline.steps) != 2:
+        raise TypeError("Expected a two-step pipeline (preprocessor, model)")
+    preprocessor, model = pipeline.steps[0][1], pipeline.steps[1][1]
+    encoding = _compile_encoding(preprocessor, list(pipeline.feature_names_in_))
+
+    kind = type(model).__name__
+    if kind in ("RandomForestRegressor", "RandomForestClassifier"):
+        if model.n_outputs_ != 1:
+            raise TypeError("Multi-output forests are not supported")
+        return CompiledPipeline(encoding, _ForestKernel(model), fold_scaling=False)
+    if kind == "LogisticRegression":
+        return CompiledPipeline(encoding, _LinearKernel(model, encoding), fold_scaling=True)
+    if kind == "KMeans":
+        return CompiledPipeline(encoding, _KMeansKernel(model), fold_scaling=False)
+    raise TypeError(f"Cannot compile model {kind}")
+
+
+def _compiled_loader(path: Path, mmap_mode: str | None) -> CompiledPipeline:
+    return compile_pipeline(load_artifact(path, mmap_mode=mmap_mode))
+
+
+def load_compiled_pipeline(path: str | Path) -> CompiledPipeline:
+    """Load a pipeline through the registry and compile it once per process."""
+    return load_artifact(path, loader=_compiled_loader)
+
+
+def sample_inputs(pipeline, n_rows: int, seed: int = 0) -> pd.DataFrame:
+    """Random raw inputs spanning the ranges and categories the pipeline was fitted on."""
+    compiled = compile_pipeline(pipeline)
+    enc = compiled._encoding
+    rng = np.random.default_rng(seed)
+    # Invert the scaler: training range is where x * scale + offset is in [0, 1]
+    low = -enc.offset / enc.scale
+    high = (1.0 - enc.offset) / enc.scale
+    numeric = rng.uniform(low, high, size=(n_rows, len(low)))
+    frame = pd.DataFrame(numeric, columns=enc.numeric_features)
+    for name, cats in zip(enc.categorical_features, enc.categories):
+        frame[name] = rng.choice(cats, size=n_rows)
+    return frame[list(pipeline.feature_names_in_)]
+
+
+def check_parity(pipeline, frame: pd.DataFrame) -> int:
+    """Return the number of rows where the compiled output differs from ``pipeline.predict``."""
+    compiled = compile_pipeline(pipeline)
+    expected = pipeline.predict(frame)
+    batched = compiled.predict_frame(frame)
+    single = np.array([compiled.predict_one(row) for row in frame.to_dict("records")])
+    return int(np.sum(expected != batched) + np.sum(expected != single))
+
+
+def _bundled_datasets() -> dict[str, tuple[Path, pd.DataFrame | None]]:
+    root = Path(__file__).resolve().parents[1]
+    datasets: dict[str, tuple[Path, pd.DataFrame | None]] = {}
+
+    from sklearn.datasets import load_iris
+
+    from common.datasets import read_dataset
+
+    iris = load_iris(as_frame=True).data
+    datasets["iris"] = (root / "4. Iris Flower - Classification/iris_flower_classification.pkl", iris)
+
+    credit = read_dataset(root / "8. Credit Card - Clustering/CC GENERAL.csv").dropna()
+    datasets["credit card"] = (root / "8. Credit Card - Clustering/credit_card_clustering_pipeline.pkl", credit)
+
+    spotify = read_dataset(root / "7. Music Genres - Clustering/Spotify-2000.csv", thousands=",")
+    datasets["music genres"] = (root / "7. Music Genres - Clustering/music_genres_pipeline.pkl", spotify)
+
+    # The car and mobile datasets are not bundled: the notebooks download them
+    datasets["car price"] = (root / "2. Car Price Prediction - Regression/car_price_prediction_pipeline.pkl", None)
+    datasets["mobile price"] = (root / "6. Mobile Price - Classification/mobile_price_classification.pkl", None)
+    return datasets
+
+
+def main() -> int:
+    failures = 0
+    for name, (path, frame) in _bundled_datasets().items():
+        pipeline = load_artifact(path)
+        frames = {"random": sample_inputs(pipeline, 2000)}
+        if frame is not None:
+            frames["dataset"] = frame[list(pipeline.feature_names_in_)]
+        for source, data in frames.items():
+            mismatches = check_parity(pipeline, data)
+            failures += mismatches
+            status = "ok" if mismatches == 0 else f"{mismatches} MISMATCHES"
+            print(f"{name:<14} {source:<8} {len(data):>6} rows  {status}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,126 @@
+"""Typed columnar cache for the bundled CSV/TXT datasets.
+
+``read_dataset`` parses a source file once into an uncompressed Arrow (Feather
+v2) file under ``.cache/datasets`` and serves every later read from that file
+through a memory map, reading only the requested columns:
+
+    df = read_dataset(APP_DIR / "deliverytime.txt", columns=["Distance", "Type_of_order"])
+
+While converting, strings are stripped of surrounding whitespace ("Snack " ->
+"Snack"), low-cardinality string columns become categoricals and numeric
+columns are downcast to the smallest dtype that holds every value exactly
+(so models see the same numbers as with ``pd.read_csv``). The cache file is
+keyed by the SHA-256 of the source and the ``read_csv`` options, so editing a
+dataset simply produces a new cache entry. ``DATASET_CACHE_DIR`` overrides
+the location.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from common.profiling import format_bytes
+from common.reload import file_version
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = Path(os.environ.get("DATASET_CACHE_DIR", ROOT / ".cache" / "datasets"))
+
+# Bump when the conversion below changes so old cache files are not reused
+FORMAT_VERSION = 1
+
+# String columns with at most this share of distinct values become categoricals
+CATEGORY_MAX_RATIO = 0.5
+
+_versions: dict[str, tuple[tuple[int, int], str]] = {}
+_lock = threading.Lock()
+
+
+def _source_version(path: Path) -> str:
+    # Hash once per process and file revision, not on every Streamlit rerun
+    stat = path.stat()
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _versions.get(str(path))
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    version = file_version(path)
+    _versions[str(path)] = (signature, version)
+    return version
+
+
+def _downcast_float(values: pd.Series) -> pd.Series:
+    narrow = values.astype(np.float32)
+    # Only when lossless: the pipelines were fitted on float64 values
+    if np.array_equal(narrow.to_numpy(np.float64), values.to_numpy(), equal_nan=True):
+        return narrow
+    return values
+
+
+def optimize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Strip strings, turn repetitive strings into categoricals and downcast numerics losslessly."""
+    df = df.copy()
+    for column in df.columns:
+        values = df[column]
+        if values.dtype == object:
+            if not values.map(lambda v: isinstance(v, str) or v is None or v != v).all():
+                continue
+            values = values.str.strip()
+            if values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+                values = values.astype("category")
+        elif pd.api.types.is_integer_dtype(values) and not pd.api.types.is_bool_dtype(values):
+            values = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values):
+            values = _downcast_float(values)
+        df[column] = values
+    return df
+
+
+def cache_path(path: str | Path, **read_csv_kwargs: Any) -> Path:
+    """Where the typed copy of ``path`` read with ``read_csv_kwargs`` is stored."""
+    path = Path(path).resolve()
+    options = json.dumps(read_csv_kwargs, sort_keys=True, default=str)
+    key = hashlib.sha256(f"{FORMAT_VERSION}|{_source_version(path)}|{options}".encode()).hexdigest()[:16]
+    return CACHE_DIR / f"{path.stem}-{key}.arrow"
+
+
+def _convert(path: Path, target: Path, read_csv_kwargs: dict[str, Any]) -> None:
+    start = time.perf_counter()
+    df = optimize_frame(pd.read_csv(path, **read_csv_kwargs))
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+    # Uncompressed so the file can be memory-mapped without decoding
+    feather.write_feather(pa.Table.from_pandas(df, preserve_index=False), tmp, compression="uncompressed")
+    tmp.replace(target)
+    logger.info(
+        "Cached %s as %s in %.3fs (%s in memory)",
+        path.name,
+        target.name,
+        time.perf_counter() - start,
+        format_bytes(int(df.memory_usage(deep=True).sum())),
+    )
+
+
+def read_dataset(path: str | Path, *, columns: list[str] | None = None, **read_csv_kwargs: Any) -> pd.DataFrame:
+    """Read ``path`` (as ``pd.read_csv(path, **read_csv_kwargs)`` would) from its typed columnar cache.
+
+    Only ``columns`` are read when given; the rest of the file is never
+    touched. Every call returns a new DataFrame, so callers may modify it.
+    """
+    path = Path(path).resolve()
+    target = cache_path(path, **read_csv_kwargs)
+    if not target.exists():
+        with _lock:
+            if not target.exists():
+                _convert(path, target, read_csv_kwargs)
+    table = feather.read_table(target, columns=columns, memory_map=True)
+    return table.to_pandas(split_blocks=True)
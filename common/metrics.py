@@ -0,0 +1,274 @@
+"""Lightweight latency/count metrics with Prometheus text export.
+
+Wrap a hot path with ``track`` to record its latency histogram, call count
+and error count:
+
+    with track("predict", app="iris"):
+        species = predictor.predict_one(input_data)
+
+Recording is one ``perf_counter`` pair, a bisect and a few integer additions
+under a lock, so it is cheap enough to leave on. Metrics are exported in the
+Prometheus text format by ``render_prometheus``, on an HTTP endpoint
+(``start_http_exporter``) or to a file (``start_file_exporter``).
+``configure_from_env`` wires the exporters from environment variables:
+
+- ``METRICS_PORT``: serve ``/metrics`` on this port,
+- ``METRICS_FILE``: rewrite this file every ``METRICS_INTERVAL`` seconds (default 15),
+- ``METRICS_ENABLED=0``: turn recording off entirely.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Seconds; tuned for predictions that take from tens of microseconds to seconds
+DEFAULT_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1") != "0"
+
+
+def _format_labels(labelnames: tuple[str, ...], key: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, key)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count in each bucket..., count above the last], sum
+        self._counts: dict[tuple[str, ...], list[int]] = {}
+        self._sums: dict[tuple[str, ...], float] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels: str) -> int:
+        return sum(self._counts.get(self._key(labels), ()))
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        with self._lock:
+            for key in sorted(self._counts):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, self._counts[key]):
+                    cumulative += bucket_count
+                    le = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                    lines.append(f"{self.name}_bucket{le} {cumulative}")
+                total = cumulative + self._counts[key][-1]
+                inf = _format_labels(self.labelnames, key, 'le="+Inf"')
+                lines.append(f"{self.name}_bucket{inf} {total}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {self._sums[key]:g}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {total}")
+        return lines
+
+
+_metrics: dict[str, _Metric] = {}
+_metrics_lock = threading.Lock()
+
+
+def _get_or_create(cls, name: str, documentation: str, labelnames: tuple[str, ...], **kwargs) -> _Metric:
+    with _metrics_lock:
+        metric = _metrics.get(name)
+        if metric is None:
+            metric = _metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        elif type(metric) is not cls or metric.labelnames != labelnames:
+            raise ValueError(f"Metric {name} already registered with a different type or labels")
+        return metric
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, documentation, labelnames)
+
+
+def histogram(
+    name: str, documentation: str, labelnames: tuple[str, ...] = (), buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    return _get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+
+LATENCY = histogram("hot_path_latency_seconds", "Latency of instrumented hot paths", ("app", "operation"))
+CALLS = counter("hot_path_calls_total", "Calls of instrumented hot paths", ("app", "operation"))
+ERRORS = counter("hot_path_errors_total", "Instrumented hot path calls that raised", ("app", "operation"))
+
+
+class track:
+    """Context manager recording latency, calls and errors of one hot path call."""
+
+    __slots__ = ("operation", "app", "_start")
+
+    def __init__(self, operation: str, app: str):
+        self.operation = operation
+        self.app = app
+
+    def __enter__(self) -> "track":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if not ENABLED:
+            return
+        LATENCY.observe(time.perf_counter() - self._start, app=self.app, operation=self.operation)
+        CALLS.inc(app=self.app, operation=self.operation)
+        if exc_type is not None:
+            ERRORS.inc(app=self.app, operation=self.operation)
+
+
+def render_prometheus() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    with _metrics_lock:
+        metrics = list(_metrics.values())
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def start_http_exporter(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve ``/metrics`` from a daemon thread."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving metrics on http://%s:%d/metrics", host, port)
+    return server
+
+
+def write_metrics_file(path: str | Path) -> None:
+    """Atomically replace ``path`` with the current metrics (for node_exporter's textfile collector)."""
+    path = Path(path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(render_prometheus())
+    tmp.replace(path)
+
+
+def start_file_exporter(path: str | Path, interval: float = 15.0) -> threading.Thread:
+    def loop() -> None:
+        while True:
+            try:
+                write_metrics_file(path)
+            except OSError:
+                logger.warning("Could not write metrics to %s", path, exc_info=True)
+            time.sleep(interval)
+
+    thread = threading.Thread(target=loop, name="metrics-file", daemon=True)
+    thread.start()
+    return thread
+
+
+_configured = False
+_configure_lock = threading.Lock()
+
+
+def configure_from_env() -> None:
+    """Start the exporters requested by ``METRICS_PORT``/``METRICS_FILE`` (once per process)."""
+    global _configured
+    with _configure_lock:
+        if _configured:
+            return
+        _configured = True
+        port = os.environ.get("METRICS_PORT")
+        if port:
+            try:
+                start_http_exporter(int(port), os.environ.get("METRICS_HOST", "127.0.0.1"))
+            except OSError:
+                logger.warning("Could not serve metrics on port %s", port, exc_info=True)
+        path = os.environ.get("METRICS_FILE")
+        if path:
+            start_file_exporter(path, float(os.environ.get("METRICS_INTERVAL", "15")))
@@ -0,0 +1,277 @@
+"""Catalogue of the bundled models with vectorized, JSON-friendly predict functions.
+
+Every entry turns a list of input rows (plain dicts, as decoded from JSON)
+into one list of predictions using a single vectorized ``predict`` call, so
+callers such as the inference server can batch rows from many requests.
+
+    predict_rows("iris", [{"sepal length (cm)": 5.8, ...}, ...])
+"""
+import base64
+import io
+import json
+import logging
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from common.compiled import CompiledPipeline, load_compiled_pipeline
+from common.registry import load_artifact, load_keras_model
+
+logger = logging.getLogger(__name__)
+
+ROOT = Path(__file__).resolve().parents[1]
+
+Rows = list[dict[str, Any]]
+
+
+@dataclass(frozen=True)
+class ModelSpec:
+    name: str
+    description: str
+    # Artefact paths, or a function resolving them each time they are needed
+    paths: tuple[Path, ...] | Callable[[], tuple[Path, ...]]
+    predict: Callable[[Rows], list]
+    # CPU-heavy models are worth running in a process pool
+    cpu_bound: bool = False
+
+    @property
+    def artifacts(self) -> tuple[Path, ...]:
+        return self.paths() if callable(self.paths) else self.paths
+
+
+def _require_columns(rows: Rows, columns: list[str]) -> pd.DataFrame:
+    for i, row in enumerate(rows):
+        missing = [c for c in columns if c not in row]
+        if missing:
+            raise ValueError(f"Row {i} is missing {missing}")
+    return pd.DataFrame.from_records(rows, columns=columns)
+
+
+def _require_finite(frame: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    # Like the batch scorers: a null, non-numeric or infinite feature is
+    # rejected instead of being turned into a prediction
+    for column in columns:
+        values = pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype=np.float64)
+        bad = ~np.isfinite(values)
+        if bad.any():
+            raise ValueError(f"Row {int(bad.argmax())}: {column} is not a finite number")
+        frame[column] = values
+    return frame
+
+
+def _onehot_categories(pipeline) -> dict[str, list]:
+    pre = pipeline.steps[0][1]
+    categories = {}
+    for _, transformer, columns in getattr(pre, "transformers_", []):
+        if hasattr(transformer, "categories_"):
+            for column, cats in zip(columns, transformer.categories_):
+                categories[column] = list(cats)
+    return categories
+
+
+def _match_categories(frame: pd.DataFrame, categories: dict[str, list]) -> pd.DataFrame:
+    # Some models were fitted on raw strings with trailing spaces ("Snack "),
+    # retrained ones on stripped strings: accept either from callers and map
+    # it to the fitted one
+    for column, cats in categories.items():
+        by_clean = {str(c).strip(): c for c in cats}
+        if len(by_clean) == len(cats):
+            frame[column] = frame[column].map(lambda v: by_clean.get(str(v).strip(), v))
+    return frame
+
+
+def _compiled_or_none(path: Path) -> CompiledPipeline | None:
+    # load_compiled_pipeline compiles once per process; models it can't
+    # compile fail fast on their structure, so retrying costs next to nothing
+    try:
+        return load_compiled_pipeline(path)
+    except TypeError:
+        return None
+
+
+def _pipeline_model(relative_path: str) -> Callable[[Rows], list]:
+    path = ROOT / relative_path
+
+    def predict(rows: Rows) -> list:
+        pipeline = load_artifact(path)
+        columns = list(pipeline.feature_names_in_)
+        categories = _onehot_categories(pipeline)
+        frame = _require_columns(rows, columns)
+        frame = _require_finite(frame, [c for c in columns if c not in categories])
+        frame = _match_categories(frame, categories)
+        compiled = _compiled_or_none(path)
+        if compiled is not None:
+            return compiled.predict_frame(frame).tolist()
+        return pipeline.predict(frame).tolist()
+
+    return predict
+
+
+_RETAIL_DIR = ROOT / "1. Retail Price Optimization - Regression/model"
+_RETAIL_NUMERIC = [
+    "qty", "lag_price", "unit_price", "customers",
+    "comp1_price_diff", "comp2_price_diff", "comp3_price_diff", "s",
+]
+
+
+def _predict_retail(rows: Rows) -> list:
+    model = load_artifact(_RETAIL_DIR / "retail_price_model.pkl")
+    encoder = load_artifact(_RETAIL_DIR / "encoder.pkl")
+    scaler = load_artifact(_RETAIL_DIR / "scaler.pkl")
+
+    frame = _require_columns(rows, _RETAIL_NUMERIC + ["product_category_name"])
+    frame = _require_finite(frame, _RETAIL_NUMERIC)
+    encoded = pd.DataFrame(
+        encoder.transform(frame[["product_category_name"]]),
+        columns=encoder.get_feature_names_out(["product_category_name"]),
+        index=frame.index,
+    )
+    features = pd.concat([frame[_RETAIL_NUMERIC], encoded], axis=1)
+    return model.predict(scaler.transform(features)).tolist()
+
+
+_EMOTIONS_DIR = ROOT / "5. Text Emotions - Classification/model"
+
+
+def _predict_emotions(rows: Rows) -> list:
+    from tensorflow.keras.preprocessing.sequence import pad_sequences
+
+    model = load_keras_model(_EMOTIONS_DIR / "text_emotions_model.keras")
+    tokenizer = load_artifact(_EMOTIONS_DIR / "tokenizer.pkl")
+    encoder = load_artifact(_EMOTIONS_DIR / "encoder.pkl")
+    max_length = json.loads((_EMOTIONS_DIR / "metadata.json").read_text())["max_sequence_length"]
+
+    texts = [str(row["text"]) for row in rows]
+    padded = pad_sequences(tokenizer.texts_to_sequences(texts), maxlen=max_length)
+    probabilities = model.predict(padded, batch_size=len(texts), verbose=0)
+    classes = list(encoder.classes_)
+    return [
+        {
+            "label": classes[int(np.argmax(p))],
+            "probabilities": dict(zip(classes, p.astype(float).tolist())),
+        }
+        for p in probabilities
+    ]
+
+
+_MNIST_DIR = ROOT / "10. MNIST Digits Classification - Computer Vision"
+
+
+def _mnist_model_path() -> Path:
+    """The artefact the MNIST app would start with now (``MNIST_MODEL``), else the exact SVC."""
+    if str(_MNIST_DIR) not in sys.path:
+        sys.path.insert(0, str(_MNIST_DIR))
+    from mnist_models import SVC_PATH, available_models, default_model
+
+    models = available_models()
+    return models[default_model(models)] if models else SVC_PATH
+
+
+def _mnist_pixels(row: dict[str, Any]) -> np.ndarray:
+    if "pixels" in row:
+        pixels = np.asarray(row["pixels"], dtype=np.float32).reshape(-1)
+        if pixels.size != 28 * 28:
+            raise ValueError("'pixels' must hold 784 values")
+        return pixels
+    # Same preprocessing as the app: grayscale, 28x28, white digit on black
+    from PIL import Image, ImageOps
+
+    image = Image.open(io.BytesIO(base64.b64decode(row["image"])))
+    image = ImageOps.invert(image.convert("L").resize((28, 28)))
+    return np.asarray(image, dtype=np.float32).reshape(-1) / 255.0
+
+
+def _predict_mnist(rows: Rows) -> list:
+    # Resolved per call, so a new zoo export or fast model is picked up without a restart
+    model = load_artifact(_mnist_model_path(), mmap_mode="r")
+    X = np.stack([_mnist_pixels(row) for row in rows])
+    return [int(digit) for digit in model.predict(X)]
+
+
+MODELS: dict[str, ModelSpec] = {
+    spec.name: spec
+    for spec in [
+        ModelSpec(
+            "retail",
+            "Total price of a retail order",
+            (_RETAIL_DIR / "retail_price_model.pkl", _RETAIL_DIR / "encoder.pkl", _RETAIL_DIR / "scaler.pkl"),
+            _predict_retail,
+        ),
+        ModelSpec(
+            "car",
+            "Price of a car",
+            (ROOT / "2. Car Price Prediction - Regression/car_price_prediction_pipeline.pkl",),
+            _pipeline_model("2. Car Price Prediction - Regression/car_price_prediction_pipeline.pkl"),
+            cpu_bound=True,
+        ),
+        ModelSpec(
+            "delivery",
+            "Food delivery time in minutes",
+            (ROOT / "3. Food Delivery Time Prediction - Regression/food_delivery_time_prediction_model.pkl",),
+            _pipeline_model("3. Food Delivery Time Prediction - Regression/food_delivery_time_prediction_model.pkl"),
+        ),
+        ModelSpec(
+            "iris",
+            "Iris species",
+            (ROOT / "4. Iris Flower - Classification/iris_flower_classification.pkl",),
+            _pipeline_model("4. Iris Flower - Classification/iris_flower_classification.pkl"),
+        ),
+        ModelSpec(
+            "text-emotions",
+            "Emotion of a text ({'text': ...})",
+            (_EMOTIONS_DIR / "text_emotions_model.keras", _EMOTIONS_DIR / "tokenizer.pkl", _EMOTIONS_DIR / "encoder.pkl"),
+            _predict_emotions,
+            cpu_bound=True,
+        ),
+        ModelSpec(
+            "mobile",
+            "Mobile phone price range",
+            (ROOT / "6. Mobile Price - Classification/mobile_price_classification.pkl",),
+            _pipeline_model("6. Mobile Price - Classification/mobile_price_classification.pkl"),
+        ),
+        ModelSpec(
+            "music",
+            "Music genre cluster",
+            (ROOT / "7. Music Genres - Clustering/music_genres_pipeline.pkl",),
+            _pipeline_model("7. Music Genres - Clustering/music_genres_pipeline.pkl"),
+        ),
+        ModelSpec(
+            "credit-card",
+            "Credit card customer cluster",
+            (ROOT / "8. Credit Card - Clustering/credit_card_clustering_pipeline.pkl",),
+            _pipeline_model("8. Credit Card - Clustering/credit_card_clustering_pipeline.pkl"),
+        ),
+        ModelSpec(
+            "mnist",
+            "Handwritten digit ({'pixels': [784 floats]} or {'image': base64})",
+            lambda: (_mnist_model_path(),),
+            _predict_mnist,
+            cpu_bound=True,
+        ),
+    ]
+}
+
+
+def predict_rows(name: str, rows: Rows) -> list:
+    """Predict ``rows`` with the model ``name``; module-level so process pools can pickle it."""
+    return MODELS[name].predict(rows)
+
+
+def warm_up(names: list[str]) -> None:
+    """Load the artefacts of ``names`` into this process (process pool initializer)."""
+    for name in names:
+        for path in MODELS[name].artifacts:
+            if not path.exists():
+                continue
+            try:
+                if path.suffix == ".keras":
+                    load_keras_model(path)
+                else:
+                    load_artifact(path, mmap_mode="r" if name == "mnist" else None)
+            except Exception:
+                # Leave it to the first request to report the error
+                logger.warning("Could not preload %s", path, exc_info=True)
@@ -0,0 +1,98 @@
+"""Small helpers to measure time and memory of the running process."""
+import os
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+
+def current_rss_bytes() -> int:
+    """Return the resident set size of the current process in bytes."""
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0
+    # Not on Linux: fall back to the peak RSS reported by getrusage
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Human readable size, e.g. ``12.3 MiB``."""
+    for unit in ("B", "KiB", "MiB"):
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f} GiB"
+
+
+@dataclass(frozen=True)
+class ImportStats:
+    label: str
+    page: str
+    seconds: float
+    modules_loaded: int
+    rss_delta_bytes: int
+
+
+_import_stats: list[ImportStats] = []
+
+
+@contextmanager
+def timed_import(label: str, owner: str) -> Iterator[None]:
+    """Time the import statements run inside the block.
+
+    ``owner`` is the ``__file__`` of the importing app; its folder name is
+    used as the page name in the startup report. Nothing is recorded when the
+    modules were already imported, so wrapping an import that runs on every
+    Streamlit rerun only reports the first, cold import.
+
+        with timed_import("tensorflow", __file__):
+            from tensorflow.keras.preprocessing.sequence import pad_sequences
+    """
+    modules_before = len(sys.modules)
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    yield
+    elapsed = time.perf_counter() - start
+    modules_loaded = len(sys.modules) - modules_before
+    if modules_loaded > 0:
+        _import_stats.append(
+            ImportStats(
+                label=label,
+                page=Path(owner).resolve().parent.name,
+                seconds=elapsed,
+                modules_loaded=modules_loaded,
+                rss_delta_bytes=max(current_rss_bytes() - rss_before, 0),
+            )
+        )
+
+
+def import_stats() -> list[ImportStats]:
+    """Cold imports recorded by ``timed_import`` so far, in import order."""
+    return list(_import_stats)
+
+
+def peak_rss_bytes() -> int:
+    """Highest resident set size reached by the current process, in bytes."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return current_rss_bytes()
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,127 @@
+"""Process-wide registry for the model artefacts shipped with each project.
+
+Streamlit re-executes ``app.py`` on every widget interaction, so loading a
+pickle at module level means reading it from disk again on every slider move
+and keeping one copy per session. ``load_artifact`` loads each file once per
+process and hands the same object to every caller afterwards.
+
+    pipeline = load_artifact(APP_DIR / "car_price_prediction_pipeline.pkl")
+    model = load_artifact(APP_DIR / "mnist_svc_model.pkl", mmap_mode="r")
+    model = load_keras_model(APP_DIR / "model/text_emotions_model.keras")
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import joblib
+
+from common.profiling import current_rss_bytes, format_bytes
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArtifactStats:
+    path: str
+    loader: str
+    mmap_mode: str | None
+    file_bytes: int
+    load_seconds: float
+    rss_delta_bytes: int
+
+
+_artifacts: dict[tuple, Any] = {}
+_stats: dict[tuple, ArtifactStats] = {}
+_key_locks: dict[tuple, threading.Lock] = {}
+_registry_lock = threading.Lock()
+
+
+def _joblib_loader(path: Path, mmap_mode: str | None) -> Any:
+    return joblib.load(path, mmap_mode=mmap_mode)
+
+
+def _keras_loader(path: Path, mmap_mode: str | None) -> Any:
+    # Imported here so that apps which never reach the model don't pay for TensorFlow
+    from tensorflow.keras.models import load_model
+
+    return load_model(path)
+
+
+def load_artifact(
+    path: str | Path,
+    *,
+    mmap_mode: str | None = None,
+    loader: Callable[[Path, str | None], Any] = _joblib_loader,
+) -> Any:
+    """Load ``path`` once per process and return the cached object.
+
+    ``mmap_mode`` is forwarded to ``joblib.load``: with ``"r"`` the numpy
+    arrays inside an uncompressed joblib dump are memory-mapped instead of
+    copied into the heap, so the pages are shared between processes and only
+    touched on demand.
+    """
+    path = Path(path).resolve()
+    key = (str(path), mmap_mode, loader.__name__)
+
+    cached = _artifacts.get(key)
+    if cached is not None:
+        return cached
+
+    with _registry_lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+
+    # One lock per artefact: concurrent sessions wait for the first load
+    # instead of loading the same file in parallel
+    with key_lock:
+        if key in _artifacts:
+            return _artifacts[key]
+
+        rss_before = current_rss_bytes()
+        start = time.perf_counter()
+        artifact = loader(path, mmap_mode)
+        elapsed = time.perf_counter() - start
+
+        stats = ArtifactStats(
+            path=str(path),
+            loader=loader.__name__.strip("_"),
+            mmap_mode=mmap_mode,
+            file_bytes=path.stat().st_size if path.is_file() else 0,
+            load_seconds=elapsed,
+            rss_delta_bytes=max(current_rss_bytes() - rss_before, 0),
+        )
+        logger.info(
+            "Loaded %s in %.3fs (file %s, rss +%s%s)",
+            path.name,
+            elapsed,
+            format_bytes(stats.file_bytes),
+            format_bytes(stats.rss_delta_bytes),
+            f", mmap_mode={mmap_mode}" if mmap_mode else "",
+        )
+
+        _artifacts[key] = artifact
+        _stats[key] = stats
+        return artifact
+
+
+def load_keras_model(path: str | Path) -> Any:
+    """Load a ``.keras`` model once per process."""
+    return load_artifact(path, loader=_keras_loader)
+
+
+def artifact_stats() -> list[ArtifactStats]:
+    """Load statistics of every artefact loaded so far, in load order."""
+    return list(_stats.values())
+
+
+def evict(path: str | Path | None = None) -> None:
+    """Drop cached artefacts (all of them when ``path`` is None)."""
+    resolved = None if path is None else str(Path(path).resolve())
+    with _registry_lock:
+        for key in list(_artifacts):
+            if resolved is None or key[0] == resolved:
+                _artifacts.pop(key, None)
+                _stats.pop(key, None)
+                _key_locks.pop(key, None)
@@ -0,0 +1,218 @@
+"""Zero-downtime hot reload of model artefacts.
+
+``watch_model`` keeps one model per file path in the process and polls the
+file in a background thread. When a new version lands it is loaded next to
+the serving one (double buffering), warmed up with a few sample predictions
+and only then swapped in atomically. The previous version is released once
+the last request that acquired it has finished:
+
+    model = watch_model(APP_DIR / "car_price_prediction_pipeline.pkl", name="car", warm_up=warm_up)
+    with model.acquire() as pipeline:
+        prediction = pipeline.predict(frame)
+
+A version is the short SHA-256 of the file, shown by the apps and exported as
+the ``model_version_info`` gauge. A half-written file is not picked up: a
+change has to stay unchanged for one more polling interval before it is
+loaded, and a version that fails to load or warm up is skipped (the old one
+keeps serving) until the file changes again.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+import joblib
+
+from common.metrics import counter, gauge
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_INTERVAL = float(os.environ.get("MODEL_RELOAD_INTERVAL", "2"))
+
+VERSION_INFO = gauge("model_version_info", "Model version currently serving (1) per app", ("app", "version"))
+RELOADS = counter("model_reloads_total", "Hot reload attempts per app and outcome", ("app", "outcome"))
+
+
+def file_version(path: str | Path) -> str:
+    """Short SHA-256 of the file contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def _signature(path: Path) -> tuple[int, int] | None:
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclass(eq=False)
+class _Slot:
+    model: Any
+    version: str
+    loaded_at: float = field(default_factory=time.time)
+    # Requests currently using this version
+    refs: int = 0
+    retired: bool = False
+
+
+class ReloadingModel:
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        name: str,
+        loader: Callable[[Path], Any] = joblib.load,
+        warm_up: Callable[[Any], None] | None = None,
+        interval: float = DEFAULT_INTERVAL,
+    ):
+        self.path = Path(path).resolve()
+        self.name = name
+        self.loader = loader
+        self.warm_up = warm_up
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._draining: list[_Slot] = []
+        self._signature = _signature(self.path)
+        self._pending: tuple[int, int] | None = None
+        self._rejected: str | None = None
+        self._active = self._load(file_version(self.path))
+        VERSION_INFO.set(1, app=self.name, version=self._active.version)
+        self._watcher: threading.Thread | None = None
+
+    @property
+    def version(self) -> str:
+        return self._active.version
+
+    @property
+    def loaded_at(self) -> float:
+        return self._active.loaded_at
+
+    @property
+    def draining_versions(self) -> list[str]:
+        """Replaced versions still finishing in-flight requests."""
+        with self._lock:
+            return [slot.version for slot in self._draining]
+
+    @contextmanager
+    def acquire(self) -> Iterator[Any]:
+        """Hold the serving version for the duration of one request."""
+        with self._lock:
+            slot = self._active
+            slot.refs += 1
+        try:
+            yield slot.model
+        finally:
+            with self._lock:
+                slot.refs -= 1
+                if slot.retired and slot.refs == 0:
+                    self._release(slot)
+
+    def _load(self, version: str) -> _Slot:
+        start = time.perf_counter()
+        model = self.loader(self.path)
+        if self.warm_up is not None:
+            self.warm_up(model)
+        logger.info("Loaded %s version %s in %.3fs", self.path.name, version, time.perf_counter() - start)
+        return _Slot(model, version)
+
+    def _release(self, slot: _Slot) -> None:
+        # Called with self._lock held, once nobody uses the version any more
+        self._draining.remove(slot)
+        slot.model = None
+        logger.info("Released %s version %s", self.path.name, slot.version)
+
+    def _swap(self, new: _Slot) -> None:
+        with self._lock:
+            old, self._active = self._active, new
+            old.retired = True
+            self._draining.append(old)
+            if old.refs == 0:
+                self._release(old)
+        VERSION_INFO.set(0, app=self.name, version=old.version)
+        VERSION_INFO.set(1, app=self.name, version=new.version)
+
+    def check(self, *, force: bool = False) -> bool:
+        """Reload if the file holds a new version; return True if it was swapped in.
+
+        Without ``force`` a change is only acted upon once the file has kept
+        the same size and mtime between two calls.
+        """
+        with self._reload_lock:
+            signature = _signature(self.path)
+            if signature is None or signature == self._signature:
+                self._pending = None
+                return False
+            if not force and signature != self._pending:
+                self._pending = signature
+                return False
+            self._pending = None
+
+            version = file_version(self.path)
+            if version in (self._active.version, self._rejected):
+                # Touched but not changed, or a version that already failed
+                self._signature = signature
+                return False
+            try:
+                slot = self._load(version)
+            except Exception:
+                logger.exception(
+                    "Keeping %s version %s: version %s failed to load", self.path.name, self.version, version
+                )
+                RELOADS.inc(app=self.name, outcome="failed")
+                self._rejected = version
+                self._signature = signature
+                return False
+            self._signature = signature
+            self._rejected = None
+            self._swap(slot)
+            RELOADS.inc(app=self.name, outcome="swapped")
+            return True
+
+    def start(self) -> None:
+        """Poll the file every ``interval`` seconds from a daemon thread."""
+        if self._watcher is not None:
+            return
+
+        def watch() -> None:
+            while True:
+                time.sleep(self.interval)
+                try:
+                    self.check()
+                except Exception:
+                    logger.exception("Watching %s failed", self.path)
+
+        self._watcher = threading.Thread(target=watch, name=f"reload-{self.name}", daemon=True)
+        self._watcher.start()
+
+
+_models: dict[str, ReloadingModel] = {}
+_models_lock = threading.Lock()
+
+
+def watch_model(
+    path: str | Path,
+    *,
+    name: str,
+    loader: Callable[[Path], Any] = joblib.load,
+    warm_up: Callable[[Any], None] | None = None,
+    interval: float = DEFAULT_INTERVAL,
+) -> ReloadingModel:
+    """The process-wide hot-reloading model for ``path``, started on first use."""
+    key = str(Path(path).resolve())
+    with _models_lock:
+        model = _models.get(key)
+        if model is None:
+            model = _models[key] = ReloadingModel(path, name=name, loader=loader, warm_up=warm_up, interval=interval)
+            model.start()
+        return model
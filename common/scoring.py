@@ -0,0 +1,132 @@
+"""Chunked CSV scoring shared by the bulk prediction command lines and apps.
+
+An app supplies only its schema: the columns it needs and a ``prepare``
+callable turning a chunk read as text into model input plus a per-row error
+message ('' when the row can be scored). Everything else is common: the CSV
+is read in chunks, each chunk's valid rows go through one vectorized
+``predict``, and the chunk is appended to the output with the prediction and
+an ``error`` column, so memory stays bounded whatever the size of the input:
+
+    report = score_csv(source, sink, prepare, pipeline.predict, columns=COLUMNS, target="predicted_price")
+"""
+import argparse
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, TextIO
+
+import numpy as np
+import pandas as pd
+
+Prepare = Callable[[pd.DataFrame], tuple[pd.DataFrame, pd.Series]]
+Predict = Callable[[pd.DataFrame], np.ndarray]
+
+
+@dataclass
+class BatchReport:
+    rows: int = 0
+    invalid_rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def check_header(header: list[str], columns: list[str]) -> None:
+    missing = [c for c in columns if c not in header]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+
+def score_chunks(
+    chunks: Iterator[pd.DataFrame],
+    prepare: Prepare,
+    predict: Predict,
+    *,
+    columns: list[str],
+    target: str,
+    decimals: int = 2,
+    copy: dict[str, int] | None = None,
+) -> Iterator[pd.DataFrame]:
+    """Yield each chunk with ``target`` and ``error`` columns added.
+
+    ``copy`` maps model input columns derived by ``prepare`` to the decimals
+    they are written with, ahead of ``target``.
+    """
+    for chunk in chunks:
+        check_header(list(chunk.columns), columns)
+        features, errors = prepare(chunk)
+        valid = (errors == "").to_numpy()
+        predictions = np.full(len(chunk), np.nan)
+        if valid.any():
+            # One vectorized predict for every valid row of the chunk
+            predictions[valid] = predict(features[valid])
+        derived = {column: features[column].round(places) for column, places in (copy or {}).items()}
+        yield chunk.assign(**derived, **{target: predictions.round(decimals)}, error=errors)
+
+
+def score_csv(
+    source: str | Path | TextIO,
+    sink: str | Path | TextIO,
+    prepare: Prepare,
+    predict: Predict,
+    *,
+    columns: list[str],
+    target: str,
+    decimals: int = 2,
+    copy: dict[str, int] | None = None,
+    chunksize: int = 10_000,
+    on_chunk: Callable[[BatchReport], None] | None = None,
+) -> BatchReport:
+    """Stream ``source`` to ``sink`` with a prediction for every row, one chunk at a time."""
+    report = BatchReport()
+    start = time.perf_counter()
+    # Read every column as text: validation decides what is a number
+    chunks = pd.read_csv(source, chunksize=chunksize, dtype=str, keep_default_na=False)
+    scored_chunks = score_chunks(chunks, prepare, predict, columns=columns, target=target, decimals=decimals, copy=copy)
+    for i, scored in enumerate(scored_chunks):
+        scored.to_csv(sink, index=False, header=i == 0, mode="w" if i == 0 else "a")
+        report.rows += len(scored)
+        report.invalid_rows += int((scored["error"] != "").sum())
+        report.seconds = time.perf_counter() - start
+        if on_chunk is not None:
+            on_chunk(report)
+    return report
+
+
+def main(
+    score: Callable[..., BatchReport],
+    *,
+    description: str,
+    input_help: str,
+    output_help: str,
+    chunksize: int,
+    unit: str = "rows",
+    done: str = "scored",
+) -> int:
+    """Command line around ``score(source, sink, chunksize=..., on_chunk=...)``, progress on stderr."""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("input", help=f"{input_help} ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help=f"{output_help} ('-' for stdout)")
+    parser.add_argument("--chunksize", type=int, default=chunksize, help="Rows per predict call")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else args.input
+    sink = sys.stdout if args.output == "-" else args.output
+
+    def progress(report: BatchReport) -> None:
+        print(f"\r{report.rows:,} {unit}, {report.rows_per_sec:,.0f} rows/s", end="", file=sys.stderr, flush=True)
+
+    try:
+        report = score(source, sink, chunksize=args.chunksize, on_chunk=progress)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    print(
+        f"\r{report.rows:,} {unit} {done} in {report.seconds:.2f}s ({report.rows_per_sec:,.0f} rows/s), "
+        f"{report.invalid_rows:,} invalid",
+        file=sys.stderr,
+    )
+    return 0
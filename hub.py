@@ -0,0 +1,114 @@
+"""Run every project app as a page of a single Streamlit process.
+
+    poetry run streamlit run hub.py
+
+Pages share one Python process, so models loaded through
+``common.registry`` and heavy libraries (TensorFlow, OpenCV, plotly, ...)
+are loaded at most once, and only when a page that needs them is opened.
+"""
+import time
+from pathlib import Path
+
+import pandas as pd
+import streamlit as st
+
+from common.profiling import current_rss_bytes, format_bytes, import_stats
+from common.registry import artifact_stats
+
+ROOT = Path(__file__).resolve().parent
+
+# (project folder, page title, url path)
+APPS = [
+    ("1. Retail Price Optimization - Regression", "Retail Price Optimization", "retail-price"),
+    ("2. Car Price Prediction - Regression", "Car Price Prediction", "car-price"),
+    ("3. Food Delivery Time Prediction - Regression", "Food Delivery Time", "food-delivery"),
+    ("4. Iris Flower - Classification", "Iris Flower", "iris"),
+    ("5. Text Emotions - Classification", "Text Emotions", "text-emotions"),
+    ("6. Mobile Price - Classification", "Mobile Price", "mobile-price"),
+    ("7. Music Genres - Clustering", "Music Genres", "music-genres"),
+    ("8. Credit Card - Clustering", "Credit Card", "credit-card"),
+    ("9. Customer RFM Analysis - Clustering", "Customer RFM Analysis", "customer-rfm"),
+    ("10. MNIST Digits Classification - Computer Vision", "MNIST Digits", "mnist"),
+    ("12. Real-time OCR - Computer Vision", "Real-time OCR", "ocr"),
+]
+
+
+@st.cache_resource
+def _process_started_at() -> float:
+    # Cached resources live as long as the server process
+    return time.time()
+
+
+def _page_of(path: str) -> str:
+    try:
+        return Path(path).relative_to(ROOT).parts[0]
+    except ValueError:
+        return "(outside repository)"
+
+
+def startup_report() -> None:
+    st.title("Startup report")
+    st.caption("Cold imports and model loads recorded since this process started.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Process RSS", format_bytes(current_rss_bytes()))
+    with col2:
+        st.metric("Uptime (s)", f"{time.time() - _process_started_at():.0f}")
+    with col3:
+        st.metric("Models loaded", len(artifact_stats()))
+
+    imports = pd.DataFrame(
+        [
+            {
+                "Page": s.page,
+                "Import": s.label,
+                "Seconds": round(s.seconds, 3),
+                "Modules": s.modules_loaded,
+                "RSS delta": format_bytes(s.rss_delta_bytes),
+            }
+            for s in import_stats()
+        ],
+        columns=["Page", "Import", "Seconds", "Modules", "RSS delta"],
+    ).astype({"Seconds": float})
+    models = pd.DataFrame(
+        [
+            {
+                "Page": _page_of(s.path),
+                "Artifact": Path(s.path).name,
+                "Seconds": round(s.load_seconds, 3),
+                "File size": format_bytes(s.file_bytes),
+                "RSS delta": format_bytes(s.rss_delta_bytes),
+                "mmap": s.mmap_mode or "",
+            }
+            for s in artifact_stats()
+        ],
+        columns=["Page", "Artifact", "Seconds", "File size", "RSS delta", "mmap"],
+    ).astype({"Seconds": float})
+
+    st.subheader("Per page")
+    per_page = pd.DataFrame(
+        {
+            "Import seconds": imports.groupby("Page")["Seconds"].sum(),
+            "Model load seconds": models.groupby("Page")["Seconds"].sum(),
+        }
+    ).fillna(0.0)
+    per_page["Total seconds"] = per_page.sum(axis=1)
+    st.dataframe(per_page.sort_values("Total seconds", ascending=False), width='stretch')
+
+    st.subheader("Imports")
+    st.dataframe(imports, width='stretch', hide_index=True)
+
+    st.subheader("Model artefacts")
+    st.dataframe(models, width='stretch', hide_index=True)
+
+
+_process_started_at()
+
+pages = [
+    st.Page(ROOT / folder / "app.py", title=title, url_path=url_path)
+    for folder, title, url_path in APPS
+]
+pages.append(st.Page(startup_report, title="Startup report", url_path="startup-report"))
+
+st.navigation(pages).run()
@@ -0,0 +1,306 @@
+"""Load-test the apps with concurrent simulated user sessions.
+
+    poetry run python loadtest.py --sessions 1 8 32 --interactions 10
+    poetry run python loadtest.py iris customer-rfm --sessions 16 --think-ms 200
+
+Each session is a headless ``AppTest`` of the app's ``app.py`` doing what a
+user would: moving the Iris sliders and clicking Predict, uploading a
+transactions CSV and filtering segments in the RFM app, typing sentences in
+Text Emotions, and changing inputs and predicting in the other apps. Every
+interaction is one script rerun, as in the browser. Sessions run in threads
+of one process, as they do in a Streamlit server, and every app is tested in
+a fresh process. ``AppTest`` installs a process-global runtime for each run,
+so runs are serialized by a lock; the time spent waiting for it counts as
+latency, much like waiting for the GIL in a busy server, and the run time
+alone is reported as service time.
+
+For each app and number of concurrent sessions it reports the reruns per
+second, p50/p95/p99 rerun latency, the errors, and the resident memory
+added per live session. That last figure is measured against a process
+that has already served one session, so model loads and imports don't
+count.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+from common.profiling import current_rss_bytes, format_bytes
+
+ROOT = Path(__file__).resolve().parent
+
+# One rerun of the script after the simulated user changed something
+Interaction = Callable[[AppTest, random.Random], None]
+
+
+def _move(widget, rng: random.Random) -> None:
+    """Set a slider, number input or selectbox to a random valid value."""
+    if widget.type == "selectbox":
+        widget.set_value(rng.choice(widget.options))
+    elif isinstance(widget.value, (tuple, list)):
+        return
+    elif widget.type == "slider":
+        steps = int(round((widget.max - widget.min) / widget.step))
+        widget.set_value(type(widget.value)(widget.min + rng.randint(0, steps) * widget.step))
+    else:
+        low = widget.min if widget.min is not None else widget.value - 10 * (widget.step or 1)
+        high = widget.max if widget.max is not None else widget.value + 10 * (widget.step or 1)
+        value = rng.uniform(low, high)
+        widget.set_value(int(round(value)) if isinstance(widget.value, int) else value)
+
+
+def _inputs(at) -> list:
+    return [*at.slider, *at.number_input, *at.selectbox]
+
+
+def change_input_and_predict(at: AppTest, rng: random.Random, round: int) -> list[Interaction]:
+    """Change one input (one rerun), then click the app's first button (another)."""
+    return [
+        lambda at, rng: _move(rng.choice(_inputs(at)), rng) if _inputs(at) else None,
+        lambda at, rng: at.button[0].click() if at.button else None,
+    ]
+
+
+def move_slider_and_predict(at: AppTest, rng: random.Random, round: int) -> list[Interaction]:
+    return [
+        lambda at, rng: _move(rng.choice(at.slider), rng),
+        lambda at, rng: at.button[0].click(),
+    ]
+
+
+def _transactions_csv(rng: random.Random) -> bytes:
+    # A resampled copy of the bundled transactions, different for every session
+    lines = (ROOT / "9. Customer RFM Analysis - Clustering/rfm_data.csv").read_text().splitlines()
+    rows = rng.choices(lines[1:], k=rng.randint(200, 2000))
+    return "\n".join([lines[0], *rows]).encode()
+
+
+def upload_and_filter(at: AppTest, rng: random.Random, round: int) -> list[Interaction]:
+    if round == 0:
+        return [
+            lambda at, rng: at.file_uploader[0].set_value(("transactions.csv", _transactions_csv(rng), "text/csv"))
+        ]
+    segment = next(s for s in at.selectbox if s.label == "Filter by segment")
+    return [lambda at, rng: segment.set_value(rng.choice(segment.options))]
+
+
+_SENTENCES: list[str] = []
+
+
+def type_text(at: AppTest, rng: random.Random, round: int) -> list[Interaction]:
+    if not _SENTENCES:
+        lines = (ROOT / "5. Text Emotions - Classification/data/test.txt").read_text().splitlines()
+        _SENTENCES.extend(line.rsplit(";", 1)[0] for line in lines if line)
+    return [lambda at, rng: at.text_input[0].input(rng.choice(_SENTENCES))]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    folder: str
+    next_interactions: Callable[[AppTest, random.Random, int], list[Interaction]] = change_input_and_predict
+
+
+SCENARIOS = {
+    "retail-price": Scenario("1. Retail Price Optimization - Regression"),
+    "car-price": Scenario("2. Car Price Prediction - Regression"),
+    "food-delivery": Scenario("3. Food Delivery Time Prediction - Regression"),
+    "iris": Scenario("4. Iris Flower - Classification", move_slider_and_predict),
+    "text-emotions": Scenario("5. Text Emotions - Classification", type_text),
+    "mobile-price": Scenario("6. Mobile Price - Classification"),
+    "music-genres": Scenario("7. Music Genres - Clustering"),
+    "credit-card": Scenario("8. Credit Card - Clustering"),
+    "customer-rfm": Scenario("9. Customer RFM Analysis - Clustering", upload_and_filter),
+}
+
+
+@dataclass
+class SessionResult:
+    latencies: list[float] = field(default_factory=list)
+    service_times: list[float] = field(default_factory=list)
+    errors: list[str] = field(default_factory=list)
+
+
+_run_lock = threading.Lock()
+
+
+def _timed_run(at: AppTest, result: SessionResult, timeout: float) -> None:
+    start = time.perf_counter()
+    with _run_lock:
+        run_start = time.perf_counter()
+        try:
+            at.run(timeout=timeout)
+        except Exception as e:
+            result.errors.append(f"{type(e).__name__}: {e}")
+            return
+        end = time.perf_counter()
+    result.latencies.append(end - start)
+    result.service_times.append(end - run_start)
+    result.errors.extend(str(e.value) for e in at.exception)
+
+
+def run_session(
+    scenario: Scenario, interactions: int, think: float, seed: int, timeout: float, live: list
+) -> SessionResult:
+    rng = random.Random(seed)
+    result = SessionResult()
+    at = AppTest.from_file(str(ROOT / scenario.folder / "app.py"), default_timeout=timeout)
+    # Keep the session alive until every session is done, like an open browser tab
+    live.append(at)
+    _timed_run(at, result, timeout)
+    done, round = 0, 0
+    while done < interactions and not result.errors:
+        for interaction in scenario.next_interactions(at, rng, round):
+            if done == interactions:
+                break
+            time.sleep(think)
+            try:
+                interaction(at, rng)
+            except Exception as e:
+                result.errors.append(f"{type(e).__name__}: {e}")
+                break
+            _timed_run(at, result, timeout)
+            done += 1
+        round += 1
+    return result
+
+
+class _RssSampler:
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = current_rss_bytes()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, current_rss_bytes())
+
+    def __enter__(self) -> "_RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes())
+
+
+def load_test_app(name: str, levels: tuple[int, ...], interactions: int, think: float, timeout: float) -> list[dict]:
+    scenario = SCENARIOS[name]
+    # One session first: imports, model loads and caches are not per-session costs
+    warm = run_session(scenario, interactions, 0.0, -1, timeout, [])
+    if warm.errors:
+        return [{"sessions": 0, "error": warm.errors[0]}]
+
+    results = []
+    for sessions in levels:
+        live: list = []
+        baseline = current_rss_bytes()
+        start = time.perf_counter()
+        with _RssSampler() as sampler, ThreadPoolExecutor(max_workers=sessions) as pool:
+            futures = [
+                pool.submit(run_session, scenario, interactions, think, seed, timeout, live)
+                for seed in range(sessions)
+            ]
+            session_results = [f.result() for f in futures]
+        elapsed = time.perf_counter() - start
+        rss_live = current_rss_bytes()
+        live.clear()
+
+        latencies = np.array([t for r in session_results for t in r.latencies]) * 1000
+        service_times = np.array([t for r in session_results for t in r.service_times]) * 1000
+        errors = [e for r in session_results for e in r.errors]
+        results.append(
+            {
+                "sessions": sessions,
+                "reruns": int(latencies.size),
+                "reruns_per_sec": latencies.size / elapsed,
+                "p50_ms": float(np.percentile(latencies, 50)) if latencies.size else None,
+                "p95_ms": float(np.percentile(latencies, 95)) if latencies.size else None,
+                "p99_ms": float(np.percentile(latencies, 99)) if latencies.size else None,
+                "service_p50_ms": float(np.percentile(service_times, 50)) if latencies.size else None,
+                "errors": len(errors),
+                "first_error": errors[0] if errors else None,
+                "rss_per_session_bytes": max(rss_live - baseline, 0) // sessions,
+                "peak_rss_bytes": sampler.peak,
+            }
+        )
+    return results
+
+
+def _format_level(name: str, level: dict) -> str:
+    if "error" in level:
+        return f"{name:<14} {level['error']}"
+    if not level["reruns"]:
+        return f"{name:<14} {level['sessions']:>4} sessions  no successful reruns ({level['first_error']})"
+    line = (
+        f"{name:<14} {level['sessions']:>4} sessions  {level['reruns_per_sec']:7.1f} reruns/s  "
+        f"p50 {level['p50_ms']:7.1f}ms  p95 {level['p95_ms']:7.1f}ms  p99 {level['p99_ms']:7.1f}ms  "
+        f"(service p50 {level['service_p50_ms']:.1f}ms)  "
+        f"+{format_bytes(level['rss_per_session_bytes'])}/session  peak {format_bytes(level['peak_rss_bytes'])}"
+    )
+    if level["errors"]:
+        line += f"  {level['errors']} errors ({level['first_error']})"
+    return line
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("apps", nargs="*", help=f"Apps to test (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 4, 16], help="Concurrent sessions to try")
+    parser.add_argument("--interactions", type=int, default=10, help="Reruns per session after the first load")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pause before each interaction")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout of one rerun in seconds")
+    parser.add_argument("--output", type=Path, default=Path("loadtest_results.json"))
+    args = parser.parse_args()
+    unknown = sorted(set(args.apps) - set(SCENARIOS))
+    if unknown:
+        parser.error(f"unknown apps: {', '.join(unknown)}")
+
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name in args.apps or list(SCENARIOS):
+        # A fresh process per app so memory and caches don't carry over
+        with context.Pool(1) as pool:
+            try:
+                results[name] = pool.apply(
+                    load_test_app,
+                    (name, tuple(args.sessions), args.interactions, args.think_ms / 1000, args.timeout),
+                )
+            except Exception as e:
+                results[name] = [{"sessions": 0, "error": f"{type(e).__name__}: {e}"}]
+        for level in results[name]:
+            print(_format_level(name, level), flush=True)
+
+    args.output.write_text(
+        json.dumps(
+            {
+                "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "cpus": os.cpu_count(),
+                "interactions": args.interactions,
+                "think_ms": args.think_ms,
+                "results": results,
+            },
+            indent=2,
+        )
+    )
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,215 @@
+"""Headless JSON inference server for every bundled model.
+
+    poetry run python serve.py --port 8000 --max-batch-size 64 --max-wait-ms 5
+
+    GET  /health
+    GET  /models
+    GET  /metrics           Prometheus text format
+    POST /predict/<model>   {"instances": [{...}, {...}]}  ->  {"predictions": [...]}
+
+Rows from concurrent requests to the same model are coalesced into one
+vectorized ``predict`` call (see ``common.batching``). Light models run in a
+thread pool; CPU-bound ones (``ModelSpec.cpu_bound``) run in a process pool
+when ``--processes`` is above zero, with their artefacts loaded once per
+worker.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+
+from common.batching import MicroBatcher
+from common.metrics import configure_from_env, render_prometheus
+from common.models import MODELS, predict_rows, warm_up
+
+logger = logging.getLogger("serve")
+
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class HttpError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class InferenceServer:
+    def __init__(self, *, max_batch_size: int, max_wait: float, threads: int, processes: int):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.threads = threads
+        self.processes = processes
+        self.batchers: dict[str, MicroBatcher] = {}
+        self._thread_pool: ThreadPoolExecutor | None = None
+        self._process_pool: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        self._thread_pool = ThreadPoolExecutor(max_workers=self.threads, thread_name_prefix="predict")
+        cpu_bound = [name for name, spec in MODELS.items() if spec.cpu_bound]
+        if self.processes > 0 and cpu_bound:
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.processes, initializer=warm_up, initargs=(cpu_bound,)
+            )
+        for name, spec in MODELS.items():
+            in_processes = spec.cpu_bound and self._process_pool is not None
+            self.batchers[name] = MicroBatcher(
+                partial(predict_rows, name),
+                max_batch_size=self.max_batch_size,
+                max_wait=self.max_wait,
+                executor=self._process_pool if in_processes else self._thread_pool,
+                max_concurrency=self.processes if in_processes else self.threads,
+                name=name,
+            )
+            self.batchers[name].start()
+
+    async def stop(self) -> None:
+        for batcher in self.batchers.values():
+            await batcher.stop()
+        if self._thread_pool is not None:
+            self._thread_pool.shutdown(wait=False, cancel_futures=True)
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=False, cancel_futures=True)
+
+    async def route(self, method: str, path: str, body: bytes) -> dict | str:
+        if path == "/health" and method == "GET":
+            return {"status": "ok"}
+        if path == "/metrics" and method == "GET":
+            return render_prometheus()
+        if path == "/models" and method == "GET":
+            return {
+                "models": [
+                    {
+                        "name": name,
+                        "description": spec.description,
+                        "available": all(p.exists() for p in spec.artifacts),
+                        "batches": self.batchers[name].stats.batches,
+                        "rows": self.batchers[name].stats.rows,
+                        "mean_batch_size": round(self.batchers[name].stats.mean_batch_size, 2),
+                    }
+                    for name, spec in MODELS.items()
+                ],
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
+        if path.startswith("/predict/"):
+            if method != "POST":
+                raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Use POST")
+            name = path.removeprefix("/predict/")
+            if name not in self.batchers:
+                raise HttpError(HTTPStatus.NOT_FOUND, f"Unknown model {name!r}")
+            try:
+                instances = json.loads(body)["instances"]
+            except (ValueError, KeyError, TypeError):
+                raise HttpError(HTTPStatus.BAD_REQUEST, 'Expected a JSON body {"instances": [...]}') from None
+            if not isinstance(instances, list) or not all(isinstance(row, dict) for row in instances):
+                raise HttpError(HTTPStatus.BAD_REQUEST, "'instances' must be a list of objects")
+            try:
+                predictions = await self.batchers[name].submit_many(instances)
+            except (ValueError, KeyError, TypeError) as e:
+                raise HttpError(HTTPStatus.UNPROCESSABLE_ENTITY, str(e)) from None
+            except FileNotFoundError as e:
+                raise HttpError(HTTPStatus.SERVICE_UNAVAILABLE, f"Model artefact not available: {e.filename}") from None
+            return {"model": name, "predictions": predictions}
+        raise HttpError(HTTPStatus.NOT_FOUND, f"No route for {method} {path}")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > MAX_BODY_BYTES:
+                        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = HTTPStatus.OK, await self.route(method, target.split("?")[0], body)
+                except HttpError as e:
+                    status, payload = e.status, {"error": str(e)}
+                    keep_alive = keep_alive and e.status != HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+                except Exception as e:
+                    logger.exception("Request %s %s failed", method, target)
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+
+                if isinstance(payload, str):
+                    data, content_type = payload.encode(), "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    data, content_type = json.dumps(payload).encode(), "application/json"
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + data
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(args: argparse.Namespace) -> None:
+    server = InferenceServer(
+        max_batch_size=args.max_batch_size,
+        max_wait=args.max_wait_ms / 1000,
+        threads=args.threads,
+        processes=args.processes,
+    )
+    server.start()
+    listener = await asyncio.start_server(server.handle_connection, args.host, args.port)
+    logger.info(
+        "Serving %d models on http://%s:%d (max batch %d, max wait %.1f ms, %d threads, %d processes)",
+        len(MODELS), args.host, args.port, args.max_batch_size, args.max_wait_ms, args.threads, args.processes,
+    )
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        await server.stop()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=64, help="Rows per predict call")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="How long a row may wait for a batch to fill")
+    parser.add_argument("--threads", type=int, default=4, help="Thread pool size for light models")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=max((os.cpu_count() or 2) - 1, 1),
+        help="Process pool size for CPU-bound models (0 runs them in the thread pool)",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    configure_from_env()
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()